@@ -0,0 +1,85 @@
+"""Resolve image paths or counts for many consumer IDs at once.
+
+Usage:
+    python batch_lookup.py IDS_FILE [-o OUT] [--format csv|jsonl] [--counts]
+
+IDS_FILE holds one consumer ID per line (the first comma-separated field
+is used, so an exported MRU list works as-is); "-" reads stdin. Results
+are streamed as they are resolved, so memory stays flat for any input size.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import config
+import image_lookup
+
+IMAGE_FIELDS = ["consumer_id", "date", "mru", "path"]
+COUNT_FIELDS = ["consumer_id", "images", "latest_date", "mru"]
+
+
+def read_ids(stream):
+    for line in stream:
+        field = line.split(",", 1)[0].strip().strip('"')
+        if field.isdigit():
+            yield field
+
+
+def lookup_rows(consumer_ids, counts=False, db_file=None):
+    """Yield one dict per image (or per consumer with counts=True) for `consumer_ids`."""
+    lookup = image_lookup.ConsumerImageLookup(db_file)
+    try:
+        if counts:
+            for cid, n, latest, mru in lookup.iter_counts_many(consumer_ids):
+                yield {"consumer_id": f"{cid:09d}", "images": n, "latest_date": latest, "mru": mru}
+        else:
+            for cid, images in lookup.iter_images_many(consumer_ids):
+                for date, mru, dir_path, filename in images:
+                    yield {"consumer_id": f"{cid:09d}", "date": date, "mru": mru,
+                           "path": os.path.join(dir_path, filename)}
+    finally:
+        lookup.close()
+
+
+def write_rows(rows, out, fmt, fields):
+    """Stream `rows` to `out` as CSV or JSON lines; returns the number written."""
+    n = 0
+    if fmt == "jsonl":
+        for row in rows:
+            out.write(json.dumps(row) + "\n")
+            n += 1
+    else:
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ids_file")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--counts", action="store_true", help="one row per consumer with image count and latest date")
+    parser.add_argument("--db", default=config.DB_FILE)
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.ids_file == "-" else open(args.ids_file, encoding="utf-8-sig")
+    out = sys.stdout if not args.output else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        rows = lookup_rows(read_ids(src), counts=args.counts, db_file=args.db)
+        n = write_rows(rows, out, args.format, COUNT_FIELDS if args.counts else IMAGE_FIELDS)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"{n} rows written", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
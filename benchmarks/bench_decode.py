@@ -0,0 +1,106 @@
+"""Compare full JPEG decodes with draft-mode (reduced DCT) decodes.
+
+Usage:
+    python benchmarks/bench_decode.py FOLDER [--limit 50] [--canvas 1600x900]
+
+Two cases are timed over up to --limit JPEGs from FOLDER: a 180px preview
+thumbnail and a fit-to-canvas render. Each variant runs in its own
+subprocess so that the reported peak RSS belongs to that variant alone.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VARIANTS = ["thumb-full", "thumb-draft", "fit-full", "fit-draft"]
+
+
+def peak_rss_mb():
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None) or info.rss
+        return peak / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes.
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return float("nan")
+
+
+def list_jpegs(folder, limit):
+    out = []
+    for dirpath, _, files in os.walk(folder):
+        for f in files:
+            if f.lower().endswith((".jpg", ".jpeg")):
+                out.append(os.path.join(dirpath, f))
+                if len(out) >= limit:
+                    return out
+    return out
+
+
+def run_variant(variant, paths, canvas):
+    from PIL import Image
+    import image_loader
+
+    case, mode = variant.split("-")
+    box = (180, 180) if case == "thumb" else canvas
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    for p in paths:
+        if mode == "draft":
+            im, (w, h) = image_loader.open_image(p, box=box)
+        else:
+            im = Image.open(p)
+            im.load()
+            w, h = im.size
+        if case == "thumb":
+            im.thumbnail(box)
+        else:
+            ratio = min(box[0] / w, box[1] / h)
+            im.resize((max(1, int(w * ratio)), max(1, int(h * ratio))), Image.Resampling.LANCZOS)
+        im.close()
+    elapsed = time.perf_counter() - t0
+    return {"variant": variant, "images": len(paths), "seconds": elapsed,
+            "peak_rss_mb": peak_rss_mb(), "base_rss_mb": base}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("folder")
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--canvas", default="1600x900")
+    ap.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    canvas = tuple(int(v) for v in args.canvas.lower().split("x"))
+    paths = list_jpegs(args.folder, args.limit)
+    if not paths:
+        raise SystemExit(f"No JPEGs found under {args.folder}")
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, paths, canvas)))
+        return
+
+    print(f"{len(paths)} images, canvas {canvas[0]}x{canvas[1]}")
+    print(f"{'variant':<12} {'ms/image':>10} {'peak RSS MB':>12}")
+    for variant in VARIANTS:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), args.folder,
+             "--limit", str(args.limit), "--canvas", args.canvas, "--variant", variant],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{variant:<12} {1000 * r['seconds'] / r['images']:>10.1f} {r['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
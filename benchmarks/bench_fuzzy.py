@@ -0,0 +1,206 @@
+"""Measure fuzzy-lookup speed and accuracy on a synthetic consumer master.
+
+Usage:
+    python benchmarks/bench_fuzzy.py [--consumers 20000] [--queries 2000]
+                                     [--threshold 0.85] [--top-n 5] [--stored]
+
+A consumer master and a field-survey file drawn from it are generated
+with a fixed --seed. Survey rows carry typos, alternative spellings of
+surnames, swapped address tokens, missing C/O, partial or reformatted
+mobiles, and a share of people who are not consumers at all. The rows
+go through the same matching core as the GUI and batch lookups
+(prepare_query + FuzzyIndex.match_many) with no Tk import.
+
+Reported: rows/s, average candidates scored per row, the share of rows
+that needed the full-table fallback, and top-1 precision/recall at
+--threshold (plus recall within --top-n). --stored matches against the
+SQLite-backed index in a temporary database instead of one built in
+memory.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+SYLLABLES = ["RA", "MA", "SU", "BI", "DI", "PA", "KA", "NA", "TA", "GO", "SA", "JA", "HA", "LA", "MO", "PRA",
+             "SHU", "BHA", "DE", "NI", "RE", "TU", "SWA", "KRI", "CHA", "ANI", "AMI", "RAJ", "SAN", "DIP"]
+ENDINGS = ["SH", "N", "M", "T", "JIT", "PAN", "DEB", "KANTA", "NATH", "RANJAN", "MOY", "LAL", "", "A", "I"]
+# Surnames with the spellings survey staff actually write for them.
+SURNAMES = [
+    ["CHOWDHURY", "CHAUDHURI", "CHOUDHURY"], ["MONDAL", "MANDAL"], ["GHOSH", "GHOSE"], ["BOSE", "BASU"],
+    ["DAS"], ["SAHA"], ["PAL", "PAUL"], ["SARKAR", "SIRCAR"], ["BANERJEE", "BANDYOPADHYAY"],
+    ["MUKHERJEE", "MUKHOPADHYAY"], ["CHATTERJEE", "CHATTOPADHYAY"], ["ROY", "RAY"], ["DUTTA", "DATTA"],
+    ["SEN"], ["BISWAS", "BISHWAS"], ["HALDER", "HALDAR"], ["MAITY", "MAITI"], ["JANA"], ["SHEIKH", "SEKH"],
+    ["KHATUN", "KHATOON"], ["MAJUMDAR", "MAZUMDAR"], ["BHATTACHARYA", "BHATTACHARJEE"], ["PRAMANIK", "PRAMANICK"],
+]
+PLACES = ["KRISHNANAGAR", "RANAGHAT", "SANTIPUR", "CHAKDAHA", "KALYANI", "HARINGHATA", "NABADWIP", "TEHATTA",
+          "KARIMPUR", "PALASHIPARA", "BETHUADAHARI", "DHUBULIA", "AISHTALA", "BADKULLA", "TAHERPUR", "BIRNAGAR",
+          "FULIA", "HANSKHALI", "BAGULA", "GEDE", "MAJDIA", "KRISHNAGANJ", "NAKASHIPARA", "KALIGANJ", "PLASSEY"]
+STREETS = ["STATION ROAD", "BAZAR PARA", "SCHOOL PARA", "COLONY", "MAIN ROAD", "NETAJI PALLY", "KALITALA",
+           "HATKHOLA", "GHOSHPARA", "MALOPARA", "NEW MARKET", "RAIL GATE"]
+VOWELS = "AEIOU"
+
+
+def given_name(rnd):
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(1, 2))) + rnd.choice(ENDINGS)
+
+
+def make_master(count, rnd):
+    """Consumer profiles as get_all_consumer_profiles returns them, plus each one's father's name."""
+    profiles, fathers = [], []
+    for i in range(count):
+        surname = rnd.randrange(len(SURNAMES))
+        father = f"{given_name(rnd)} {SURNAMES[surname][0]}"
+        address = (f"{'S/O' if rnd.random() < 0.5 else 'C/O'} {father} " if rnd.random() < 0.4 else "")
+        address += f"{rnd.choice(STREETS)} {rnd.randint(1, 40)} {rnd.choice(PLACES)}"
+        profiles.append({
+            "consumer_id": str(100000000 + i),
+            "meter_no": str(i),
+            "name": f"{given_name(rnd)} {SURNAMES[surname][0]}",
+            "address": address,
+            "mobile_number": str(rnd.randint(6000000000, 9999999999)) if rnd.random() < 0.6 else "",
+        })
+        fathers.append(father)
+    return profiles, fathers
+
+
+def typo(word, rnd, rate):
+    if len(word) < 3 or rnd.random() >= rate:
+        return word
+    k = rnd.randrange(len(word))
+    edit = rnd.randrange(4)
+    if edit == 0:
+        return word[:k] + word[k + 1:]
+    if edit == 1:
+        return word[:k] + rnd.choice(VOWELS + "HY") + word[k:]
+    if edit == 2 and k < len(word) - 1:
+        return word[:k] + word[k + 1] + word[k] + word[k + 2:]
+    return word[:k] + rnd.choice(VOWELS) + word[k + 1:]
+
+
+def respell(word, rnd):
+    for spellings in SURNAMES:
+        if word == spellings[0] and len(spellings) > 1 and rnd.random() < 0.5:
+            return rnd.choice(spellings[1:])
+    return word
+
+
+def perturb(profile, father, rnd, typo_rate):
+    """One survey row [name, co, address, mobile] for `profile`, as a surveyor might have written it."""
+    name = " ".join(typo(respell(w, rnd), rnd, typo_rate) for w in profile["name"].split())
+    co = " ".join(typo(w, rnd, typo_rate) for w in father.split()) if rnd.random() < 0.5 else ""
+    address = profile["address"]
+    if " " + father + " " in address:
+        address = address.split(father, 1)[1].strip()
+    tokens = [typo(w, rnd, typo_rate) for w in address.split()]
+    if rnd.random() < 0.3:
+        rnd.shuffle(tokens)
+    mobile = profile["mobile_number"]
+    if mobile:
+        r = rnd.random()
+        if r < 0.3:
+            mobile = ""
+        elif r < 0.45:
+            mobile = mobile[:rnd.randint(5, 9)]
+        elif r < 0.6:
+            mobile = "+91 " + mobile[:5] + " " + mobile[5:]
+    return [name, co, " ".join(tokens), mobile]
+
+
+def make_survey(profiles, fathers, count, rnd, typo_rate, strangers):
+    """Survey rows and the consumer_id each was drawn from ("" for non-consumers)."""
+    rows, truth = [], []
+    for _ in range(count):
+        if rnd.random() < strangers:
+            stranger, father = make_master(1, rnd)
+            rows.append(perturb(stranger[0], father[0], rnd, typo_rate))
+            truth.append("")
+        else:
+            i = rnd.randrange(len(profiles))
+            rows.append(perturb(profiles[i], fathers[i], rnd, typo_rate))
+            truth.append(profiles[i]["consumer_id"])
+    return rows, truth
+
+
+def load_stored(profiles, path):
+    import database
+    import fuzzy_store
+    config.DB_FILE = path
+    ok, msg = database.init_db()
+    if not ok:
+        raise SystemExit(f"init_db failed: {msg}")
+    database.import_meter_mapping(
+        (p["consumer_id"], p["meter_no"], p["name"], p["address"], p["mobile_number"], "", "") for p in profiles)
+    index = fuzzy_store.load_index()
+    if index is None:
+        raise SystemExit("--stored needs NumPy and rapidfuzz.")
+    return index
+
+
+def run(index, rows, args):
+    """Match `rows` the way fuzzy_batch does; returns (matches per row, seconds)."""
+    import fuzzy_lookup
+    queries = ((i, fuzzy_lookup.prepare_query(*r)) for i, r in enumerate(rows))
+    t0 = time.perf_counter()
+    matches = [m for _, m in index.match_many(queries, args.threshold, args.top_n)]
+    return matches, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consumers", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--typo-rate", type=float, default=0.3, help="chance that each word gets one edit")
+    parser.add_argument("--strangers", type=float, default=0.1, help="share of survey rows with no consumer")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--stored", action="store_true", help="use the SQLite-backed index")
+    args = parser.parse_args()
+
+    import fuzzy_lookup
+
+    rnd = random.Random(args.seed)
+    profiles, fathers = make_master(args.consumers, rnd)
+    rows, truth = make_survey(profiles, fathers, args.queries, rnd, args.typo_rate, args.strangers)
+
+    t0 = time.perf_counter()
+    if args.stored:
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+            index = load_stored(profiles, os.path.join(tmp, "fuzzy_bench.db"))
+            build = time.perf_counter() - t0
+            results = run(index, rows, args)
+            consumer_ids = [[index.profile(m[0])[0] for m in matches] for matches in results[0]]
+    else:
+        index = fuzzy_lookup.FuzzyIndex(profiles)
+        build = time.perf_counter() - t0
+        results = run(index, rows, args)
+        consumer_ids = [[index.consumer_ids[m[0]] for m in matches] for matches in results[0]]
+    matches, elapsed = results
+
+    stats = index.stats
+    queries = max(1, stats["queries"])
+    predicted = [ids[0] if ids else "" for ids in consumer_ids]
+    correct = sum(1 for p, t in zip(predicted, truth) if p and p == t)
+    answered = sum(1 for p in predicted if p)
+    known = sum(1 for t in truth if t)
+    in_top = sum(1 for ids, t in zip(consumer_ids, truth) if t and t in ids)
+
+    print(f"index: {len(profiles)} consumers, {'stored' if args.stored else 'in memory'}, "
+          f"{'vectorized' if index.vectorized else 'scalar'}, built in {build:.2f}s")
+    print(f"match: {len(rows)} rows in {elapsed:.2f}s = {len(rows) / max(elapsed, 1e-9):.0f} rows/s")
+    print(f"candidates/row: {stats['candidates'] / queries:.1f}   "
+          f"fallback rate: {100.0 * stats['fallbacks'] / queries:.2f}%")
+    print(f"threshold {args.threshold:.2f}: precision {100.0 * correct / max(1, answered):.1f}%  "
+          f"recall {100.0 * correct / max(1, known):.1f}%  recall@{args.top_n} {100.0 * in_top / max(1, known):.1f}%  "
+          f"({answered} answered, {known} with a true consumer)")
+
+
+if __name__ == "__main__":
+    main()
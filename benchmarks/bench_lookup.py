@@ -0,0 +1,117 @@
+"""Measure consumer image lookup latency on a synthetic images index.
+
+Usage:
+    python benchmarks/bench_lookup.py [--rows 5000000] [--db PATH] [--lookups 20000]
+
+A database with --rows images (about 40 dates per consumer spread over
+2000 directories) is built once at --db and reused on later runs. The
+fast path (image_lookup) is compared with the old per-call
+connect + JOIN + ORDER BY query.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+DATES_PER_CONSUMER = 40
+DIRECTORIES = 2000
+MRUS = 500
+
+
+def build_db(rows):
+    import database
+    ok, msg = database.init_db()
+    if not ok:
+        raise SystemExit(f"init_db failed: {msg}")
+    conn = database.get_db_connection()
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO directories (dir_path) VALUES (?)",
+                    [(f"\\\\share{d % 8}\\spot\\{d:05d}",) for d in range(DIRECTORIES)])
+    cur.executemany("INSERT INTO mrus (mru) VALUES (?)", [(f"MRU{m:05d}",) for m in range(MRUS)])
+    consumers = max(1, rows // DATES_PER_CONSUMER)
+
+    def gen():
+        for n in range(rows):
+            cid = 100000000 + (n % consumers)
+            k = n // consumers
+            date = (2015 + k // 12) * 10000 + (k % 12 + 1) * 100 + 1 + cid % 28
+            yield (cid, date, 1 + cid % MRUS, 1 + (n * 7919) % DIRECTORIES, ".jpg")
+
+    cur.executemany("INSERT OR IGNORE INTO images (consumer_id, date, mru_id, dir_id, suffix) VALUES (?,?,?,?,?)", gen())
+    conn.commit()
+    cur.execute("ANALYZE")
+    conn.close()
+    return consumers
+
+
+def old_path(cid):
+    conn = sqlite3.connect(config.DB_FILE)
+    rows = conn.execute("""
+        SELECT i.date, m.mru, d.dir_path, i.suffix
+        FROM images i
+        JOIN directories d ON i.dir_id = d.id
+        JOIN mrus m ON i.mru_id = m.id
+        WHERE i.consumer_id = ?
+        ORDER BY i.date DESC
+    """, (cid,)).fetchall()
+    conn.close()
+    return rows
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000.0
+    return pick(0.50), pick(0.99), samples[-1] * 1000.0
+
+
+def time_calls(fn, ids):
+    out = []
+    for cid in ids:
+        t0 = time.perf_counter()
+        fn(cid)
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "spot_lookup_bench.db"))
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    config.DB_FILE = args.db
+    if not os.path.exists(args.db):
+        print(f"Building {args.rows} rows in {args.db} ...")
+        t0 = time.perf_counter()
+        build_db(args.rows)
+        print(f"  built in {time.perf_counter() - t0:.1f}s, {os.path.getsize(args.db) / 1e6:.1f} MB")
+
+    import image_lookup
+
+    conn = sqlite3.connect(args.db)
+    lo, hi = conn.execute("SELECT MIN(consumer_id), MAX(consumer_id) FROM images").fetchone()
+    plan = conn.execute("EXPLAIN QUERY PLAN " + image_lookup.CONSUMER_IMAGES_SQL, (lo,)).fetchall()
+    conn.close()
+    print("Plan:", "; ".join(row[-1] for row in plan))
+
+    rnd = random.Random(7)
+    ids = [rnd.randint(lo, hi) for _ in range(args.lookups)]
+    lookup = image_lookup.ConsumerImageLookup(args.db)
+    lookup.get_images(ids[0])
+
+    for label, fn, sample in (("fast path", lookup.get_images, ids),
+                              ("old path ", old_path, ids[: max(1, len(ids) // 10)])):
+        p50, p99, worst = percentiles(time_calls(fn, sample))
+        print(f"{label}: n={len(sample)}  p50={p50:.3f} ms  p99={p99:.3f} ms  max={worst:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure indexer.scan_directories throughput on a synthetic image tree.
+
+Usage:
+    python benchmarks/bench_scanner.py [--files 1000000] [--tree DIR] [--workers 1,4,16]
+
+The tree is built once (empty files named like real spot images) and reused
+when --tree points at an existing directory. Only the scanner is timed; no
+database writes are involved.
+"""
+import argparse
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indexer
+
+ROOTS = 4
+FILES_PER_DIR = 2500
+
+
+def build_tree(base, total_files):
+    made = 0
+    dir_no = 0
+    while made < total_files:
+        root = os.path.join(base, f"share{dir_no % ROOTS}")
+        sub = os.path.join(root, f"{2015 + dir_no % 10}", f"batch{dir_no:05d}")
+        os.makedirs(sub, exist_ok=True)
+        for i in range(min(FILES_PER_DIR, total_files - made)):
+            n = made + i
+            name = f"{1 + n % 28:02d}{1 + n % 12:02d}2024MRU{n % 1000:05d}{n % 1000000000:09d}.jpg"
+            open(os.path.join(sub, name), "w").close()
+        made += FILES_PER_DIR
+        dir_no += 1
+    return [os.path.join(base, f"share{r}") for r in range(ROOTS) if os.path.isdir(os.path.join(base, f"share{r}"))]
+
+
+def run_scan(roots, workers):
+    results = queue.Queue(maxsize=indexer.RESULT_QUEUE_SIZE)
+    start = time.perf_counter()
+    indexer.scan_directories(roots, {}, {}, results, workers=workers)
+    files = 0
+    dirs = 0
+    while True:
+        item = results.get()
+        if item is None:
+            break
+        if item[0] == "scan":
+            files += len(item[4])
+            dirs += 1
+    return files, dirs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000000)
+    parser.add_argument("--tree", help="existing or new directory for the synthetic tree")
+    parser.add_argument("--workers", default="1,4,16")
+    args = parser.parse_args()
+
+    base = args.tree or tempfile.mkdtemp(prefix="spot_scan_bench_")
+    cleanup = not args.tree
+    try:
+        os.makedirs(base, exist_ok=True)
+        roots = [os.path.join(base, d) for d in sorted(os.listdir(base))]
+        if not roots:
+            print(f"Building {args.files} files under {base} ...")
+            t0 = time.perf_counter()
+            roots = build_tree(base, args.files)
+            print(f"  built in {time.perf_counter() - t0:.1f}s")
+
+        for w in [int(x) for x in args.workers.split(",") if x.strip()]:
+            files, dirs, elapsed = run_scan(roots, w)
+            rate = files / elapsed if elapsed else 0.0
+            print(f"workers={w:>3}  files={files}  dirs={dirs}  time={elapsed:.2f}s  files/s={rate:,.0f}")
+    finally:
+        if cleanup:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
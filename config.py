@@ -11,3 +11,42 @@ if not os.path.exists(BASE_DIR):
 
 CURRENT_VERSION = 19.2
 UPDATE_URL = "https://raw.githubusercontent.com/Hackers-lab/SpotImageViewer/refs/heads/main/update.json"
+
+# Number of threads listing folders in parallel during indexing.
+SCAN_WORKERS = 8
+
+# Live folder watch: seconds between mtime polls of network shares, the quiet
+# period after the last change before changed folders are re-synced, and the
+# longest a steady stream of changes can hold the re-sync back.
+WATCH_POLL_SECONDS = 60
+WATCH_DEBOUNCE_SECONDS = 2
+WATCH_MAX_DELAY_SECONDS = 30
+
+# Preview thumbnail cache kept next to the image index.
+THUMB_DB_FILE = os.path.join(BASE_DIR, "thumbs_v1.db")
+THUMB_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Threads decoding preview thumbnails in the background.
+PREVIEW_WORKERS = 4
+
+# Main viewer prefetch: dates decoded ahead on each side of the selection.
+PREFETCH_NEIGHBOURS = 3
+PREFETCH_WORKERS = 2
+PREFETCH_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Parallel file copies for "Save All Images" and backups.
+TRANSFER_WORKERS = 8
+
+# Backups re-point moved images in the index every this many files or
+# seconds, whichever comes first, so an interrupted backup loses little.
+BACKUP_INDEX_BATCH = 500
+BACKUP_INDEX_SECONDS = 2.0
+
+# Fuzzy lookup: processes matching input shards in parallel, and input rows
+# per shard (the unit that is checkpointed, so at most one shard is redone
+# after an interruption).
+FUZZY_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+FUZZY_SHARD_ROWS = 2000
+# Every worker process holds its own copy of the fuzzy index, so the worker
+# count is also capped to keep all of them within this many MB.
+FUZZY_WORKERS_MEMORY_MB = 2048
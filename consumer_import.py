@@ -0,0 +1,114 @@
+import csv
+import os
+import re
+
+import database
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
+
+HEADER_MAP = {
+    "consumer id": "consumer_id",
+    "consumerid": "consumer_id",
+    "meter no": "meter_no",
+    "meterno": "meter_no",
+    "name": "name",
+    "address": "address",
+    "mobile number": "mobile_number",
+    "mobilenumber": "mobile_number",
+    "mobile": "mobile_number",
+    "contractual load": "contractual_load",
+    "contractualload": "contractual_load",
+    "class": "class",
+}
+
+# Column positions used when the sheet has no recognisable header row.
+DEFAULT_COLUMNS = ["consumer_id", "meter_no", "name", "address", "mobile_number", "contractual_load", "class"]
+
+
+def iter_file_rows(path):
+    """Yield raw row tuples from a .csv file or (read-only, streamed) .xlsx workbook."""
+    if os.path.splitext(path)[1].lower() == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.reader(f):
+                yield row
+        return
+
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is required to read Excel files.")
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def _header_index(first_row):
+    index_map = {}
+    for idx, val in enumerate(first_row):
+        if val is None:
+            continue
+        key = str(val).strip().lower().replace("_", " ")
+        key = " ".join(key.split())
+        mapped = HEADER_MAP.get(key) or HEADER_MAP.get(key.replace(" ", ""))
+        if mapped:
+            index_map[mapped] = idx
+    return index_map
+
+
+def _cell_text(val):
+    if val is None:
+        return ""
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val)).strip()
+    return str(val).strip()
+
+
+def normalize_rows(raw_rows):
+    """Turn raw sheet rows into meter_mapping tuples, one at a time.
+
+    The first row is used as a header when it names at least the consumer
+    ID and meter number columns; otherwise columns are taken in
+    DEFAULT_COLUMNS order and the first row is data. Rows without a
+    consumer ID or meter number are skipped.
+    """
+    raw_rows = iter(raw_rows)
+    first = next(raw_rows, None)
+    if first is None:
+        return
+    index_map = _header_index(first)
+    has_headers = "consumer_id" in index_map and "meter_no" in index_map
+    positions = [index_map.get(field, default) for default, field in enumerate(DEFAULT_COLUMNS)]
+
+    def rows():
+        if not has_headers:
+            yield first
+        yield from raw_rows
+
+    for row in rows():
+        if not row:
+            continue
+        values = [_cell_text(row[i]) if i is not None and i < len(row) else "" for i in positions]
+        if not values[0] or not values[1]:
+            continue
+        mobile = re.sub(r"\D", "", values[4])
+        if len(mobile) == 12 and mobile.startswith("91"):
+            mobile = mobile[2:]
+        values[4] = mobile
+        yield tuple(values)
+
+
+def import_consumer_file(path, progress_callback=None):
+    """Stream `path` into meter_mapping; returns (rows_read, summary) as from import_meter_mapping."""
+    state = {"rows": 0}
+
+    def on_progress(n):
+        state["rows"] = n
+        if progress_callback:
+            progress_callback(n)
+
+    summary = database.import_meter_mapping(normalize_rows(iter_file_rows(path)), on_progress)
+    return state["rows"], summary
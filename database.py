@@ -1,6 +1,5 @@
-import sqlite3
 import json
-import config
+import db_connections
 
 
 def _add_column_if_missing(cursor, table_name, column_name, column_def):
@@ -9,6 +8,56 @@ def _add_column_if_missing(cursor, table_name, column_name, column_def):
     if column_name not in existing:
         cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_def}")
 
+def _migrate_legacy_images(cursor):
+    """Move an old TEXT-column images table aside. Returns True if one was found."""
+    cursor.execute("PRAGMA table_info(images)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "filename" not in columns:
+        return False
+    for index_name in ("idx_cid", "idx_date_iso", "idx_images_dir"):
+        cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+    cursor.execute("ALTER TABLE images RENAME TO images_legacy")
+    return True
+
+def _migrate_rowid_images(cursor):
+    """Move aside an images table from before it became WITHOUT ROWID. Returns True if one was found."""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'images'")
+    row = cursor.fetchone()
+    if not row or "WITHOUT ROWID" in row[0].upper():
+        return False
+    for index_name in ("idx_images_lookup", "idx_date"):
+        cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+    cursor.execute("ALTER TABLE images RENAME TO images_rowid")
+    return True
+
+def _copy_rowid_images(cursor):
+    cursor.execute(
+        """
+        INSERT OR IGNORE INTO images (consumer_id, date, mru_id, dir_id, suffix)
+        SELECT consumer_id, date, mru_id, dir_id, COALESCE(suffix, '')
+        FROM images_rowid
+        WHERE consumer_id IS NOT NULL AND date IS NOT NULL AND mru_id IS NOT NULL AND dir_id IS NOT NULL
+        """
+    )
+    cursor.execute("DROP TABLE images_rowid")
+
+def _copy_legacy_images(cursor):
+    cursor.execute("INSERT OR IGNORE INTO mrus (mru) SELECT DISTINCT mru FROM images_legacy")
+    cursor.execute(
+        """
+        INSERT OR IGNORE INTO images (consumer_id, date, mru_id, dir_id, suffix)
+        SELECT CAST(l.consumer_id AS INTEGER),
+               CAST(substr(l.date_original, 5, 4) || substr(l.date_original, 3, 2) || substr(l.date_original, 1, 2) AS INTEGER),
+               m.id,
+               l.dir_id,
+               substr(l.filename, 26)
+        FROM images_legacy l
+        JOIN mrus m ON m.mru = l.mru
+        WHERE length(l.consumer_id) = 9 AND l.consumer_id NOT GLOB '*[^0-9]*'
+        """
+    )
+    cursor.execute("DROP TABLE images_legacy")
+
 def init_db():
     try:
         conn = get_db_connection()
@@ -25,19 +74,44 @@ def init_db():
             )
         ''')
 
+        # Compact image rows: the filename is DDMMYYYY + MRU + consumer ID + suffix,
+        # so only the integer parts, an MRU id and the suffix are stored.
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS images (
-                consumer_id TEXT,
-                date_original TEXT,
-                date_iso TEXT,
-                mru TEXT,
-                filename TEXT,
-                dir_id INTEGER,
-                UNIQUE(filename, dir_id)
+            CREATE TABLE IF NOT EXISTS mrus (
+                id INTEGER PRIMARY KEY,
+                mru TEXT UNIQUE
             )
         ''')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cid ON images (consumer_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_date_iso ON images (date_iso)')
+        legacy_images = _migrate_legacy_images(cursor)
+        rowid_images = not legacy_images and _migrate_rowid_images(cursor)
+
+        # The table is its own consumer lookup index: rows are stored in
+        # (consumer_id, date) order, so a consumer's images are one range
+        # scan, already sorted, and each row is stored once.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS images (
+                consumer_id INTEGER NOT NULL,
+                date INTEGER NOT NULL,
+                dir_id INTEGER NOT NULL,
+                mru_id INTEGER NOT NULL,
+                suffix TEXT NOT NULL,
+                PRIMARY KEY (consumer_id, date, dir_id, mru_id, suffix)
+            ) WITHOUT ROWID
+        ''')
+        if legacy_images:
+            _copy_legacy_images(cursor)
+        if rowid_images:
+            _copy_rowid_images(cursor)
+        cursor.execute('DROP INDEX IF EXISTS idx_cid')
+        cursor.execute('DROP INDEX IF EXISTS idx_images_lookup')
+        # Directory re-syncs, deletes and backups select by dir_id.
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_images_dir ON images (dir_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_date ON images (date)')
+
+        # Per-directory scan state used by the incremental indexer.
+        _add_column_if_missing(cursor, "directories", "mtime", "REAL")
+        _add_column_if_missing(cursor, "directories", "file_count", "INTEGER DEFAULT 0")
+        _add_column_if_missing(cursor, "directories", "parent_id", "INTEGER")
         
         # Other tables...
         cursor.execute('''
@@ -73,7 +147,8 @@ def init_db():
                 meter_no TEXT
             )
         ''')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_no ON meter_mapping (meter_no)')
+        # Duplicate of idx_meter_no_exact.
+        cursor.execute('DROP INDEX IF EXISTS idx_meter_no')
 
         # Ensure newer fields exist for richer search and details support.
         _add_column_if_missing(cursor, "meter_mapping", "name", "TEXT")
@@ -82,10 +157,22 @@ def init_db():
         _add_column_if_missing(cursor, "meter_mapping", "contractual_load", "TEXT")
         _add_column_if_missing(cursor, "meter_mapping", "class", "TEXT")
 
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_consumer_id ON meter_mapping (consumer_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_no_exact ON meter_mapping (meter_no)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_mobile ON meter_mapping (mobile_number)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_name_nocase ON meter_mapping (name COLLATE NOCASE)')
+        _create_meter_mapping_indexes(cursor)
+
+        # Trigram full-text index over name/address; contents live in meter_mapping.
+        try:
+            fts_new = not _has_consumer_fts(cursor)
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS consumer_fts USING fts5(
+                    name, address,
+                    content='meter_mapping', content_rowid='rowid',
+                    tokenize='trigram'
+                )
+            ''')
+            if fts_new:
+                cursor.execute("INSERT INTO consumer_fts(consumer_fts) VALUES ('rebuild')")
+        except Exception as e:
+            print(f"Full-text search unavailable, falling back to LIKE: {e}")
 
         # Add default note options if the table is empty
         cursor.execute("SELECT COUNT(*) FROM note_options")
@@ -94,130 +181,153 @@ def init_db():
             cursor.executemany("INSERT INTO note_options VALUES (?)", default_options)
 
         conn.commit()
+        if legacy_images or rowid_images:
+            # Reclaim the space freed by the old table and its indexes.
+            cursor.execute("VACUUM;")
         conn.close()
         return True, "Success"
     except Exception as e:
         return False, str(e)
 
 def get_db_connection():
-    return sqlite3.connect(config.DB_FILE, check_same_thread=False)
+    """Standalone connection for long jobs (indexing, migrations) that manage their own transactions."""
+    return db_connections.open_connection()
+
+def date_original(date):
+    """YYYYMMDD integer -> the DDMMYYYY string used in filenames and the UI."""
+    d = f"{date:08d}"
+    return f"{d[6:8]}{d[4:6]}{d[0:4]}"
+
+def compose_filename(consumer_id, date, mru, suffix):
+    """Rebuild an image filename from its stored parts."""
+    return f"{date_original(date)}{mru}{consumer_id:09d}{suffix or ''}"
+
+def get_mru_ids(cursor, mrus):
+    """Return {mru: id}, adding any MRU codes not yet in the lookup table."""
+    mrus = set(mrus)
+    if not mrus:
+        return {}
+    cursor.executemany("INSERT OR IGNORE INTO mrus (mru) VALUES (?)", [(m,) for m in mrus])
+    ids = {}
+    for m in mrus:
+        cursor.execute("SELECT id FROM mrus WHERE mru = ?", (m,))
+        ids[m] = cursor.fetchone()[0]
+    return ids
 
 def get_total_image_count():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT COUNT(*) FROM images")
         count = cursor.fetchone()[0]
-        conn.close()
         return count
     except:
         return 0
 
+def get_consumer_count():
+    try:
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute("SELECT COUNT(*) FROM meter_mapping")
+        return cursor.fetchone()[0]
+    except:
+        return 0
+
 # --- Functions for new tables ---
 
 def get_info_value(key, default=None):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT value FROM db_info WHERE key = ?", (key,))
         row = cursor.fetchone()
-        conn.close()
         return json.loads(row[0]) if row else default
     except:
         return default
 
 def set_info_value(key, value):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO db_info VALUES (?, ?)", (key, json.dumps(value)))
-        conn.commit()
-        conn.close()
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("INSERT OR REPLACE INTO db_info VALUES (?, ?)", (key, json.dumps(value)))
     except:
         pass
 
 def get_additional_folders():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT folder_path FROM additional_folders")
         rows = cursor.fetchall()
-        conn.close()
         return [row[0] for row in rows]
     except:
         return []
 
 def save_additional_folders(folders):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM additional_folders")
-        if folders:
-            cursor.executemany("INSERT INTO additional_folders VALUES (?)", [(f,) for f in folders])
-        conn.commit()
-        conn.close()
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("DELETE FROM additional_folders")
+            if folders:
+                cursor.executemany("INSERT INTO additional_folders VALUES (?)", [(f,) for f in folders])
     except:
         pass
 
 def get_all_notes():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT consumer_id, note, remarks FROM notes")
         rows = cursor.fetchall()
-        conn.close()
         return {row[0]: {'note': row[1], 'remarks': row[2]} for row in rows}
     except:
         return {}
 
+def has_notes():
+    try:
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute("SELECT 1 FROM notes LIMIT 1")
+        return cursor.fetchone() is not None
+    except:
+        return False
+
+def iter_notes():
+    """Yield (consumer_id, note, remarks) rows one at a time, for exports."""
+    cursor = db_connections.get_connection().cursor()
+    try:
+        cursor.execute("SELECT consumer_id, note, remarks FROM notes")
+        yield from cursor
+    finally:
+        cursor.close()
+
 def save_note(consumer_id, note, remarks):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO notes VALUES (?, ?, ?)", (consumer_id, note, remarks))
-        conn.commit()
-        conn.close()
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("INSERT OR REPLACE INTO notes VALUES (?, ?, ?)", (consumer_id, note, remarks))
     except:
         pass
         
 def delete_note(consumer_id):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM notes WHERE consumer_id=?", (consumer_id,))
-        conn.commit()
-        conn.close()
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("DELETE FROM notes WHERE consumer_id=?", (consumer_id,))
     except:
         pass
 
 def get_note_options():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT option_text FROM note_options")
         rows = cursor.fetchall()
-        conn.close()
         return [row[0] for row in rows]
     except:
         return []
 
 def add_note_option(option):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO note_options VALUES (?)", (option,))
-        conn.commit()
-        conn.close()
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("INSERT OR IGNORE INTO note_options VALUES (?)", (option,))
     except:
         pass
         
 def get_meter_number(consumer_id):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT meter_no FROM meter_mapping WHERE consumer_id = ?", (consumer_id,))
         row = cursor.fetchone()
-        conn.close()
         return row[0] if row else None
     except:
         return None
@@ -225,8 +335,7 @@ def get_meter_number(consumer_id):
 
 def get_consumer_profile(consumer_id):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute(
             """
             SELECT consumer_id, meter_no, name, address, mobile_number, contractual_load, class
@@ -236,7 +345,6 @@ def get_consumer_profile(consumer_id):
             (consumer_id,)
         )
         row = cursor.fetchone()
-        conn.close()
         if not row:
             return None
         return {
@@ -253,52 +361,120 @@ def get_consumer_profile(consumer_id):
 
 def get_consumer_by_meter(meter_no):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT consumer_id FROM meter_mapping WHERE meter_no = ?", (meter_no,))
         row = cursor.fetchone()
-        conn.close()
         return row[0] if row else None
     except:
         return None
 
 
+CONSUMER_COLUMNS = "consumer_id, meter_no, name, address, mobile_number, contractual_load, class"
+# Above this many full-text matches, bm25 ranking costs more than it is worth.
+FTS_RANK_MAX = 5000
+
+def _consumer_dicts(rows):
+    return [
+        {
+            "consumer_id": r[0],
+            "meter_no": r[1],
+            "name": r[2],
+            "address": r[3],
+            "mobile_number": r[4],
+            "contractual_load": r[5],
+            "class": r[6],
+        }
+        for r in rows
+    ]
+
+def _has_consumer_fts(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'consumer_fts'")
+    return cursor.fetchone() is not None
+
+def _fts_match(column, text):
+    """MATCH expression requiring each 3+ character word of `text` in `column`.
+
+    The trigram tokenizer cannot match anything shorter, so those words are
+    returned separately for a LIKE filter. The expression is None if no word
+    is long enough.
+    """
+    words = text.split()
+    long_words = [w for w in words if len(w) >= 3]
+    short_words = [w for w in words if len(w) < 3]
+    if not long_words:
+        return None, short_words
+    phrases = " AND ".join('"' + w.replace('"', '""') + '"' for w in long_words)
+    return f"{column} : ({phrases})", short_words
+
+def _search_consumers_text(column, query, limit):
+    query = query.strip()
+    cursor = db_connections.get_connection().cursor()
+    match, short_words = _fts_match(column, query)
+    if match is not None:
+        try:
+            like = "".join(f" AND m.{column} LIKE ?" for _ in short_words)
+            like_args = [f"%{w}%" for w in short_words]
+            cols = ", ".join(f"m.{c.strip()}" for c in CONSUMER_COLUMNS.split(","))
+            cursor.execute(
+                "SELECT COUNT(*) FROM (SELECT rowid FROM consumer_fts WHERE consumer_fts MATCH ? LIMIT ?)",
+                (match, FTS_RANK_MAX + 1)
+            )
+            if cursor.fetchone()[0] <= FTS_RANK_MAX:
+                cursor.execute(
+                    f"""
+                    SELECT {cols}
+                    FROM consumer_fts
+                    JOIN meter_mapping m ON m.rowid = consumer_fts.rowid
+                    WHERE consumer_fts MATCH ?{like}
+                    ORDER BY consumer_fts.rank, m.name COLLATE NOCASE
+                    LIMIT ?
+                    """,
+                    [match] + like_args + [int(limit)]
+                )
+            else:
+                # Too unspecific for bm25 to pay off: shortest values first from a capped window.
+                cursor.execute(
+                    f"""
+                    SELECT {cols}
+                    FROM (SELECT rowid FROM consumer_fts WHERE consumer_fts MATCH ? LIMIT ?) f
+                    JOIN meter_mapping m ON m.rowid = f.rowid
+                    WHERE 1{like}
+                    ORDER BY length(m.{column}), m.name COLLATE NOCASE
+                    LIMIT ?
+                    """,
+                    [match, FTS_RANK_MAX] + like_args + [int(limit)]
+                )
+            return _consumer_dicts(cursor.fetchall())
+        except Exception as e:
+            print(f"FTS search failed, using LIKE: {e}")
+    cursor.execute(
+        f"""
+        SELECT {CONSUMER_COLUMNS}
+        FROM meter_mapping
+        WHERE {column} LIKE ? COLLATE NOCASE
+        ORDER BY name COLLATE NOCASE ASC
+        LIMIT ?
+        """,
+        (f"%{query}%", int(limit))
+    )
+    return _consumer_dicts(cursor.fetchall())
+
 def search_consumers_by_name(name_query, limit=200):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT consumer_id, meter_no, name, address, mobile_number, contractual_load, class
-            FROM meter_mapping
-            WHERE name LIKE ? COLLATE NOCASE
-            ORDER BY name COLLATE NOCASE ASC
-            LIMIT ?
-            """,
-            (f"%{name_query.strip()}%", int(limit))
-        )
-        rows = cursor.fetchall()
-        conn.close()
-        return [
-            {
-                "consumer_id": r[0],
-                "meter_no": r[1],
-                "name": r[2],
-                "address": r[3],
-                "mobile_number": r[4],
-                "contractual_load": r[5],
-                "class": r[6],
-            }
-            for r in rows
-        ]
+        return _search_consumers_text("name", name_query, limit)
+    except:
+        return []
+
+def search_consumers_by_address(address_query, limit=200):
+    try:
+        return _search_consumers_text("address", address_query, limit)
     except:
         return []
 
 
 def search_consumers_by_mobile(mobile_number, limit=200):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute(
             """
             SELECT consumer_id, meter_no, name, address, mobile_number, contractual_load, class
@@ -310,7 +486,6 @@ def search_consumers_by_mobile(mobile_number, limit=200):
             (mobile_number.strip(), int(limit))
         )
         rows = cursor.fetchall()
-        conn.close()
         return [
             {
                 "consumer_id": r[0],
@@ -326,65 +501,254 @@ def search_consumers_by_mobile(mobile_number, limit=200):
     except:
         return []
 
-def update_meter_mapping(mapping_dict):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # You might want to clear the table first if this is a complete refresh
-        cursor.execute("DELETE FROM meter_mapping") 
-
-        data_to_insert = []
-        for consumer_id, payload in mapping_dict.items():
-            if isinstance(payload, dict):
-                data_to_insert.append((
-                    str(consumer_id).strip(),
-                    str(payload.get("meter_no", "")).strip(),
-                    str(payload.get("name", "")).strip(),
-                    str(payload.get("address", "")).strip(),
-                    str(payload.get("mobile_number", "")).strip(),
-                    str(payload.get("contractual_load", "")).strip(),
-                    str(payload.get("class", "")).strip(),
-                ))
-            else:
-                data_to_insert.append((
-                    str(consumer_id).strip(),
-                    str(payload).strip(),
-                    "",
-                    "",
-                    "",
-                    "",
-                    "",
-                ))
-
-        cursor.executemany(
-            """
-            INSERT OR REPLACE INTO meter_mapping
-            (consumer_id, meter_no, name, address, mobile_number, contractual_load, class)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+IMPORT_BATCH_SIZE = 10000
+# Past this share of changed rows a full FTS rebuild beats per-row updates.
+FTS_REBUILD_RATIO = 0.25
+# db_info key counting consumer data imports; anything derived from meter_mapping can key on it.
+MASTER_VERSION_KEY = "meter_mapping_version"
+
+def _create_meter_mapping_indexes(cursor):
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_meter_consumer_id ON meter_mapping (consumer_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_no_exact ON meter_mapping (meter_no)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_mobile ON meter_mapping (mobile_number)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_meter_name_nocase ON meter_mapping (name COLLATE NOCASE)')
+
+def _mapping_rows(mapping_dict):
+    for consumer_id, payload in mapping_dict.items():
+        if isinstance(payload, dict):
+            yield (
+                str(consumer_id).strip(),
+                str(payload.get("meter_no", "")).strip(),
+                str(payload.get("name", "")).strip(),
+                str(payload.get("address", "")).strip(),
+                str(payload.get("mobile_number", "")).strip(),
+                str(payload.get("contractual_load", "")).strip(),
+                str(payload.get("class", "")).strip(),
+            )
+        else:
+            yield (str(consumer_id).strip(), str(payload).strip(), "", "", "", "", "")
+
+def import_meter_mapping(rows, progress_callback=None):
+    """Replace meter_mapping with `rows` (7-tuples in CONSUMER_COLUMNS order).
+
+    Rows are bulk-loaded into an index-free staging table. The last row
+    wins for a repeated consumer_id. A replacement table is built from the
+    staging table, keeping each existing consumer's rowid, and is swapped
+    in with its indexes in the same transaction. Readers therefore see the
+    old table until the commit and never see an empty one. consumer_fts is
+    patched for just the rows that changed, or rebuilt when most rows did.
+    The fuzzy-lookup tables (see fuzzy_store) are patched only if already
+    built; otherwise they are left for the first fuzzy lookup to build.
+    `progress_callback(n)` is called as rows load. Raises ValueError, leaving
+    meter_mapping untouched, if `rows` is empty.
+
+    Returns {"inserted": [...], "changed": [...], "removed": [...]} consumer IDs.
+    """
+    cols = CONSUMER_COLUMNS
+    with db_connections.write_transaction() as cursor:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("DROP TABLE IF EXISTS meter_mapping_stage")
+        cursor.execute("DROP TABLE IF EXISTS meter_mapping_new")
+        cursor.execute(f"CREATE TABLE meter_mapping_stage ({cols.replace(',', ' TEXT,')} TEXT)")
+
+        loaded = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                cursor.executemany("INSERT INTO meter_mapping_stage VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                loaded += len(batch)
+                batch = []
+                if progress_callback:
+                    progress_callback(loaded)
+        if batch:
+            cursor.executemany("INSERT INTO meter_mapping_stage VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            loaded += len(batch)
+        if progress_callback:
+            progress_callback(loaded)
+
+        # An input with no usable rows must not replace the live table with an empty one;
+        # raising here makes write_transaction roll the whole import back.
+        cursor.execute("SELECT COUNT(*) FROM meter_mapping_stage")
+        if cursor.fetchone()[0] == 0:
+            raise ValueError("No consumer rows found in the file.")
+
+        cursor.execute("CREATE INDEX idx_meter_stage_cid ON meter_mapping_stage (consumer_id)")
+        cursor.execute("SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM meter_mapping")
+        old_max, old_count = cursor.fetchone()
+
+        # Existing consumers keep their rowid (so FTS entries stay valid); new ones
+        # are numbered from old_max up, which is how they are told apart below.
+        cursor.execute(f"CREATE TABLE meter_mapping_new ({cols.replace(',', ' TEXT,')} TEXT)")
+        stage_cols = ", ".join("s." + c.strip() for c in cols.split(","))
+        cursor.execute(
+            f"""
+            INSERT INTO meter_mapping_new (rowid, {cols})
+            SELECT COALESCE(o.rowid, ? + ROW_NUMBER() OVER (PARTITION BY o.rowid IS NULL ORDER BY s.rowid)), {stage_cols}
+            FROM meter_mapping_stage s
+            LEFT JOIN meter_mapping o ON o.consumer_id = s.consumer_id
+            WHERE s.rowid IN (SELECT MAX(rowid) FROM meter_mapping_stage GROUP BY consumer_id)
             """,
-            data_to_insert
+            (old_max,)
         )
-        conn.commit()
-        conn.close()
+
+        cursor.execute("SELECT rowid, consumer_id FROM meter_mapping_new WHERE rowid > ?", (old_max,))
+        inserted = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT o.rowid, o.consumer_id FROM meter_mapping o
+            WHERE NOT EXISTS (SELECT 1 FROM meter_mapping_new n WHERE n.rowid = o.rowid)
+            """
+        )
+        removed = cursor.fetchall()
+        differs = " OR ".join(f"o.{c.strip()} IS NOT n.{c.strip()}" for c in cols.split(",")[1:])
+        cursor.execute(
+            f"""
+            SELECT n.rowid, n.consumer_id, (o.name IS NOT n.name OR o.address IS NOT n.address)
+            FROM meter_mapping_new n JOIN meter_mapping o ON o.rowid = n.rowid
+            WHERE {differs}
+            """
+        )
+        changed = cursor.fetchall()
+
+        has_fts = _has_consumer_fts(cursor)
+        text_changed = [(r[0],) for r in changed if r[2]]
+        rebuild_fts = has_fts and (
+            old_count == 0
+            or len(inserted) + len(removed) + len(text_changed) > FTS_REBUILD_RATIO * max(old_count, 1)
+        )
+        if has_fts and not rebuild_fts:
+            cursor.executemany(
+                "INSERT INTO consumer_fts(consumer_fts, rowid, name, address) "
+                "SELECT 'delete', rowid, name, address FROM meter_mapping WHERE rowid = ?",
+                [(r[0],) for r in removed] + text_changed
+            )
+            cursor.executemany(
+                "INSERT INTO consumer_fts(rowid, name, address) "
+                "SELECT rowid, name, address FROM meter_mapping_new WHERE rowid = ?",
+                [(r[0],) for r in inserted] + text_changed
+            )
+
+        cursor.execute("DROP TABLE meter_mapping")
+        cursor.execute("ALTER TABLE meter_mapping_new RENAME TO meter_mapping")
+        _create_meter_mapping_indexes(cursor)
+        cursor.execute("DROP TABLE meter_mapping_stage")
+        if rebuild_fts:
+            cursor.execute("INSERT INTO consumer_fts(consumer_fts) VALUES ('rebuild')")
+
+        # Imported here: fuzzy_store pulls in NumPy, which nothing else in this module needs.
+        import fuzzy_store
+        fuzzy_store.update_after_import(
+            cursor, [r[0] for r in inserted] + [r[0] for r in changed], [r[0] for r in removed]
+        )
+
+        if inserted or changed or removed:
+            cursor.execute("SELECT value FROM db_info WHERE key = ?", (MASTER_VERSION_KEY,))
+            row = cursor.fetchone()
+            cursor.execute("INSERT OR REPLACE INTO db_info VALUES (?, ?)",
+                           (MASTER_VERSION_KEY, json.dumps((json.loads(row[0]) if row else 0) + 1)))
+
+    return {
+        "inserted": [r[1] for r in inserted],
+        "changed": [r[1] for r in changed],
+        "removed": [r[1] for r in removed],
+    }
+
+def update_meter_mapping(mapping_dict):
+    """Replace the consumer data with `mapping_dict`; see import_meter_mapping for the result."""
+    try:
+        return import_meter_mapping(_mapping_rows(mapping_dict))
     except Exception as e:
         print(f"DATABASE ERROR in update_meter_mapping: {e}")
+        return None
 
 def has_meter_data():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute("SELECT COUNT(*) FROM meter_mapping")
         count = cursor.fetchone()[0]
-        conn.close()
         return count > 0
     except:
         return False
 
 
+def _prefix_upper(prefix):
+    """Smallest string above every string starting with `prefix`, for range scans."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def suggest_consumer_ids(prefix, limit=10):
+    """[(consumer_id, name)] for indexed consumers whose ID starts with `prefix`."""
+    try:
+        prefix = prefix.strip()
+        if not prefix.isdigit() or len(prefix) > 9:
+            return []
+        scale = 10 ** (9 - len(prefix))
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute(
+            "SELECT DISTINCT consumer_id FROM images WHERE consumer_id >= ? AND consumer_id < ? ORDER BY consumer_id LIMIT ?",
+            (int(prefix) * scale, (int(prefix) + 1) * scale, int(limit))
+        )
+        ids = [f"{r[0]:09d}" for r in cursor.fetchall()]
+        if not ids:
+            return []
+        cursor.execute(
+            f"SELECT consumer_id, name FROM meter_mapping WHERE consumer_id IN ({','.join('?' * len(ids))})",
+            ids
+        )
+        names = dict(cursor.fetchall())
+        return [(cid, names.get(cid) or "") for cid in ids]
+    except:
+        return []
+
+def suggest_meter_numbers(prefix, limit=10):
+    """[(meter_no, consumer_id, name)] for meter numbers starting with `prefix`."""
+    try:
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT meter_no, consumer_id, name FROM meter_mapping
+            WHERE meter_no >= ? AND meter_no < ?
+            ORDER BY meter_no
+            LIMIT ?
+            """,
+            (prefix, _prefix_upper(prefix), int(limit))
+        )
+        return cursor.fetchall()
+    except:
+        return []
+
+def suggest_mobile_numbers(prefix, limit=10):
+    """[(mobile_number, consumer_id, name)] for mobile numbers starting with `prefix`."""
+    try:
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT mobile_number, consumer_id, name FROM meter_mapping
+            WHERE mobile_number >= ? AND mobile_number < ?
+            ORDER BY mobile_number
+            LIMIT ?
+            """,
+            (prefix, _prefix_upper(prefix), int(limit))
+        )
+        return cursor.fetchall()
+    except:
+        return []
+
+
+def get_master_version():
+    """Number of consumer data imports that changed meter_mapping (0 if none yet)."""
+    return get_info_value(MASTER_VERSION_KEY, 0)
+
+
 def get_all_consumer_profiles():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = db_connections.get_connection().cursor()
         cursor.execute(
             """
             SELECT consumer_id, meter_no, name, address, mobile_number
@@ -392,7 +756,6 @@ def get_all_consumer_profiles():
             """
         )
         rows = cursor.fetchall()
-        conn.close()
         return [
             {
                 "consumer_id": r[0] or "",
@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import config
+
+BUSY_TIMEOUT_MS = 5000
+
+_local = threading.local()
+_writer = None
+_writer_path = None
+_writer_lock = threading.Lock()
+
+
+def _apply_pragmas(conn):
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def open_connection():
+    """New standalone connection with the standard pragmas applied.
+
+    For long-running jobs that manage their own transactions; the caller closes it.
+    """
+    conn = sqlite3.connect(config.DB_FILE, check_same_thread=False)
+    _apply_pragmas(conn)
+    return conn
+
+
+def get_connection():
+    """Return this thread's reusable connection, opening it on first use.
+
+    Meant for reads. The connection lives as long as the thread and is
+    reopened if config.DB_FILE changes.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != config.DB_FILE:
+        if conn is not None:
+            conn.close()
+        conn = open_connection()
+        _local.conn = conn
+        _local.path = config.DB_FILE
+    return conn
+
+
+@contextmanager
+def write_transaction():
+    """Yield a cursor on the shared writer connection inside one transaction.
+
+    Only one writer runs at a time; the transaction commits when the block
+    exits normally and rolls back if it raises. Do not nest. Like a busy
+    SQLite connection, waiting on another writer gives up after
+    BUSY_TIMEOUT_MS with sqlite3.OperationalError, so a short write from the
+    GUI cannot hang behind an import or index rebuild.
+    """
+    global _writer, _writer_path
+    if not _writer_lock.acquire(timeout=BUSY_TIMEOUT_MS / 1000):
+        raise sqlite3.OperationalError("database is locked")
+    try:
+        if _writer is None or _writer_path != config.DB_FILE:
+            if _writer is not None:
+                _writer.close()
+            _writer = open_connection()
+            _writer.execute("PRAGMA journal_mode=WAL")
+            _writer_path = config.DB_FILE
+        cursor = _writer.cursor()
+        try:
+            yield cursor
+            _writer.commit()
+        except Exception:
+            _writer.rollback()
+            raise
+        finally:
+            cursor.close()
+    finally:
+        _writer_lock.release()
+
+
+def close_all():
+    """Close the writer and the calling thread's reader connection."""
+    global _writer, _writer_path
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+            _writer_path = None
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
@@ -13,11 +13,13 @@ HELP_CONTENT = {
     "2. Getting Started": {
         "_text": "Follow these steps to set up the application for the first time.",
         "Adding Folders": "1. Go to the 'Networks' pane on the right side of the main window.\n2. Click 'Add Folder'.\n3. Select the network drive or folder containing your meter images.\n4. You can add as many folders as you need.",
-        "Indexing Images": "Once your folders are added, click the 'Reload Images' button at the top right.\n\nThe application will scan the folders and build a fast database. Do this whenever new images are added to your folders."
+        "Indexing Images": "Once your folders are added, click the 'Reload Images' button at the top right.\n\nThe application will scan the folders and build a fast database. Do this whenever new images are added to your folders.",
+        "Live Folder Watch": "Turn on File -> Watch Folders (Live Index) to pick up new images automatically.\n\nLocal folders are updated within seconds of a change. Network folders are checked about once a minute. A full 'Reload Images' is then only needed after large reorganisations."
     },
     "3. Search & View": {
         "_text": "How to find and interact with consumer images.",
         "Searching": "Enter a 9-digit Consumer ID or Meter Number in the top bar and press Enter (or click Search).\n\nTip: Press the Spacebar inside the search box to view your recent search history!",
+        "Name & Address Search": "Once consumer data is loaded, type any part of a name or address (at least 3 characters) and press Enter. Word order does not matter and partial words match, e.g. 'ghosh kalyani'. The closest matches are listed first.",
         "Viewing Images": "When a consumer is found, all available image dates will appear on the left.\n\nClick a date to load the high-resolution image into the main canvas. Use the '+' and '-' buttons below the image to zoom in and out."
     },
     "4. Verification Module": {
@@ -0,0 +1,143 @@
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import config
+
+COPIED = "copied"
+MOVED = "moved"
+SKIPPED = "skipped"
+MISSING = "missing"
+FAILED = "failed"
+
+PROGRESS_INTERVAL = 0.25
+# FAT/exFAT backup drives keep mtimes at 2 second resolution.
+MTIME_SLACK = 2.0
+
+
+class TransferStats:
+    """Running totals for one transfer_files call."""
+
+    def __init__(self, total=None):
+        self.total = total
+        self.done = 0
+        self.bytes = 0
+        self.counts = {COPIED: 0, MOVED: 0, SKIPPED: 0, MISSING: 0, FAILED: 0}
+        self.cancelled = False
+        self.started = time.monotonic()
+
+    def elapsed(self):
+        return max(time.monotonic() - self.started, 1e-6)
+
+    def rate(self):
+        """Bytes per second actually transferred."""
+        return self.bytes / self.elapsed()
+
+    def eta(self):
+        """Seconds left, estimated from files per second so far; None if unknown."""
+        if not self.total or not self.done:
+            return None
+        return (self.total - self.done) * self.elapsed() / self.done
+
+    def summary(self):
+        text = f"{self.done}/{self.total}" if self.total else f"{self.done}"
+        text += f"  |  {self.rate() / (1024 * 1024):.1f} MB/s"
+        eta = self.eta()
+        if eta is not None:
+            m, s = divmod(int(eta), 60)
+            h, m = divmod(m, 60)
+            text += f"  |  ETA {h}:{m:02d}:{s:02d}" if h else f"  |  ETA {m}:{s:02d}"
+        return text
+
+
+def _same_file(src_stat, dst):
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    return (dst_stat.st_size == src_stat.st_size
+            and abs(dst_stat.st_mtime - src_stat.st_mtime) <= MTIME_SLACK)
+
+
+def _transfer_one(src, dst, move):
+    try:
+        st = os.stat(src)
+    except FileNotFoundError:
+        # On a resumed move the source is gone because it already arrived.
+        return SKIPPED if move and os.path.exists(dst) else MISSING, 0
+    except OSError:
+        return FAILED, 0
+
+    try:
+        if _same_file(st, dst):
+            if move:
+                os.remove(src)
+            return SKIPPED, 0
+        if move:
+            try:
+                os.replace(src, dst)
+                return MOVED, st.st_size
+            except OSError:
+                pass  # Different volume: copy, then delete.
+        shutil.copy2(src, dst)
+        if move:
+            os.remove(src)
+            return MOVED, st.st_size
+        return COPIED, st.st_size
+    except Exception as e:
+        print(f"Transfer failed {src} -> {dst}: {e}")
+        return FAILED, 0
+
+
+def transfer_files(pairs, move=False, total=None, workers=None,
+                   progress=None, on_result=None, cancel=None):
+    """Copy (or move) files for each (src, dst) pair on a bounded thread pool.
+
+    `pairs` is consumed lazily, so it can stream straight from a database
+    cursor. A destination that already has the source's size and mtime is
+    skipped, so re-running an interrupted or cancelled transfer resumes it.
+    `progress(stats)` is called a few times a second and once at the end.
+    `on_result(src, dst, status)` is called per file. Both callbacks run on
+    the calling thread. Setting the `cancel` event stops new transfers from
+    starting; the ones already in flight finish first.
+
+    Returns the final TransferStats.
+    """
+    workers = workers or config.TRANSFER_WORKERS
+    stats = TransferStats(total)
+    last_report = 0.0
+    in_flight = {}
+
+    def collect(futures):
+        nonlocal last_report
+        for f in futures:
+            src, dst = in_flight.pop(f)
+            status, nbytes = f.result()
+            stats.done += 1
+            stats.bytes += nbytes
+            stats.counts[status] += 1
+            if on_result:
+                on_result(src, dst, status)
+        now = time.monotonic()
+        if progress and now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            progress(stats)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transfer") as pool:
+        for src, dst in pairs:
+            if cancel is not None and cancel.is_set():
+                stats.cancelled = True
+                break
+            while len(in_flight) >= workers * 4:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight[pool.submit(_transfer_one, src, dst, move)] = (src, dst)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    if progress:
+        progress(stats)
+    return stats
+
@@ -0,0 +1,397 @@
+"""Fuzzy-match a survey workbook against the consumer master, without the GUI.
+
+Usage:
+    python fuzzy_batch.py INPUT_XLSX [-o OUT.xlsx|OUT.csv] [--threshold 0.85] [--top-n 5]
+                          [--workers N] [--shard-rows N] [--restart] [--db PATH]
+
+INPUT_XLSX has Name, C/O, Address and Mobile columns (the fuzzy lookup
+template). It runs on the same matcher as the GUI and checkpoints
+finished shards next to the input, so an interrupted overnight run
+resumes where it stopped when started again with the same settings.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import config
+import database
+import fuzzy_lookup
+import fuzzy_store
+import table_export
+
+try:
+    import openpyxl
+except Exception:
+    openpyxl = None
+
+INPUT_HEADERS = {
+    "name": "name",
+    "co": "co",
+    "c/o": "co",
+    "careof": "co",
+    "address": "address",
+    "mobile": "mobile",
+    "mobilenumber": "mobile",
+    "mobile number": "mobile",
+}
+INPUT_FIELDS = ["name", "co", "address", "mobile"]
+
+OUTPUT_HEADERS = [
+    "Input Name",
+    "Input C/O",
+    "Input Address",
+    "Input Mobile",
+    "Matched Consumer ID",
+    "Matched Name",
+    "Matched Address",
+    "Matched Mobile",
+    "Combined Text Match %",
+    "Mobile Exact Match %",
+    "Final Score %",
+    "Match Type",
+    "Rank",
+]
+OUTPUT_WIDTHS = [24, 24, 36, 16, 18, 26, 36, 16, 20, 18, 14, 14, 10]
+
+_worker_matcher = None
+# match() reports progress every this many input rows.
+PROGRESS_ROWS = 500
+# Memory of one worker process: the interpreter with NumPy and rapidfuzz,
+# plus its index (rows, vocabulary and the blocks it has read).
+WORKER_BASE_MB = 64
+WORKER_BYTES_PER_CONSUMER = 1024
+
+
+def read_input_rows(path):
+    """Yield [name, co, address, mobile] string lists for each data row of the input workbook.
+
+    The workbook is streamed read-only, so memory stays flat for any size.
+    """
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is required to read Excel files.")
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            raise ValueError("Input Excel is empty.")
+
+        idx_map = {}
+        for i, v in enumerate(first):
+            if v is None:
+                continue
+            key = str(v).strip().lower().replace("_", " ")
+            key = " ".join(key.split())
+            mapped = INPUT_HEADERS.get(key) or INPUT_HEADERS.get(key.replace(" ", ""))
+            if mapped:
+                idx_map[mapped] = i
+
+        has_headers = "name" in idx_map and "address" in idx_map
+        positions = [idx_map.get(field, fallback) for fallback, field in enumerate(INPUT_FIELDS)]
+        for row in rows if has_headers else itertools.chain([first], rows):
+            row = row or ()
+            yield ["" if i >= len(row) or row[i] is None else str(row[i]).strip() for i in positions]
+    finally:
+        wb.close()
+
+
+def input_row_estimate(path):
+    """Data rows in the input workbook according to its stored dimensions (for progress only), or None."""
+    if openpyxl is None:
+        return None
+    try:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            max_row = wb.active.max_row
+        finally:
+            wb.close()
+    except Exception:
+        return None
+    return max(0, max_row - 1) if max_row else None
+
+
+def result_rows(inputs, matches, index, threshold):
+    """Output sheet rows (OUTPUT_HEADERS order) for one input row and its matches."""
+    if not matches:
+        return [inputs + ["", "", "", "", "0.00", "0.00", "0.00", "No Match", ""]]
+    out = []
+    for rank, (row, text_score, mobile_score, final_score) in enumerate(matches, start=1):
+        if mobile_score == 100.0 and text_score >= (threshold * 100.0):
+            match_type = "Both"
+        elif mobile_score == 100.0:
+            match_type = "Mobile Exact"
+        else:
+            match_type = "Fuzzy Text"
+        out.append(inputs + list(index.profile(row)) + [
+            f"{text_score:.2f}",
+            f"{mobile_score:.2f}",
+            f"{final_score:.2f}",
+            match_type,
+            rank,
+        ])
+    return out
+
+
+def load_index():
+    """The stored fuzzy index, or one built in memory when NumPy/rapidfuzz are missing."""
+    index = fuzzy_store.load_index()
+    if index is None:
+        index = fuzzy_lookup.FuzzyIndex(database.get_all_consumer_profiles())
+    return index
+
+
+class FuzzyMatcher:
+    """Matches survey rows against the consumer master, with no GUI or file dialogs.
+
+    build_index() loads the consumer index, match() turns input rows into
+    output rows (OUTPUT_HEADERS order), and run_file() does a whole
+    workbook on a process pool with checkpoints. `progress(done_rows,
+    total_rows)` is called on the thread doing the matching.
+    """
+
+    def __init__(self, threshold=0.85, top_n=5, progress=None):
+        self.threshold = threshold
+        self.top_n = top_n
+        self.progress = progress
+        self.index = None
+
+    def build_index(self, profiles=None):
+        """Index `profiles` (dicts as from get_all_consumer_profiles), or load the stored index if None."""
+        self.index = load_index() if profiles is None else fuzzy_lookup.FuzzyIndex(profiles)
+        return self.index
+
+    def match(self, rows):
+        """Yield output rows for each [name, co, address, mobile] input row; fully empty rows are skipped."""
+        if self.index is None:
+            self.build_index()
+        total = len(rows) if hasattr(rows, "__len__") else None
+        queries = ((r, fuzzy_lookup.prepare_query(*r)) for r in rows if any(r))
+        done = 0
+        for inputs, matches in self.index.match_many(queries, self.threshold, self.top_n):
+            yield from result_rows(inputs, matches, self.index, self.threshold)
+            done += 1
+            if self.progress and done % PROGRESS_ROWS == 0:
+                self.progress(done, total)
+        if self.progress:
+            self.progress(done if total is None else total, total)
+
+    def run_file(self, input_path, output_path, workers=None, shard_rows=None):
+        """Fuzzy-match every row of `input_path` and write the results to `output_path`.
+
+        The input is streamed in shards of `shard_rows`, matched on a pool of
+        up to `workers` processes that each load the stored index (capped by
+        worker_limit), and checkpointed as they finish (see Checkpoint), so
+        only a few shards are held in memory at once. An interrupted run with
+        the same input, settings and consumer data picks up where it stopped.
+        The results are written from the checkpoint once every shard is done,
+        and the checkpoint is then removed. Progress is reported per shard,
+        against the row count the workbook declares.
+
+        Returns the number of input rows.
+        """
+        workers = workers or config.FUZZY_WORKERS
+        shard_rows = shard_rows or config.FUZZY_SHARD_ROWS
+        total = input_row_estimate(input_path)
+        checkpoint = Checkpoint(checkpoint_path(input_path),
+                                _signature(input_path, self.threshold, self.top_n, shard_rows))
+        state = {"rows": 0}
+
+        def advance(n):
+            state["rows"] += n
+            if self.progress:
+                self.progress(state["rows"], max(total or 0, state["rows"]))
+
+        def pending(finished):
+            for shard, rows in enumerate(_batched(read_input_rows(input_path), shard_rows)):
+                if shard in finished:
+                    advance(len(rows))
+                else:
+                    yield shard, rows
+
+        try:
+            advance(0)
+            for shard, out, size in self._match_shards(pending(checkpoint.done()), workers):
+                checkpoint.save(shard, out)
+                advance(size)
+            write_results(checkpoint.iter_rows(), output_path)
+        except Exception:
+            checkpoint.close()
+            raise
+        checkpoint.close(remove=True)
+        return state["rows"]
+
+    def _match_shards(self, shards, workers):
+        """Yield (shard, output rows, input rows) for each (shard, rows) in `shards`, in completion order."""
+        shards = iter(shards)
+        head = list(itertools.islice(shards, 2))
+        if not head:
+            return
+        shards = itertools.chain(head, shards)
+        workers = min(workers, worker_limit(database.get_consumer_count()))
+        if workers <= 1 or len(head) < 2:
+            shard_matcher = FuzzyMatcher(self.threshold, self.top_n)
+            shard_matcher.index = self.index or self.build_index()
+            for shard, rows in shards:
+                yield shard, list(shard_matcher.match(rows)), len(rows)
+            return
+
+        # Build the stored index once here rather than racing to build it in every process.
+        fuzzy_store.ensure_built()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(config.DB_FILE, self.threshold, self.top_n)) as pool:
+            in_flight = set()
+            while True:
+                # Keep each process one shard ahead; results are saved as they land.
+                for shard, rows in shards:
+                    in_flight.add(pool.submit(_match_shard, shard, rows))
+                    if len(in_flight) >= workers * 2:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for f in done:
+                    yield f.result()
+
+
+def worker_limit(consumers):
+    """Most worker processes whose index copies fit in config.FUZZY_WORKERS_MEMORY_MB together."""
+    per_worker = WORKER_BASE_MB * 2 ** 20 + consumers * WORKER_BYTES_PER_CONSUMER
+    return max(1, config.FUZZY_WORKERS_MEMORY_MB * 2 ** 20 // per_worker)
+
+
+def _batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _init_worker(db_file, threshold, top_n):
+    global _worker_matcher
+    config.DB_FILE = db_file
+    _worker_matcher = FuzzyMatcher(threshold, top_n)
+    # Parallelism comes from the processes; one cdist thread each avoids oversubscription.
+    _worker_matcher.build_index().workers = 1
+
+
+def _match_shard(shard, rows):
+    return shard, list(_worker_matcher.match(rows)), len(rows)
+
+
+class Checkpoint:
+    """Finished shards of one lookup, kept in a small SQLite file next to the input.
+
+    Each shard's output rows are committed in one transaction, so after a
+    crash or close the job restarts from the last finished shard. The file
+    is reset when the input file, the lookup settings or the consumer data differ.
+    """
+
+    def __init__(self, path, signature):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS job (signature TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS shards (shard INTEGER PRIMARY KEY, rows TEXT NOT NULL)")
+        stored = self.conn.execute("SELECT signature FROM job").fetchone()
+        if stored is None or stored[0] != signature:
+            with self.conn:
+                self.conn.execute("DELETE FROM shards")
+                self.conn.execute("DELETE FROM job")
+                self.conn.execute("INSERT INTO job VALUES (?)", (signature,))
+
+    def done(self):
+        return {r[0] for r in self.conn.execute("SELECT shard FROM shards")}
+
+    def save(self, shard, rows):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO shards VALUES (?, ?)", (shard, json.dumps(rows)))
+
+    def iter_rows(self):
+        for (rows,) in self.conn.execute("SELECT rows FROM shards ORDER BY shard"):
+            yield from json.loads(rows)
+
+    def close(self, remove=False):
+        self.conn.close()
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def checkpoint_path(input_path):
+    return os.path.splitext(os.path.abspath(input_path))[0] + ".fuzzy_checkpoint.db"
+
+
+def _signature(input_path, threshold, top_n, shard_rows):
+    # The consumer data version makes a checkpoint stale once the master is re-imported.
+    st = os.stat(input_path)
+    return json.dumps([os.path.abspath(input_path), st.st_size, st.st_mtime, threshold, top_n, shard_rows,
+                       database.get_master_version()])
+
+
+def checkpoint_progress(input_path, threshold, top_n, shard_rows=None):
+    """Shards already finished for this input and settings, or 0 if there is nothing to resume."""
+    path = checkpoint_path(input_path)
+    if not os.path.exists(path):
+        return 0
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            stored = conn.execute("SELECT signature FROM job").fetchone()
+            signature = _signature(input_path, threshold, top_n, shard_rows or config.FUZZY_SHARD_ROWS)
+            if stored is None or stored[0] != signature:
+                return 0
+            return conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0]
+        finally:
+            conn.close()
+    except Exception:
+        return 0
+
+
+def write_results(rows, output_path):
+    """Write output rows to an .xlsx workbook, or to CSV for any other extension."""
+    table_export.write_table(output_path, OUTPUT_HEADERS, rows, widths=OUTPUT_WIDTHS, title="FuzzyLookupResults")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input_file")
+    parser.add_argument("-o", "--output", help="results file, .xlsx or .csv (default: next to the input)")
+    parser.add_argument("--threshold", type=float, default=0.85, help="minimum text match, 0-1")
+    parser.add_argument("--top-n", type=int, default=5, help="matches kept per input row")
+    parser.add_argument("--workers", type=int, default=config.FUZZY_WORKERS)
+    parser.add_argument("--shard-rows", type=int, default=config.FUZZY_SHARD_ROWS)
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint of an interrupted run")
+    parser.add_argument("--db", default=config.DB_FILE)
+    args = parser.parse_args(argv)
+
+    config.DB_FILE = args.db
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.input_file)),
+                                         "fuzzy_lookup_results.xlsx")
+    if args.restart:
+        try:
+            os.remove(checkpoint_path(args.input_file))
+        except OSError:
+            pass
+    start = time.time()
+
+    def report(done, total):
+        print(f"\r{done}/{total} rows | {int(time.time() - start)}s", end="", file=sys.stderr, flush=True)
+
+    matcher = FuzzyMatcher(max(0.0, min(1.0, args.threshold)), max(1, args.top_n), progress=report)
+    n = matcher.run_file(args.input_file, output, workers=args.workers, shard_rows=args.shard_rows)
+    print(f"\n{n} input rows matched, results in {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    # Pool workers re-import this module; frozen builds also need freeze_support().
+    multiprocessing.freeze_support()
+    main()
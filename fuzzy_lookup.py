@@ -0,0 +1,553 @@
+import math
+import re
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+try:
+    from rapidfuzz import fuzz, process
+except Exception:
+    fuzz = None
+    process = None
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Input rows scored together in one cdist call.
+BLOCK_ROWS = 64
+# Upper bound on (rows x candidates) cells per block; keeps each score matrix
+# (float64) to a few tens of MB however broad the blocking gets.
+MAX_BLOCK_CELLS = 4_000_000
+# A block scores every row against the union of the block's candidates, so
+# rows join one only while that costs at most this many times the pairs
+# they need (inputs whose candidate sets overlap, e.g. one household).
+MAX_BLOCK_WASTE = 1.5
+# An input token counts as present in a candidate at this ratio or above.
+TOKEN_MATCH = 80.0
+# Phonetic and LSH buckets bigger than this are skipped: they would add
+# thousands of candidates without telling them apart.
+BUCKET_MAX = 5000
+# Rows scored per input at most. Candidates are ranked by the summed
+# weight of the blocking keys they share with the input (rarer keys weigh
+# more, an exact mobile outweighs everything) and only the best are kept.
+MAX_CANDIDATES = 250
+# Inputs that hit no bucket at all are compared by token_set_ratio with an
+# evenly spaced sample of at most this many rows, never the whole table.
+FALLBACK_SCAN = 50000
+# MinHash over name trigrams: LSH_BANDS bands of LSH_ROWS hashes each.
+LSH_BANDS = 8
+LSH_ROWS = 4
+# Bump when row_keys or lsh_keys change, so stored indexes are rebuilt.
+KEYS_FORMAT = 2
+
+_LSH_PRIME = (1 << 31) - 1
+_LSH_CHUNK = 5000
+_MOBILE_WEIGHT = 1 << 20
+
+# Romanized Bengali/Hindi spellings of one sound, folded before vowels are dropped.
+_PHONETIC_RULES = [
+    ("KSH", "KS"), ("X", "KS"), ("CHH", "C"), ("CH", "C"), ("SH", "S"), ("PH", "F"),
+    ("BH", "B"), ("DH", "D"), ("TH", "T"), ("KH", "K"), ("GH", "G"), ("JH", "J"),
+    ("Q", "K"), ("Z", "J"), ("V", "B"),
+]
+_PHONETIC_MAP = dict(_PHONETIC_RULES)
+_PHONETIC_RE = re.compile("|".join(a for a, _ in _PHONETIC_RULES))
+# V/W after a consonant is a glide (DWIP/DVIP, BISWAS), not a B.
+_GLIDE_RE = re.compile(r"(?<=[B-DF-HJ-NP-TV-Z])[VW]")
+
+
+def normalize_text(value):
+    text = str(value or "").upper()
+    text = re.sub(r"[^A-Z0-9 ]+", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def normalize_mobile(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    return digits if len(digits) == 10 else ""
+
+
+def tokenize(text):
+    return [t for t in normalize_text(text).split(" ") if len(t) >= 2]
+
+
+def text_similarity(a, b):
+    """Return text similarity percentage for one pair; FuzzyIndex scores whole blocks the same way."""
+    if not a or not b:
+        return 0.0
+
+    tokens_a = set(tokenize(a))
+    tokens_b = set(tokenize(b))
+
+    def token_sim(x, y):
+        if fuzz is not None:
+            return float(fuzz.ratio(x, y)) / 100.0
+        return SequenceMatcher(None, x, y).ratio()
+
+    # Coverage from input side: if most input tokens are found in DB text
+    # (even with minor spelling differences), score should remain high.
+    if tokens_a:
+        covered = 0
+        for ta in tokens_a:
+            best = 0.0
+            for tb in tokens_b:
+                s = token_sim(ta, tb)
+                if s > best:
+                    best = s
+            if best >= TOKEN_MATCH / 100.0:
+                covered += 1
+        coverage_input = covered / len(tokens_a)
+    else:
+        coverage_input = 0.0
+
+    if fuzz is not None:
+        ratio_score = float(fuzz.ratio(a, b))
+        sort_score = float(fuzz.token_sort_ratio(a, b))
+        partial_score = float(fuzz.partial_ratio(a, b))
+        set_score = float(fuzz.token_set_ratio(a, b))
+
+        # Base score plus input-coverage boost for containment-style matches.
+        blended = (
+            (0.20 * ratio_score)
+            + (0.20 * sort_score)
+            + (0.25 * partial_score)
+            + (0.35 * set_score)
+        )
+        adjusted = blended * (0.55 + (0.90 * coverage_input))
+        return min(100.0, adjusted)
+    return SequenceMatcher(None, a, b).ratio() * 100.0
+
+
+def prepare_query(name, co, address, mobile):
+    """Normalize one input row into the (text, mobile, name) query FuzzyIndex.match_many expects."""
+    return normalize_text(f"{name} {co} {address}"), normalize_mobile(mobile), normalize_text(name)
+
+
+def phonetic_key(token):
+    """Spelling-insensitive key for a romanized Indic word, or "" for short/numeric tokens.
+
+    Digraphs that spell one sound are folded (CH, SH, DH, KSH/X, V/B, ...),
+    then vowels, Y, W, H and doubled letters are dropped after the first
+    letter; a leading vowel becomes "A". CHOWDHURY and CHAUDHURI both give
+    "CDR", MONDAL and MANDAL "MNDL".
+    """
+    if len(token) < 3 or not token.isalpha():
+        return ""
+    word = _PHONETIC_RE.sub(lambda m: _PHONETIC_MAP[m.group()], _GLIDE_RE.sub("", token))
+    out = ["A" if word[0] in "AEIOUY" else word[0]]
+    for ch in word[1:]:
+        if ch in "AEIOUYWH" or ch == out[-1]:
+            continue
+        out.append(ch)
+    return "".join(out) if len(out) >= 2 else ""
+
+
+def _lsh_params():
+    # Fixed multipliers/offsets so keys are identical across runs and processes.
+    a, b, x = [], [], 0x9E3779B1
+    for _ in range(LSH_BANDS * LSH_ROWS):
+        x = (x * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        a.append((x >> 33) % (_LSH_PRIME - 1) + 1)
+        x = (x * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        b.append((x >> 33) % _LSH_PRIME)
+    return np.array(a, dtype=np.int64)[:, None], np.array(b, dtype=np.int64)[:, None]
+
+
+_LSH_A, _LSH_B = _lsh_params() if np is not None else (None, None)
+
+
+def lsh_keys(names):
+    """MinHash LSH bucket keys ("l" + band + signature) for each normalized name.
+
+    Names sharing most character trigrams (different spellings, swapped
+    word order) land in a common bucket with high probability. Needs NumPy;
+    returns empty sets without it.
+    """
+    if np is None:
+        return [set() for _ in names]
+    out = []
+    for lo in range(0, len(names), _LSH_CHUNK):
+        chunk = names[lo:lo + _LSH_CHUNK]
+        hashes, lens = [], []
+        for name in chunk:
+            padded = f" {name} " if name else ""
+            grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+            hashes.extend(zlib.crc32(g.encode()) for g in grams)
+            lens.append(len(grams))
+        lens = np.array(lens, dtype=np.int64)
+        keys = [set() for _ in chunk]
+        nonempty = np.flatnonzero(lens)
+        if len(nonempty):
+            x = np.array(hashes, dtype=np.int64)[None, :]
+            offsets = (np.cumsum(lens) - lens)[nonempty]
+            sig = np.minimum.reduceat((_LSH_A * x + _LSH_B) % _LSH_PRIME, offsets, axis=1)
+            for col, i in enumerate(nonempty):
+                for band in range(LSH_BANDS):
+                    part = sig[band * LSH_ROWS:(band + 1) * LSH_ROWS, col]
+                    keys[i].add(f"l{band}{zlib.crc32(part.tobytes()):08x}")
+        out.extend(keys)
+    return out
+
+
+def _mobile_key(mobile_norm):
+    # Leading "1" keeps numbers like 0xxxxxxxxx distinct from "no mobile" (0).
+    return int("1" + mobile_norm) if mobile_norm else 0
+
+
+def _any_by_segment(flags, offsets, lens):
+    """OR `flags` (last axis) over consecutive segments of the given lengths."""
+    out = np.zeros(flags.shape[:-1] + (len(lens),), dtype=bool)
+    nonempty = lens > 0
+    if nonempty.any():
+        out[..., nonempty] = np.logical_or.reduceat(flags, offsets[nonempty], axis=-1)
+    return out
+
+
+def _token_keys(tokens, mobile_norm):
+    keys = set()
+    if mobile_norm:
+        keys.add("m" + mobile_norm)
+    for tok in tokens:
+        if len(tok) >= 3:
+            keys.add("p" + tok[:3])
+            phonetic = phonetic_key(tok)
+            if phonetic:
+                keys.add("f" + phonetic)
+        if len(tok) >= 4:
+            keys.add("t" + tok)
+    return keys
+
+
+def row_keys(text, mobile_norm):
+    """Blocking keys for one consumer's normalized text and mobile.
+
+    "m" + mobile, "p" + 3-char token prefix, "t" + 4+ char token and
+    "f" + phonetic_key. The name's lsh_keys are added separately.
+    """
+    return _token_keys(sorted(set(tokenize(text))), mobile_norm)
+
+
+class FuzzyIndex:
+    """Normalized consumer texts plus the blocking index used to find candidates.
+
+    Built in memory from get_all_consumer_profiles() rows; see fuzzy_store
+    for the copy kept in the database. `match_many` scores input rows in
+    blocks: the four rapidfuzz scorers run as process.cdist over (block rows
+    x union of their candidates) on all cores, and the input-token coverage
+    boost is computed with NumPy from a token-vs-vocabulary cdist. Without
+    rapidfuzz or NumPy it falls back to text_similarity per pair, with the
+    same candidates and scores (but without LSH buckets).
+
+    `stats` counts queries, scored candidates and fallback scans.
+    """
+
+    # Threads per cdist call; -1 uses every core.
+    workers = -1
+
+    def __init__(self, profiles=()):
+        self.consumer_ids = []
+        self.names = []
+        self.addresses = []
+        self.mobiles = []
+        self.mobile_norms = []
+        self.texts = []
+        self.tokens = []
+        self.stats = {"queries": 0, "candidates": 0, "fallbacks": 0}
+        blocks = defaultdict(list)
+
+        for idx, row in enumerate(profiles):
+            name = str(row.get("name", ""))
+            address = str(row.get("address", ""))
+            text = normalize_text(f"{name} {address}".strip())
+            tokens = sorted(set(tokenize(text)))
+            mobile_norm = normalize_mobile(row.get("mobile_number", ""))
+
+            self.consumer_ids.append(str(row.get("consumer_id", "")))
+            self.names.append(name)
+            self.addresses.append(address)
+            self.mobiles.append(str(row.get("mobile_number", "")))
+            self.mobile_norms.append(mobile_norm)
+            self.texts.append(text)
+            self.tokens.append(tokens)
+            for key in _token_keys(tokens, mobile_norm):
+                blocks[key].append(idx)
+
+        names = [normalize_text(n) for n in self.names]
+        for idx, keys in enumerate(lsh_keys(names)):
+            for key in keys:
+                blocks[key].append(idx)
+        self.blocks = dict(blocks)
+        self.vectorized = fuzz is not None and np is not None
+        if self.vectorized:
+            self._build_arrays()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def profile(self, row):
+        """(consumer_id, name, address, mobile_number) of candidate `row`."""
+        return self.consumer_ids[row], self.names[row], self.addresses[row], self.mobiles[row]
+
+    def _build_arrays(self):
+        vocab = {}
+        ptr = [0]
+        flat = []
+        for tokens in self.tokens:
+            for tok in tokens:
+                flat.append(vocab.setdefault(tok, len(vocab)))
+            ptr.append(len(flat))
+        self.vocab = vocab
+        self.vocab_list = list(vocab)
+        self.tok_ptr = np.array(ptr, dtype=np.int64)
+        self.tok_ids = np.array(flat, dtype=np.int32)
+        self.mobile_keys = np.array([_mobile_key(m) for m in self.mobile_norms], dtype=np.int64)
+        self.has_text = np.array([bool(t) for t in self.texts], dtype=bool)
+        # Token lists are only needed by the scalar path.
+        self.tokens = None
+        for key, rows in self.blocks.items():
+            self.blocks[key] = np.array(rows, dtype=np.int32)
+
+    def _block(self, key):
+        """Candidate rows filed under blocking `key`, or None."""
+        return self.blocks.get(key)
+
+    def _weight(self, rows):
+        # Integer, so candidate ranking ties break the same way on both paths.
+        return max(1, int(8 * math.log2(len(self) / len(rows))))
+
+    def candidates(self, tokens, mobile_norm):
+        """Blocked (rows, weight) groups for one input; `tokens` are its 3+ character tokens."""
+        groups = []
+
+        def add(key, weight=None):
+            rows = self._block(key)
+            if rows is not None and len(rows):
+                groups.append((rows, weight or self._weight(rows)))
+
+        # Exact mobile is the strongest and fastest blocker.
+        if mobile_norm:
+            add("m" + mobile_norm, _MOBILE_WEIGHT)
+
+        # Prefix blocking from first few input tokens.
+        for tok in tokens[:6]:
+            add("p" + tok[:3])
+
+        # Add candidates by longest tokens to improve precision.
+        longest_tokens = sorted({t for t in tokens if len(t) >= 4}, key=len, reverse=True)[:4]
+        for tok in longest_tokens:
+            add("t" + tok)
+
+        # Fallback: if blocking is too narrow, relax using only prefixes.
+        if not groups:
+            for tok in tokens:
+                add("p" + tok[:3])
+
+        return groups
+
+    def similar(self, tokens, name):
+        """(rows, weight) groups sharing a phonetic key with an input token, or an LSH bucket with the name.
+
+        These catch spellings the prefix/token blocks miss (CHAUDHURI vs
+        CHOWDHURY). Buckets over BUCKET_MAX rows are skipped.
+        """
+        keys = {"f" + k for k in map(phonetic_key, tokens) if k}
+        if name and self.vectorized:
+            keys.update(lsh_keys([name])[0])
+        groups = []
+        for key in sorted(keys):
+            rows = self._block(key)
+            if rows is not None and 0 < len(rows) <= BUCKET_MAX:
+                groups.append((rows, self._weight(rows)))
+        return groups
+
+    def _sample(self):
+        """Rows the fallback looks at: all of them, or an even spread of FALLBACK_SCAN."""
+        return range(0, len(self), -(-len(self) // FALLBACK_SCAN) or 1)
+
+    def _fallback(self, text):
+        """Last resort for inputs no bucket knows: the sampled rows nearest by token_set_ratio."""
+        self.stats["fallbacks"] += 1
+        if not text or not len(self):
+            return np.zeros(0, dtype=np.int32)
+        sample = np.asarray(self._sample(), dtype=np.int32)
+        scores = process.cdist([text], [self.texts[i] for i in sample], scorer=fuzz.token_set_ratio,
+                               dtype=np.float32, workers=self.workers)[0]
+        k = min(MAX_CANDIDATES, len(scores))
+        return np.sort(sample[np.argpartition(-scores, k - 1)[:k]])
+
+    def _segments(self, rows):
+        """Vocabulary ids of every token of `rows`, flattened, with per-row offsets and lengths."""
+        starts = self.tok_ptr[rows]
+        lens = self.tok_ptr[rows + 1] - starts
+        ends = np.cumsum(lens)
+        total = int(ends[-1]) if len(ends) else 0
+        pos = np.arange(total) - np.repeat(ends - lens - starts, lens)
+        return self.tok_ids[pos], ends - lens, lens
+
+    def _eligible(self, rows, tokens, mobile_norm):
+        """Mask of candidates sharing an exact token with the input, or its mobile."""
+        if not tokens or not len(rows):
+            return np.ones(len(rows), dtype=bool)
+        ids = [self.vocab[t] for t in tokens if t in self.vocab]
+        flat, offsets, lens = self._segments(rows)
+        keep = lens == 0
+        if ids:
+            keep |= _any_by_segment(np.isin(flat, ids), offsets, lens)
+        if mobile_norm:
+            keep |= self.mobile_keys[rows] == _mobile_key(mobile_norm)
+        return keep
+
+    def _score_block(self, texts, row_sets):
+        """Text scores of each input text against its own candidate rows, via one cdist per scorer."""
+        union = np.unique(np.concatenate(row_sets))
+        choices = [self.texts[i] for i in union]
+
+        blended = 0.20 * process.cdist(texts, choices, scorer=fuzz.ratio, dtype=np.float64, workers=self.workers)
+        blended += 0.20 * process.cdist(texts, choices, scorer=fuzz.token_sort_ratio, dtype=np.float64, workers=self.workers)
+        blended += 0.25 * process.cdist(texts, choices, scorer=fuzz.partial_ratio, dtype=np.float64, workers=self.workers)
+        blended += 0.35 * process.cdist(texts, choices, scorer=fuzz.token_set_ratio, dtype=np.float64, workers=self.workers)
+
+        # Coverage: share of each input's tokens that match (ratio >= TOKEN_MATCH)
+        # at least one token of the candidate. Token-vs-vocabulary hits are
+        # computed once, then OR-ed over every candidate's token segment.
+        query_tokens = [sorted(set(tokenize(t))) for t in texts]
+        qvocab = sorted({t for toks in query_tokens for t in toks})
+        covered = np.zeros((len(texts), len(union)), dtype=np.float64)
+        if qvocab:
+            flat, offsets, lens = self._segments(union)
+            local, inverse = np.unique(flat, return_inverse=True)
+            hits = process.cdist(qvocab, [self.vocab_list[i] for i in local], scorer=fuzz.ratio,
+                                 score_cutoff=TOKEN_MATCH, dtype=np.float32, workers=self.workers) > 0
+            qpos = {t: i for i, t in enumerate(qvocab)}
+            incidence = np.zeros((len(texts), len(qvocab)), dtype=np.float64)
+            for b, toks in enumerate(query_tokens):
+                incidence[b, [qpos[t] for t in toks]] = 1.0
+            step = max(1, MAX_BLOCK_CELLS // max(1, len(flat)))
+            for lo in range(0, len(qvocab), step):
+                found = _any_by_segment(hits[lo:lo + step][:, inverse], offsets, lens)
+                covered += incidence[:, lo:lo + step] @ found
+            counts = np.array([max(1, len(toks)) for toks in query_tokens], dtype=np.float64)
+            covered /= counts[:, None]
+
+        adjusted = np.minimum(100.0, blended * (0.55 + (0.90 * covered)))
+        return [adjusted[b, np.searchsorted(union, rows)] for b, rows in enumerate(row_sets)]
+
+    def _rank(self, rows, text_scores, mobile_norm, threshold, top_n):
+        if mobile_norm:
+            mobile_scores = np.where(self.mobile_keys[rows] == _mobile_key(mobile_norm), 100.0, 0.0)
+        else:
+            mobile_scores = np.zeros(len(rows))
+        final_scores = np.maximum(text_scores, mobile_scores)
+        keep = np.flatnonzero((text_scores >= threshold * 100.0) | (mobile_scores == 100.0))
+        order = keep[np.lexsort((-mobile_scores[keep], -text_scores[keep], -final_scores[keep]))][:top_n]
+        return [(int(rows[i]), float(text_scores[i]), float(mobile_scores[i]), float(final_scores[i]))
+                for i in order]
+
+    def _match_scalar(self, text, mobile_norm, name, threshold, top_n):
+        tokens = [t for t in tokenize(text) if len(t) >= 3]
+        blocked = self.candidates(tokens, mobile_norm)
+        similar = self.similar(tokens, name)
+        if not blocked and not similar:
+            self.stats["fallbacks"] += 1
+            rows = list(self._sample()) if text else []
+        else:
+            weights = defaultdict(int)
+            for group, weight in blocked + similar:
+                for idx in group:
+                    weights[idx] += weight
+            bypass = {idx for group, _ in similar for idx in group}
+            token_set = set(tokens)
+            # Same exact-token filter and ranking as _query_rows.
+            rows = [idx for idx in weights
+                    if idx in bypass or not tokens or not self.tokens[idx]
+                    or token_set.intersection(self.tokens[idx])
+                    or (mobile_norm and self.mobile_norms[idx] == mobile_norm)]
+            rows = sorted(sorted(rows, key=lambda idx: (-weights[idx], idx))[:MAX_CANDIDATES])
+        self.stats["queries"] += 1
+        self.stats["candidates"] += len(rows)
+        matches = []
+        for idx in rows:
+            text_score = 0.0
+            if text and self.texts[idx]:
+                text_score = text_similarity(text, self.texts[idx])
+            mobile_score = 100.0 if (mobile_norm and self.mobile_norms[idx] == mobile_norm) else 0.0
+            if text_score >= (threshold * 100.0) or mobile_score == 100.0:
+                matches.append((idx, text_score, mobile_score, max(text_score, mobile_score)))
+        matches.sort(key=lambda m: (m[3], m[1], m[2]), reverse=True)
+        return matches[:top_n]
+
+    def _query_rows(self, text, mobile_norm, name):
+        """Candidate rows for one query: the MAX_CANDIDATES best-keyed block hits, or the sampled fallback."""
+        tokens = [t for t in tokenize(text) if len(t) >= 3]
+        blocked = self.candidates(tokens, mobile_norm)
+        similar = self.similar(tokens, name)
+        if not blocked and not similar:
+            rows = self._fallback(text)
+        else:
+            groups = blocked + similar
+            rows, inverse = np.unique(np.concatenate([g for g, _ in groups]), return_inverse=True)
+            weights = np.bincount(inverse, weights=np.repeat([w for _, w in groups], [len(g) for g, _ in groups]))
+            # The exact-token overlap filter applies to block hits only; phonetic
+            # and LSH hits are there precisely because no token matched exactly.
+            keep = self._eligible(rows, tokens, mobile_norm)
+            if similar:
+                keep |= np.isin(rows, np.concatenate([g for g, _ in similar]))
+            rows, weights = rows[keep], weights[keep]
+            if len(rows) > MAX_CANDIDATES:
+                rows = np.sort(rows[np.lexsort((rows, -weights))[:MAX_CANDIDATES]])
+            rows = rows.astype(np.int32)
+        self.stats["queries"] += 1
+        self.stats["candidates"] += len(rows)
+        return rows
+
+    def _flush(self, block, threshold, top_n):
+        scored = [i for i, item in enumerate(block) if item[1] and len(item[3])]
+        scores = {}
+        if scored:
+            results = self._score_block([block[i][1] for i in scored], [block[i][3] for i in scored])
+            scores = dict(zip(scored, results))
+        for i, (tag, text, mobile_norm, rows) in enumerate(block):
+            text_scores = scores.get(i)
+            if text_scores is None:
+                text_scores = np.zeros(len(rows))
+            else:
+                text_scores = np.where(self.has_text[rows], text_scores, 0.0)
+            yield tag, self._rank(rows, text_scores, mobile_norm, threshold, top_n)
+
+    def match_many(self, queries, threshold=0.85, top_n=5):
+        """Yield (tag, matches) for each (tag, query) in `queries`, in order.
+
+        Each query is the (text, mobile, name) tuple from prepare_query.
+        `matches` is a list of (row, text_score, mobile_score, final_score)
+        for at most `top_n` candidates whose text score reaches `threshold`
+        (0-1) or whose mobile matches exactly, best first. Queries are
+        consumed lazily, a block at a time.
+        """
+        if not self.vectorized:
+            for tag, (text, mobile_norm, name) in queries:
+                yield tag, self._match_scalar(text, mobile_norm, name, threshold, top_n)
+            return
+
+        block = []
+        cells = 0
+        union = None
+        for tag, (text, mobile_norm, name) in queries:
+            rows = self._query_rows(text, mobile_norm, name)
+            merged = np.union1d(union, rows) if block else rows
+            if block and (len(block) >= BLOCK_ROWS
+                          or (len(block) + 1) * len(merged) > MAX_BLOCK_WASTE * (cells + len(rows))
+                          or (len(block) + 1) * len(merged) > MAX_BLOCK_CELLS):
+                yield from self._flush(block, threshold, top_n)
+                block = []
+                cells = 0
+                merged = rows
+            block.append((tag, text, mobile_norm, rows))
+            cells += len(rows)
+            union = merged
+        if block:
+            yield from self._flush(block, threshold, top_n)
@@ -0,0 +1,328 @@
+import json
+import threading
+from array import array
+from collections import defaultdict
+
+import config
+import db_connections
+import fuzzy_lookup
+from fuzzy_lookup import lsh_keys, normalize_mobile, normalize_text, row_keys, tokenize
+
+np = fuzzy_lookup.np
+
+VERSION_KEY = "fuzzy_index_version"
+SYNC_CHUNK = 500
+WRITE_BATCH = 10000
+# Past this share of changed consumers a full rebuild beats patching blocks.
+REBUILD_RATIO = 0.25
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def create_tables(cursor):
+    # fuzzy_rows is keyed by meter_mapping rowid; tokens are int32 fuzzy_vocab ids.
+    cursor.execute("CREATE TABLE IF NOT EXISTS fuzzy_vocab (id INTEGER PRIMARY KEY, token TEXT NOT NULL UNIQUE)")
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS fuzzy_rows ("
+        "row_id INTEGER PRIMARY KEY, text TEXT NOT NULL, mobile TEXT NOT NULL, name TEXT NOT NULL, "
+        "tokens BLOB NOT NULL)"
+    )
+    cursor.execute("CREATE TABLE IF NOT EXISTS fuzzy_blocks (key TEXT PRIMARY KEY, rows BLOB NOT NULL) WITHOUT ROWID")
+
+
+def drop_tables(cursor):
+    """Drop the fuzzy tables and mark the index unbuilt; load_index() rebuilds it on next use.
+
+    The version counter is kept, so a rebuilt index never reuses the
+    version of one already cached in memory.
+    """
+    previous = _stamp(cursor).get("version")
+    for table in ("fuzzy_vocab", "fuzzy_rows", "fuzzy_blocks"):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    if previous is None:
+        cursor.execute("DELETE FROM db_info WHERE key = ?", (VERSION_KEY,))
+    else:
+        cursor.execute("INSERT OR REPLACE INTO db_info VALUES (?, ?)", (VERSION_KEY, json.dumps({"version": previous})))
+
+
+def _stamp(cursor):
+    try:
+        cursor.execute("SELECT value FROM db_info WHERE key = ?", (VERSION_KEY,))
+        row = cursor.fetchone()
+        stamp = json.loads(row[0]) if row else {}
+    except Exception:
+        return {}
+    # Stores from before KEYS_FORMAT kept a bare version number.
+    return stamp if isinstance(stamp, dict) else {"version": stamp}
+
+
+def _version(cursor):
+    """Stored index version, or None if never built or built with older blocking keys."""
+    stamp = _stamp(cursor)
+    if stamp.get("format") != fuzzy_lookup.KEYS_FORMAT:
+        return None
+    return stamp.get("version")
+
+
+def _bump_version(cursor, previous=None):
+    current = _stamp(cursor).get("version", 0) if previous is None else previous
+    cursor.execute("INSERT OR REPLACE INTO db_info VALUES (?, ?)", (VERSION_KEY, json.dumps(
+        {"format": fuzzy_lookup.KEYS_FORMAT, "version": (current or 0) + 1})))
+
+
+def _entry(name, address, mobile_number):
+    text = normalize_text(f"{name or ''} {address or ''}".strip())
+    return text, normalize_mobile(mobile_number), normalize_text(name)
+
+
+def _keys_many(entries):
+    return [row_keys(text, mobile) | lsh for (text, mobile, _), lsh in zip(entries, lsh_keys([e[2] for e in entries]))]
+
+
+class _Vocab:
+    """token -> id map for fuzzy_vocab; new tokens are written as they are met."""
+
+    def __init__(self, cursor, load=True):
+        self.cursor = cursor
+        self.ids = {}
+        if load:
+            cursor.execute("SELECT token, id FROM fuzzy_vocab")
+            self.ids = dict(cursor.fetchall())
+        self.new = []
+
+    def blob(self, text):
+        ids = array("i")
+        for tok in sorted(set(tokenize(text))):
+            tid = self.ids.get(tok)
+            if tid is None:
+                tid = self.ids[tok] = len(self.ids)
+                self.new.append((tid, tok))
+            ids.append(tid)
+        return ids.tobytes()
+
+    def flush(self):
+        if self.new:
+            self.cursor.executemany("INSERT INTO fuzzy_vocab (id, token) VALUES (?, ?)", self.new)
+            self.new = []
+
+
+def rebuild(cursor):
+    """Recompute every fuzzy table from meter_mapping inside the caller's transaction."""
+    previous = _stamp(cursor).get("version", 0)
+    drop_tables(cursor)
+    create_tables(cursor)
+    vocab = _Vocab(cursor, load=False)
+    blocks = defaultdict(lambda: array("i"))
+    reader = cursor.connection.cursor()
+    try:
+        reader.execute("SELECT rowid, name, address, mobile_number FROM meter_mapping ORDER BY rowid")
+        while True:
+            batch = reader.fetchmany(WRITE_BATCH)
+            if not batch:
+                break
+            entries = [_entry(name, address, mobile_number) for _, name, address, mobile_number in batch]
+            for (rowid, *_), keys in zip(batch, _keys_many(entries)):
+                for key in keys:
+                    blocks[key].append(rowid)
+            cursor.executemany("INSERT INTO fuzzy_rows VALUES (?, ?, ?, ?, ?)",
+                               [(r[0],) + e + (vocab.blob(e[0]),) for r, e in zip(batch, entries)])
+    finally:
+        reader.close()
+    vocab.flush()
+    cursor.executemany("INSERT INTO fuzzy_blocks VALUES (?, ?)", ((k, v.tobytes()) for k, v in blocks.items()))
+    _bump_version(cursor, previous)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def sync(cursor, rowids, removed_rowids):
+    """Refresh the fuzzy tables for changed/inserted meter_mapping `rowids` and drop `removed_rowids`.
+
+    Only blocks whose membership actually changed are rewritten. Nothing is
+    built here: if the index was never built (or is from an older format)
+    it is left for load_index(), and if most rows changed it is dropped so
+    that load_index() rebuilds it, outside the caller's transaction.
+    """
+    if _version(cursor) is None:
+        return
+    cursor.execute("SELECT COUNT(*) FROM fuzzy_rows")
+    stored = cursor.fetchone()[0]
+    if stored == 0 or len(rowids) + len(removed_rowids) > REBUILD_RATIO * stored:
+        drop_tables(cursor)
+        return
+
+    vocab = _Vocab(cursor)
+    changes = defaultdict(lambda: (set(), set()))
+
+    for chunk in _chunks(list(removed_rowids), SYNC_CHUNK):
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT row_id, text, mobile, name FROM fuzzy_rows WHERE row_id IN ({marks})", chunk)
+        rows = cursor.fetchall()
+        for (rowid, *_), keys in zip(rows, _keys_many([tuple(r[1:]) for r in rows])):
+            for key in keys:
+                changes[key][0].add(rowid)
+        cursor.execute(f"DELETE FROM fuzzy_rows WHERE row_id IN ({marks})", chunk)
+
+    for chunk in _chunks(list(rowids), SYNC_CHUNK):
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT row_id, text, mobile, name FROM fuzzy_rows WHERE row_id IN ({marks})", chunk)
+        old = {r[0]: tuple(r[1:]) for r in cursor.fetchall()}
+        cursor.execute(
+            f"SELECT rowid, name, address, mobile_number FROM meter_mapping WHERE rowid IN ({marks})", chunk
+        )
+        updated = []
+        for rowid, name, address, mobile_number in cursor.fetchall():
+            entry = _entry(name, address, mobile_number)
+            if old.get(rowid) != entry:
+                updated.append((rowid, entry))
+        if not updated:
+            continue
+        previous = [old[rowid] for rowid, _ in updated if rowid in old]
+        old_keys = dict(zip([rowid for rowid, _ in updated if rowid in old], _keys_many(previous)))
+        for (rowid, entry), new_keys in zip(updated, _keys_many([e for _, e in updated])):
+            before = old_keys.get(rowid, set())
+            for key in before - new_keys:
+                changes[key][0].add(rowid)
+            for key in new_keys - before:
+                changes[key][1].add(rowid)
+        cursor.executemany("INSERT OR REPLACE INTO fuzzy_rows VALUES (?, ?, ?, ?, ?)",
+                           [(rowid,) + entry + (vocab.blob(entry[0]),) for rowid, entry in updated])
+    vocab.flush()
+
+    for key, (drop, add) in changes.items():
+        cursor.execute("SELECT rows FROM fuzzy_blocks WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        members = set(array("i", row[0])) if row else set()
+        members = (members - drop) | add
+        if members:
+            cursor.execute("INSERT OR REPLACE INTO fuzzy_blocks VALUES (?, ?)",
+                           (key, array("i", sorted(members)).tobytes()))
+        else:
+            cursor.execute("DELETE FROM fuzzy_blocks WHERE key = ?", (key,))
+    _bump_version(cursor)
+
+
+def update_after_import(cursor, rowids, removed_rowids):
+    """Called by import_meter_mapping inside its transaction; a failure here never blocks the import.
+
+    Only an index that is already built is patched (see sync). On error the
+    fuzzy tables are dropped instead, and load_index() rebuilds them on
+    next use.
+    """
+    cursor.execute("SAVEPOINT fuzzy_sync")
+    if np is None:
+        # The stored index is only read with NumPy, and its LSH keys need it to build.
+        drop_tables(cursor)
+        cursor.execute("RELEASE fuzzy_sync")
+        return
+    try:
+        sync(cursor, rowids, removed_rowids)
+    except Exception as e:
+        print(f"Fuzzy index update failed, will rebuild on next lookup: {e}")
+        cursor.execute("ROLLBACK TO fuzzy_sync")
+        drop_tables(cursor)
+    cursor.execute("RELEASE fuzzy_sync")
+
+
+class StoredFuzzyIndex(fuzzy_lookup.FuzzyIndex):
+    """FuzzyIndex read from the fuzzy tables instead of built from profiles.
+
+    Texts, token ids and mobiles are loaded in one scan. Blocks are read
+    from fuzzy_blocks on first use, and matched consumers' details from
+    meter_mapping, so start-up does no normalization and holds no blocking
+    dictionaries. Requires NumPy and rapidfuzz.
+    """
+
+    def __init__(self, conn, version):
+        self.version = version
+        self.path = config.DB_FILE
+        self.vectorized = True
+        self.tokens = None
+        self.blocks = {}
+        self.stats = {"queries": 0, "candidates": 0, "fallbacks": 0}
+        cursor = conn.cursor()
+        cursor.execute("SELECT token FROM fuzzy_vocab ORDER BY id")
+        self.vocab_list = [r[0] for r in cursor]
+        self.vocab = {tok: i for i, tok in enumerate(self.vocab_list)}
+
+        cursor.execute("SELECT row_id, text, mobile, tokens FROM fuzzy_rows ORDER BY row_id")
+        row_ids, texts, mobiles, blobs = [], [], [], []
+        for rowid, text, mobile, blob in cursor:
+            row_ids.append(rowid)
+            texts.append(text)
+            mobiles.append(fuzzy_lookup._mobile_key(mobile))
+            blobs.append(blob)
+        self.row_ids = np.array(row_ids, dtype=np.int64)
+        self.texts = texts
+        self.mobile_keys = np.array(mobiles, dtype=np.int64)
+        self.has_text = np.array([bool(t) for t in texts], dtype=bool)
+        self.tok_ptr = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(b) // 4 for b in blobs], out=self.tok_ptr[1:])
+        self.tok_ids = np.frombuffer(b"".join(blobs), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _block(self, key):
+        if not len(self.row_ids):
+            return None
+        if key not in self.blocks:
+            cursor = db_connections.get_connection().cursor()
+            cursor.execute("SELECT rows FROM fuzzy_blocks WHERE key = ?", (key,))
+            row = cursor.fetchone()
+            rows = None
+            if row:
+                ids = np.frombuffer(row[0], dtype=np.int32)
+                pos = np.minimum(np.searchsorted(self.row_ids, ids), len(self.row_ids) - 1)
+                # Drop rows that changed after this index was loaded.
+                rows = pos[self.row_ids[pos] == ids].astype(np.int32)
+            self.blocks[key] = rows
+        return self.blocks[key]
+
+    def profile(self, row):
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute("SELECT consumer_id, name, address, mobile_number FROM meter_mapping WHERE rowid = ?",
+                       (int(self.row_ids[row]),))
+        r = cursor.fetchone()
+        return tuple(v or "" for v in r) if r else ("", "", "", "")
+
+
+def ensure_built():
+    """Build the fuzzy tables if they have never been built (or were dropped after a failed sync)."""
+    if np is None:
+        return
+    with db_connections.write_transaction() as cursor:
+        cursor.execute("BEGIN IMMEDIATE")
+        if _version(cursor) is None:
+            rebuild(cursor)
+
+
+def load_index():
+    """Return the stored fuzzy index, loading it on first use and after the data changes.
+
+    Builds the fuzzy tables first if they have never been built. Returns
+    None when NumPy or rapidfuzz is missing; callers then build a
+    FuzzyIndex from get_all_consumer_profiles() instead.
+    """
+    global _cache
+    if np is None or fuzzy_lookup.fuzz is None:
+        return None
+    with _cache_lock:
+        conn = db_connections.get_connection()
+        version = _version(conn.cursor())
+        if _cache is not None and version is not None and _cache.version == version and _cache.path == config.DB_FILE:
+            return _cache
+        _cache = None
+        if version is None:
+            ensure_built()
+        # One read transaction, so the vocabulary and rows come from the same snapshot.
+        conn.execute("BEGIN")
+        try:
+            _cache = StoredFuzzyIndex(conn, _version(conn.cursor()))
+        finally:
+            conn.execute("COMMIT")
+        return _cache
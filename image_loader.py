@@ -0,0 +1,30 @@
+import math
+
+from PIL import Image
+
+
+def open_image(path, scale=None, box=None):
+    """Open `path`, decoding only as much resolution as the display needs.
+
+    `scale` is the intended display size relative to the full image; `box`
+    is a (width, height) the whole image must fit into, from which a scale
+    is derived. For JPEGs the decoder is put in draft mode so it decodes at
+    1/2, 1/4 or 1/8 resolution when that still covers the requested size;
+    other formats, or a scale of 1 and above, decode at full resolution.
+
+    Returns (image, full_size) where full_size is the undecimated (w, h).
+    """
+    im = Image.open(path)
+    full_size = im.size
+    w, h = full_size
+    if box:
+        scale = min(box[0] / w, box[1] / h)
+    if scale and scale < 1.0 and im.format == "JPEG":
+        im.draft(None, (max(1, math.ceil(w * scale)), max(1, math.ceil(h * scale))))
+    im.load()
+    return im, full_size
+
+
+def is_reduced(im, full_size):
+    """True if `im` was decoded below the file's full resolution."""
+    return im.size != tuple(full_size)
@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+import config
+from database import compose_filename, date_original
+
+CONSUMER_IMAGES_SQL = """
+    SELECT date, mru_id, dir_id, suffix
+    FROM images
+    WHERE consumer_id = ?
+    ORDER BY date DESC
+"""
+
+# IDs per IN (...) query; well under SQLite's default 999-variable limit.
+BATCH_CHUNK = 500
+
+
+def _chunks(consumer_ids, size):
+    chunk = []
+    for cid in consumer_ids:
+        chunk.append(cid)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ConsumerImageLookup:
+    """Read path for consumer image lookups.
+
+    Holds one long-lived read-only connection so the lookup statement stays
+    prepared in the connection's statement cache, and answers directory
+    paths and MRU codes from in-memory maps instead of joining
+    directories and mrus on every search. The maps reload on a miss, so
+    folders added by the indexer show up without a restart.
+    """
+
+    def __init__(self, db_file=None):
+        self.db_file = db_file or config.DB_FILE
+        self._conn = None
+        self._lock = threading.Lock()
+        self._dirs = {}
+        self._mrus = {}
+
+    def _connect(self):
+        try:
+            uri = f"file:{pathname2url(self.db_file)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute("SELECT 1 FROM images LIMIT 1")
+        except sqlite3.Error:
+            # Read-only opens can fail on a WAL database before its -shm exists.
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _reload_maps(self):
+        self._dirs = dict(self._conn.execute("SELECT id, dir_path FROM directories"))
+        self._mrus = dict(self._conn.execute("SELECT id, mru FROM mrus"))
+
+    def get_images(self, consumer_id, limit=None):
+        """Return [(date_original, mru, dir_path, filename)] for a consumer, newest first."""
+        try:
+            cid = int(consumer_id)
+        except (TypeError, ValueError):
+            return []
+
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            cur = self._conn.execute(CONSUMER_IMAGES_SQL, (cid,))
+            rows = cur.fetchmany(limit) if limit else cur.fetchall()
+            cur.close()
+
+            if any(d not in self._dirs or m not in self._mrus for _, m, d, _ in rows):
+                self._reload_maps()
+
+            out = []
+            for date, mru_id, dir_id, suffix in rows:
+                dir_path = self._dirs.get(dir_id)
+                mru = self._mrus.get(mru_id)
+                if dir_path is None or mru is None:
+                    continue
+                out.append((date_original(date), mru, dir_path, compose_filename(cid, date, mru, suffix)))
+            return out
+
+    def _query_chunk(self, sql, chunk):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            rows = self._conn.execute(sql.format(",".join("?" * len(chunk))), chunk).fetchall()
+            if any(d not in self._dirs or m not in self._mrus for m, d in ((r[2], r[3]) for r in rows)):
+                self._reload_maps()
+            return rows
+
+    def iter_images_many(self, consumer_ids, chunk_size=BATCH_CHUNK):
+        """Yield (consumer_id, images) per ID in input order; images is as from get_images.
+
+        IDs are deduplicated and resolved with one IN (...) query per chunk;
+        IDs that are not numeric are skipped.
+        """
+        sql = "SELECT consumer_id, date, mru_id, dir_id, suffix FROM images WHERE consumer_id IN ({}) ORDER BY consumer_id, date DESC"
+        for chunk in _chunks(_clean_ids(consumer_ids), chunk_size):
+            found = {}
+            for cid, date, mru_id, dir_id, suffix in self._query_chunk(sql, chunk):
+                dir_path = self._dirs.get(dir_id)
+                mru = self._mrus.get(mru_id)
+                if dir_path is None or mru is None:
+                    continue
+                found.setdefault(cid, []).append(
+                    (date_original(date), mru, dir_path, compose_filename(cid, date, mru, suffix)))
+            for cid in chunk:
+                yield cid, found.get(cid, [])
+
+    def iter_counts_many(self, consumer_ids, chunk_size=BATCH_CHUNK):
+        """Yield (consumer_id, count, latest date_original or None, mru or None) per ID."""
+        # SQLite returns the bare columns from the row holding MAX(date).
+        sql = "SELECT consumer_id, COUNT(*), mru_id, dir_id, MAX(date) FROM images WHERE consumer_id IN ({}) GROUP BY consumer_id"
+        for chunk in _chunks(_clean_ids(consumer_ids), chunk_size):
+            found = {r[0]: r for r in self._query_chunk(sql, chunk)}
+            for cid in chunk:
+                r = found.get(cid)
+                if r is None:
+                    yield cid, 0, None, None
+                else:
+                    yield cid, r[1], date_original(r[4]), self._mrus.get(r[2])
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _clean_ids(consumer_ids):
+    seen = set()
+    for raw in consumer_ids:
+        try:
+            cid = int(str(raw).strip())
+        except (TypeError, ValueError):
+            continue
+        if cid not in seen:
+            seen.add(cid)
+            yield cid
+
+
+_lookup = None
+_lookup_lock = threading.Lock()
+
+
+def get_consumer_images(consumer_id, limit=None):
+    """Shared-instance shortcut for ConsumerImageLookup.get_images."""
+    global _lookup
+    with _lookup_lock:
+        if _lookup is None:
+            _lookup = ConsumerImageLookup()
+    return _lookup.get_images(consumer_id, limit=limit)
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import image_loader
+
+
+def _image_bytes(im):
+    return im.size[0] * im.size[1] * len(im.getbands())
+
+
+class ImagePrefetcher:
+    """Decodes images the viewer is likely to open next.
+
+    `prefetch(paths, box)` queues draft decodes (see image_loader.open_image)
+    in the given priority order on a small thread pool. The decoded images
+    are kept in an LRU bounded by their pixel bytes. `take(path)` returns
+    (image, full_size) if the image is ready, or None. `clear()` drops
+    everything, including decodes still queued from earlier prefetch calls.
+    """
+
+    def __init__(self, max_bytes=None, workers=None):
+        self.max_bytes = max_bytes or config.PREFETCH_CACHE_MAX_BYTES
+        self._executor = ThreadPoolExecutor(max_workers=workers or config.PREFETCH_WORKERS,
+                                            thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total = 0
+        self._pending = {}
+        self._generation = 0
+
+    def take(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            self._entries.move_to_end(path)
+            return entry[0], entry[1]
+
+    def prefetch(self, paths, box):
+        paths = list(dict.fromkeys(paths))
+        with self._lock:
+            generation = self._generation
+            wanted = [p for p in paths if p not in self._entries and p not in self._pending]
+            # Anything queued that is no longer wanted would only delay the new neighbours.
+            for p, f in list(self._pending.items()):
+                if p not in paths and f.cancel():
+                    del self._pending[p]
+            for p in wanted:
+                self._pending[p] = self._executor.submit(self._decode, p, box, generation)
+
+    def _decode(self, path, box, generation):
+        try:
+            if self._generation != generation:
+                return
+            im, full_size = image_loader.open_image(path, box=box)
+        except Exception:
+            im = None
+        with self._lock:
+            if self._generation != generation:
+                return
+            self._pending.pop(path, None)
+            if im is None:
+                return
+            nbytes = _image_bytes(im)
+            if nbytes > self.max_bytes:
+                return
+            old = self._entries.pop(path, None)
+            if old:
+                self._total -= old[2]
+            self._entries[path] = (im, full_size, nbytes)
+            self._total += nbytes
+            while self._total > self.max_bytes and self._entries:
+                _, (_, _, n) = self._entries.popitem(last=False)
+                self._total -= n
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            for f in self._pending.values():
+                f.cancel()
+            self._pending.clear()
+            self._entries.clear()
+            self._total = 0
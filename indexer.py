@@ -0,0 +1,448 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import config
+import database
+
+BATCH_SIZE = 5000
+RESULT_QUEUE_SIZE = 256
+
+# Held by whichever code path is writing image rows (full index or watcher).
+_write_lock = threading.Lock()
+
+
+def parse_image_filename(filename):
+    """Split a spot image filename into (consumer_id, date, mru, suffix).
+
+    Filenames follow the DDMMYYYY + 8-char MRU + 9-digit consumer ID layout;
+    consumer_id and date (YYYYMMDD) come back as integers and the suffix is
+    whatever follows the consumer ID. Returns None for anything that does not match.
+    """
+    if len(filename) < 25:
+        return None
+    date_orig = filename[:8]
+    cid = filename[16:25]
+    if not date_orig.isdigit() or not cid.isdigit():
+        return None
+    try:
+        dt = datetime.strptime(date_orig, "%d%m%Y")
+    except ValueError:
+        return None
+    if dt.strftime("%d%m%Y") != date_orig:
+        return None
+    return int(cid), dt.year * 10000 + dt.month * 100 + dt.day, filename[8:16], filename[25:]
+
+
+def is_under(path, roots):
+    for r in roots:
+        if path == r or path.startswith(os.path.join(r, "")):
+            return True
+    return False
+
+
+def _load_known_directories(cursor):
+    """Snapshot of the directories table: path -> (id, mtime, file_count, parent_id)."""
+    cursor.execute("SELECT id, dir_path, mtime, file_count, parent_id FROM directories")
+    known = {}
+    children = defaultdict(list)
+    for dir_id, dir_path, mtime, file_count, parent_id in cursor.fetchall():
+        known[dir_path] = (dir_id, mtime, file_count or 0, parent_id)
+        if parent_id is not None:
+            children[parent_id].append(dir_path)
+    return known, children
+
+
+def _list_directory(path):
+    """Return (files, subdirs) for one directory using a single scandir pass.
+
+    `subdirs` holds (path, mtime) pairs; on Windows the mtime comes from the
+    directory listing itself, so no extra stat is issued.
+    """
+    files = []
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, entry.stat(follow_symlinks=False).st_mtime))
+                else:
+                    files.append(entry.name)
+            except OSError:
+                continue
+    return files, subdirs
+
+
+def _known_subtree(dir_id, known_ids, children):
+    """All known directory ids at and below `dir_id`."""
+    out = []
+    stack = [dir_id]
+    while stack:
+        current = stack.pop()
+        out.append(current)
+        stack.extend(known_ids[p] for p in children.get(current, []) if p in known_ids)
+    return out
+
+
+def scan_directories(roots, known, children, results, workers=None, stop_event=None):
+    """Walk `roots` on a pool of threads and push one result per directory into `results`.
+
+    Every directory is a separate work item, so several roots and the large
+    subdirectories inside one root are listed concurrently. Results are:
+
+        ("same", dir_path, dir_id, image_count)        mtime matches the snapshot
+        ("scan", dir_path, parent_path, mtime, files)  listed again
+        ("keep", dir_ids)                              unreadable, keep existing rows
+
+    A final None is pushed once every directory has been handled. `results`
+    should be a bounded queue so scanning cannot run far ahead of the writer.
+    Setting `stop_event` makes the workers drop the remaining directories.
+    Returns the list of started threads.
+    """
+    workers = max(1, int(workers or config.SCAN_WORKERS))
+    known_ids = {path: row[0] for path, row in known.items()}
+    work = queue.Queue()
+    visited = set()
+    visited_lock = threading.Lock()
+
+    def handle(dir_path, parent_path, mtime):
+        with visited_lock:
+            if dir_path in visited:
+                return
+            visited.add(dir_path)
+
+        row = known.get(dir_path)
+        try:
+            if mtime is None:
+                mtime = os.stat(dir_path).st_mtime
+            parent_id = known_ids.get(parent_path) if parent_path else None
+            if row and row[1] == mtime and row[3] == parent_id:
+                results.put(("same", dir_path, row[0], row[2]))
+                for child in children.get(row[0], []):
+                    work.put((child, dir_path, None))
+                return
+            filenames, subdirs = _list_directory(dir_path)
+        except FileNotFoundError:
+            return
+        except OSError:
+            if row:
+                results.put(("keep", _known_subtree(row[0], known_ids, children)))
+            return
+
+        results.put(("scan", dir_path, parent_path, mtime, filenames))
+        for sub_path, sub_mtime in subdirs:
+            work.put((sub_path, dir_path, sub_mtime))
+
+    def worker():
+        while True:
+            item = work.get()
+            try:
+                if item is None:
+                    return
+                if stop_event is None or not stop_event.is_set():
+                    handle(*item)
+            except Exception as e:
+                print(f"Scan error in {item[0]}: {e}")
+            finally:
+                work.task_done()
+
+    def monitor():
+        work.join()
+        for _ in threads:
+            work.put(None)
+        results.put(None)
+
+    for r in roots:
+        work.put((r, None, None))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    mon = threading.Thread(target=monitor, daemon=True)
+    mon.start()
+    return threads + [mon]
+
+
+def _sync_directory(cursor, dir_path, mtime, parent_id, filenames):
+    """Upsert one directory row and diff its image rows against `filenames`.
+
+    Returns (dir_id, inserted, removed, image_count).
+    """
+    cursor.execute(
+        """
+        INSERT INTO directories (dir_path, mtime, file_count, parent_id) VALUES (?, NULL, 0, ?)
+        ON CONFLICT(dir_path) DO UPDATE SET parent_id = excluded.parent_id
+        """,
+        (dir_path, parent_id)
+    )
+    cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (dir_path,))
+    dir_id = cursor.fetchone()[0]
+
+    cursor.execute("SELECT consumer_id, date, mru_id, suffix FROM images WHERE dir_id = ?", (dir_id,))
+    existing = set(cursor.fetchall())
+
+    parsed = [p for p in map(parse_image_filename, filenames) if p]
+    mru_ids = database.get_mru_ids(cursor, {mru for _, _, mru, _ in parsed})
+    current = {(cid, date, mru_ids[mru], suffix) for cid, date, mru, suffix in parsed}
+
+    new_rows = [(cid, date, mru_id, dir_id, suffix) for cid, date, mru_id, suffix in current - existing]
+    gone = [(dir_id, date, mru_id, cid, suffix) for cid, date, mru_id, suffix in existing - current]
+
+    if new_rows:
+        cursor.executemany(
+            "INSERT OR IGNORE INTO images (consumer_id, date, mru_id, dir_id, suffix) VALUES (?,?,?,?,?)",
+            new_rows
+        )
+    if gone:
+        cursor.executemany(
+            "DELETE FROM images WHERE dir_id = ? AND date = ? AND mru_id = ? AND consumer_id = ? AND suffix = ?",
+            gone
+        )
+
+    # Stamp the mtime last so a crash before commit leaves the directory marked stale.
+    cursor.execute(
+        "UPDATE directories SET mtime = ?, file_count = ? WHERE id = ?",
+        (mtime, len(current), dir_id)
+    )
+    return dir_id, len(new_rows), len(gone), len(current)
+
+
+def _purge_directories(cursor, dir_ids):
+    rows = [(d,) for d in dir_ids]
+    cursor.executemany("DELETE FROM images WHERE dir_id = ?", rows)
+    cursor.executemany("DELETE FROM directories WHERE id = ?", rows)
+
+
+def index_images(folders, progress_callback=None, workers=None):
+    """Bring the images index in line with `folders` without clearing it first.
+
+    Directories whose mtime matches the stored value are not listed again;
+    their known subdirectories are still visited. New files are inserted,
+    vanished files and directories are removed. Roots that are currently
+    unreachable keep their rows so an offline share does not empty the index.
+    Commits happen in batches, so searches keep seeing the previous rows
+    while a refresh is running. Directories are listed by `workers` scanner
+    threads (config.SCAN_WORKERS by default) while this thread applies the
+    results. Returns the total number of indexed images.
+    """
+    with _write_lock:
+        return _index_images_locked(folders, progress_callback, workers)
+
+
+def _index_images_locked(folders, progress_callback, workers):
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL;")
+    cursor.execute("PRAGMA synchronous=NORMAL;")
+
+    scanning = False
+    try:
+        roots = []
+        for folder in folders:
+            if folder and folder not in roots:
+                roots.append(folder)
+
+        known, children = _load_known_directories(cursor)
+        seen_ids = set()
+        offline_roots = [r for r in roots if not os.path.exists(r)]
+        for dir_path, (dir_id, _, _, _) in known.items():
+            if is_under(dir_path, offline_roots):
+                seen_ids.add(dir_id)
+
+        results = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        stop = threading.Event()
+        scan_directories([r for r in roots if r not in offline_roots], known, children, results, workers, stop)
+        scanning = True
+
+        # This thread is the only SQLite writer; scanner threads never touch the DB.
+        dir_ids = {path: row[0] for path, row in known.items()}
+        start_time = time.time()
+        last_report = start_time
+        processed = 0
+        pending = 0
+        changes = 0
+
+        while True:
+            item = results.get()
+            if item is None:
+                scanning = False
+                break
+
+            kind = item[0]
+            if kind == "same":
+                _, dir_path, dir_id, count = item
+                seen_ids.add(dir_id)
+                processed += count
+            elif kind == "keep":
+                seen_ids.update(item[1])
+            else:
+                _, dir_path, parent_path, mtime, filenames = item
+                parent_id = dir_ids.get(parent_path) if parent_path else None
+                dir_id, inserted, removed, count = _sync_directory(cursor, dir_path, mtime, parent_id, filenames)
+                dir_ids[dir_path] = dir_id
+                seen_ids.add(dir_id)
+                processed += count
+                pending += inserted + removed + 1
+                changes += inserted + removed
+
+                if pending >= BATCH_SIZE:
+                    conn.commit()
+                    pending = 0
+
+            now = time.time()
+            if progress_callback and now - last_report >= 1.0:
+                last_report = now
+                progress_callback(processed, int(now - start_time))
+
+        stale = [dir_id for dir_id, _, _, _ in known.values() if dir_id not in seen_ids]
+        if stale:
+            _purge_directories(cursor, stale)
+            changes += len(stale)
+        conn.commit()
+
+        if changes:
+            cursor.execute("ANALYZE;")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+        cursor.execute("SELECT COUNT(*) FROM images")
+        return cursor.fetchone()[0]
+    finally:
+        if scanning:
+            # Unblock the scanner threads if the writer bailed out early.
+            stop.set()
+            while results.get() is not None:
+                pass
+        conn.close()
+
+
+def refresh_directories(dir_paths, roots):
+    """Re-sync a handful of directories in place, e.g. after a watcher event.
+
+    New subdirectories are followed, subdirectories that disappeared are
+    purged. Each directory is committed on its own so the change is visible
+    to searches straight away. Returns the number of image rows added or removed.
+    """
+    with _write_lock:
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        try:
+            changes = 0
+            todo = list(dict.fromkeys(dir_paths))
+            done = set()
+            while todo:
+                dir_path = todo.pop()
+                if dir_path in done or not is_under(dir_path, roots):
+                    continue
+                done.add(dir_path)
+
+                cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (dir_path,))
+                row = cursor.fetchone()
+                try:
+                    mtime = os.stat(dir_path).st_mtime
+                    filenames, subdirs = _list_directory(dir_path)
+                except FileNotFoundError:
+                    if row:
+                        cursor.execute(
+                            "SELECT id FROM directories WHERE dir_path = ? OR dir_path LIKE ? ESCAPE '\\'",
+                            (dir_path, _like_prefix(os.path.join(dir_path, "")))
+                        )
+                        stale = [r[0] for r in cursor.fetchall()]
+                        _purge_directories(cursor, stale)
+                        conn.commit()
+                        changes += len(stale)
+                    continue
+                except OSError:
+                    continue
+
+                parent_id = None
+                if dir_path not in roots:
+                    cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (os.path.dirname(dir_path),))
+                    parent = cursor.fetchone()
+                    if not parent:
+                        # Parent not indexed yet; sync it first, which will come back to us.
+                        todo.append(os.path.dirname(dir_path))
+                        done.discard(dir_path)
+                        continue
+                    parent_id = parent[0]
+
+                dir_id, inserted, removed, _ = _sync_directory(cursor, dir_path, mtime, parent_id, filenames)
+                changes += inserted + removed
+
+                # Vanished children get purged and new ones indexed on later iterations.
+                current_subdirs = {path for path, _ in subdirs}
+                cursor.execute("SELECT dir_path FROM directories WHERE parent_id = ?", (dir_id,))
+                known_children = {r[0] for r in cursor.fetchall()}
+                todo.extend(known_children.symmetric_difference(current_subdirs))
+                conn.commit()
+            return changes
+        finally:
+            conn.close()
+
+
+def _like_prefix(prefix):
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def directory_mtimes(dir_paths):
+    """{path: mtime} for the given directories, None where they cannot be read."""
+    out = {}
+    for p in dir_paths:
+        try:
+            out[p] = os.stat(p).st_mtime
+        except OSError:
+            out[p] = None
+    return out
+
+
+def record_moved_images(images, src_dir, dst_dir, mtimes_before=None):
+    """Point image rows whose files moved from src_dir to dst_dir at dst_dir.
+
+    `images` are (consumer_id, date, mru_id, suffix) keys of rows in src_dir;
+    they are all rewritten in one transaction instead of re-indexing. Pass
+    `mtimes_before` (from directory_mtimes(), taken before the move) only
+    with the last batch of a move: the directory rows for src_dir and
+    dst_dir are then re-stamped if their stored mtime still matches it,
+    meaning nothing but the move changed them. Otherwise they stay stale, so
+    the next index or watcher pass looks at them again.
+    """
+    with _write_lock:
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (os.path.dirname(dst_dir),))
+            parent = cursor.fetchone()
+            cursor.execute(
+                "INSERT INTO directories (dir_path, mtime, file_count, parent_id) VALUES (?, NULL, 0, ?) "
+                "ON CONFLICT(dir_path) DO NOTHING",
+                (dst_dir, parent[0] if parent else None)
+            )
+            cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (dst_dir,))
+            dst_id = cursor.fetchone()[0]
+            cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (src_dir,))
+            src = cursor.fetchone()
+
+            # OR REPLACE: a copy of the same image already indexed in dst_dir is the same file now.
+            if src:
+                cursor.executemany(
+                    "UPDATE OR REPLACE images SET dir_id = ? "
+                    "WHERE consumer_id = ? AND date = ? AND dir_id = ? AND mru_id = ? AND suffix = ?",
+                    ((dst_id, cid, date, src[0], mru_id, suffix) for cid, date, mru_id, suffix in images)
+                )
+
+            now = directory_mtimes([src_dir, dst_dir]) if mtimes_before is not None else {}
+            for dir_path in now:
+                cursor.execute("SELECT id, mtime FROM directories WHERE dir_path = ?", (dir_path,))
+                row = cursor.fetchone()
+                if not row or row[1] is None or row[1] != mtimes_before.get(dir_path) or now[dir_path] is None:
+                    continue
+                cursor.execute(
+                    "UPDATE directories SET mtime = ?, file_count = (SELECT COUNT(*) FROM images WHERE dir_id = ?) WHERE id = ?",
+                    (now[dir_path], row[0], row[0])
+                )
+            conn.commit()
+            return dst_id
+        finally:
+            conn.close()
@@ -2,14 +2,15 @@ import os
 import json
 import threading
 import openpyxl
-import csv
 import tkinter as tk
 from tkinter import messagebox, filedialog, Listbox, ttk, END, LEFT, RIGHT, TOP, BOTTOM, BOTH, X, Y, HORIZONTAL
 import ttkbootstrap as tb
-from PIL import Image, ImageTk
+from PIL import ImageTk
 
 import config
-from database import get_db_connection
+from image_lookup import get_consumer_images
+from preview_loader import PreviewLoader
+import table_export
 
 class LowConsumptionVerifier(tk.Toplevel):
     def __init__(self, parent):
@@ -23,6 +24,8 @@ class LowConsumptionVerifier(tk.Toplevel):
         self.current_index = -1
         self.current_cid = None
         self.date_to_widget = {} 
+        self.loader = PreviewLoader(self)
+        self._load_seq = 0
         self.session_file = os.path.join(config.BASE_DIR, "verification_session.json")
         
         # Layout
@@ -278,31 +281,23 @@ class LowConsumptionVerifier(tk.Toplevel):
         self.load_consumer_data(item['cid'])
 
     def load_consumer_data(self, cid):
+        self.loader.cancel()
+        self._load_seq += 1
+        seq = self._load_seq
         self.lb_dates.delete(0, END)
         for w in self.scroll_frame.winfo_children(): w.destroy()
         self.date_to_widget = {}
         
         def worker():
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT d.dir_path, i.filename
-                FROM images i
-                JOIN directories d ON i.dir_id = d.id
-                WHERE i.consumer_id = ?
-                ORDER BY i.date_iso DESC
-                LIMIT 24
-            """, (cid,))
-            rows = cur.fetchall()
-            conn.close()
+            rows = get_consumer_images(cid, limit=24)
 
             processed_rows = []
-            for dir_path, filename in rows:
+            for date_orig, _, dir_path, filename in rows:
                 full_path = os.path.join(dir_path, filename)
-                date_orig = filename[:8]
                 processed_rows.append((date_orig, full_path))
 
-            self.after(0, lambda: self.populate_ui(processed_rows))
+            # A newer selection may have started while this one was querying.
+            self.after(0, lambda: self.populate_ui(processed_rows) if seq == self._load_seq else None)
             
         threading.Thread(target=worker, daemon=True).start()
 
@@ -314,30 +309,37 @@ class LowConsumptionVerifier(tk.Toplevel):
 
         COLUMNS = 4
         self.photo_refs = [] 
+        items = []
         
         for i, (date, path) in enumerate(rows):
             pretty = f"{date[:2]}-{date[2:4]}-{date[4:]}"
             self.lb_dates.insert(END, pretty)
             
-            if not os.path.exists(path): continue
-            
             try:
                 f = tk.Frame(self.scroll_frame, bg="white", bd=2, relief="flat")
                 f.grid(row=i//COLUMNS, column=i%COLUMNS, padx=8, pady=8)
                 self.date_to_widget[pretty] = f
                 
-                im = Image.open(path)
-                im.thumbnail((180, 180)) 
-                ph = ImageTk.PhotoImage(im)
-                self.photo_refs.append(ph)
-                
-                lbl_img = tk.Label(f, image=ph, bg="white")
+                lbl_img = tk.Label(f, text="Loading...", fg="#adb5bd", bg="white", width=22, height=10)
                 lbl_img.pack(padx=2, pady=2)
+                items.append((lbl_img, path))
                 
                 lbl_txt = tk.Label(f, text=pretty, bg="white", font=("Arial", 9, "bold"))
                 lbl_txt.pack()
             except: pass
 
+        self.loader.load(items, self._show_thumbnail)
+
+    def _show_thumbnail(self, lbl_img, im):
+        if not lbl_img.winfo_exists():
+            return
+        if im is None:
+            lbl_img.config(text="Unavailable")
+            return
+        ph = ImageTk.PhotoImage(im)
+        self.photo_refs.append(ph)
+        lbl_img.config(image=ph, text="", width=0, height=0)
+
     def on_date_click(self, event):
         sel = self.lb_dates.curselection()
         if not sel: return
@@ -390,15 +392,19 @@ class LowConsumptionVerifier(tk.Toplevel):
             messagebox.showwarning("No Data", "There is no data to export.")
             return
 
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV files", "*.csv"), ("Excel Workbook", "*.xlsx")])
         if not path:
             return
-            
-        try:
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=self.data[0].keys())
-                writer.writeheader()
-                writer.writerows(self.data)
-            messagebox.showinfo("Saved", "Report Exported Successfully.")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export CSV.\n{e}")
\ No newline at end of file
+
+        rows = list(self.data)
+        headers = list(rows[0].keys())
+
+        def worker():
+            try:
+                table_export.write_table(path, headers, rows, title="LowConsumption")
+                self.after(0, lambda: messagebox.showinfo("Saved", "Report Exported Successfully.", parent=self))
+            except Exception as e:
+                self.after(0, lambda e=e: messagebox.showerror("Export Error", f"Failed to export report.\n{e}", parent=self))
+
+        threading.Thread(target=worker, daemon=True).start()
\ No newline at end of file
@@ -1,4 +1,8 @@
-from main_gui import run_app
+import multiprocessing
 
 if __name__ == "__main__":
-    run_app()   
\ No newline at end of file
+    # Fuzzy lookup runs on a process pool. Its workers re-import this module, so
+    # the GUI is only imported here, after freeze_support() (needed by frozen builds).
+    multiprocessing.freeze_support()
+    from main_gui import run_app
+    run_app()
@@ -4,27 +4,18 @@ from tariff_editor import TariffEditor
 
 
 import os
-import shutil
 import threading
 import time
-import csv
 import json
 import subprocess
 import sys
 import webbrowser
 import ctypes
 import re
-from collections import defaultdict
-from difflib import SequenceMatcher
 from datetime import datetime
 import openpyxl
 from PIL import Image, ImageTk, ImageDraw
 
-try:
-    from rapidfuzz import fuzz as rapidfuzz_fuzz
-except Exception:
-    rapidfuzz_fuzz = None
-
 import tkinter as tk
 from tkinter import messagebox, filedialog, Menu, Toplevel, Listbox, ttk
 from tkinter import CENTER, NE, NW, SW, SE, TOP, BOTTOM, LEFT, RIGHT, BOTH, X, Y, END
@@ -33,6 +24,18 @@ import ttkbootstrap as tb
 import config
 import database
 import utils
+import indexer
+import image_loader
+import zoom_renderer
+import image_prefetch
+import file_transfer
+import typeahead
+import consumer_import
+import fuzzy_batch
+import table_export
+import image_lookup
+import preview_loader
+import watcher
 from low_consumption import LowConsumptionVerifier
 import documentation
 
@@ -40,6 +43,10 @@ import documentation
 img_tk = None
 img = None
 img_original = None
+img_path = None
+img_full_size = None
+zoom_view = None
+refine_job = None
 zoom_scale = 1.0
 pan_x = 0
 pan_y = 0
@@ -47,12 +54,15 @@ drag_start_x = 0
 drag_start_y = 0
 additional_folders = utils.load_additional_folders()
 indexing_active = False
+folder_watcher = None
 current_search_data = {}  
 preview_references = [] 
 preview_canvas_widgets = []
+image_prefetcher = image_prefetch.ImagePrefetcher()
 
 LIGHT_THEME = "cosmo"
 DARK_THEME = "darkly"
+REFINE_DELAY_MS = 150
 
 
 def set_windows_app_id():
@@ -267,80 +277,16 @@ def remove_network_folder():
 def index_images_thread(progress_callback, finish_callback):
     global indexing_active
     indexing_active = True
-    
-    try:
-        conn = database.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL;")
-        cursor.execute("PRAGMA synchronous=OFF;")
+    total = 0
 
+    try:
         folders = [config.IMAGE_FOLDER] + additional_folders
-        batch_data = []
-        BATCH_SIZE = 5000 
-        total_inserted = 0
-
-        cursor.execute("DELETE FROM images")
-        cursor.execute("DELETE FROM directories") # Also clear directories
-        conn.commit()
-        
-        start_time = time.time()
-
-        for folder in folders:
-            if not os.path.exists(folder):
-                continue
-            
-            for root_dir, dirs, files in os.walk(folder):
-                # Get the directory ID for the current root_dir
-                cursor.execute("INSERT OR IGNORE INTO directories (dir_path) VALUES (?)", (root_dir,))
-                cursor.execute("SELECT id FROM directories WHERE dir_path = ?", (root_dir,))
-                dir_id = cursor.fetchone()[0]
-
-                for filename in files:
-                    try:
-                        if len(filename) < 20: continue
-                        if not filename[:8].isdigit(): continue
-                        
-                        date_orig = filename[:8]
-                        try:
-                            dt = datetime.strptime(date_orig, "%d%m%Y")
-                            date_iso = dt.strftime("%Y-%m-%d")
-                        except:
-                            continue 
-
-                        mru = filename[8:16]
-                        cid = filename[16:25]
-
-                        batch_data.append((cid, date_orig, date_iso, mru, filename, dir_id))
-
-                        if len(batch_data) >= BATCH_SIZE:
-                            cursor.executemany("INSERT OR IGNORE INTO images (consumer_id, date_original, date_iso, mru, filename, dir_id) VALUES (?,?,?,?,?,?)", batch_data)
-                            conn.commit()
-                            total_inserted += len(batch_data)
-                            batch_data = []
-                            elapsed = int(time.time() - start_time)
-                            progress_callback(total_inserted, elapsed)
-                            
-                    except Exception:
-                        continue
-
-        if batch_data:
-            cursor.executemany("INSERT OR IGNORE INTO images (consumer_id, date_original, date_iso, mru, filename, dir_id) VALUES (?,?,?,?,?,?)", batch_data)
-            conn.commit()
-            total_inserted += len(batch_data)
-        
-        cursor.execute("ANALYZE;") 
-        
-        # Optimize and compress database
-        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
-        cursor.execute("VACUUM;")
-        
-        conn.close()
-
+        total = indexer.index_images(folders, progress_callback)
     except Exception as e:
         print(f"Indexing error: {e}")
     finally:
         indexing_active = False
-        finish_callback(total_inserted)
+        finish_callback(total)
 
 def add_new_note_option():
     def save_opt():
@@ -367,14 +313,13 @@ def add_new_note_option():
 
 def export_notes_csv():
     try:
-        notes = utils.load_all_notes()
-        if not notes:
+        if not database.has_notes():
             messagebox.showinfo("Info", "No notes to export.")
             return
 
         path = filedialog.asksaveasfilename(
             defaultextension=".csv", 
-            filetypes=[("CSV", "*.csv")],
+            filetypes=[("CSV", "*.csv"), ("Excel Workbook", "*.xlsx")],
             title="Export Notes"
         )
         if not path:
@@ -383,25 +328,28 @@ def export_notes_csv():
         prog = Toplevel()
         prog.title("Exporting Notes")
         prog.geometry("350x100")
-        tb.Label(prog, text="Exporting notes, please wait...").pack(padx=20, pady=10)
+        lbl = tb.Label(prog, text="Exporting notes, please wait...")
+        lbl.pack(padx=20, pady=10)
         prog.update()
 
-        def worker(export_path, data):
+        def on_progress(n):
+            root.after(0, lambda: lbl.winfo_exists() and lbl.config(text=f"Exporting notes... {n} written"))
+
+        def worker(export_path):
             try:
-                with open(export_path, "w", newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["Consumer ID", "Note", "Remarks"])
-                    for cid, d in data.items():
-                        writer.writerow([cid, d.get('note',''), d.get('remarks','')])
+                table_export.write_table(
+                    export_path, ["Consumer ID", "Note", "Remarks"], utils.iter_notes(),
+                    widths=[18, 30, 50], title="Notes", progress=on_progress
+                )
                 root.after(0, lambda: messagebox.showinfo("Success", f"Exported to {export_path}"))
             except Exception as e:
-                root.after(0, lambda: messagebox.showerror("Error", f"Export failed: {e}"))
+                root.after(0, lambda e=e: messagebox.showerror("Error", f"Export failed: {e}"))
             finally:
                 try:
                     root.after(0, prog.destroy)
                 except: pass
 
-        threading.Thread(target=worker, args=(path, notes), daemon=True).start()
+        threading.Thread(target=worker, args=(path,), daemon=True).start()
 
     except Exception as e:
         messagebox.showerror("Error", f"Export failed: {e}")
@@ -430,70 +378,133 @@ def perform_backup():
     date_entry.pack(padx=10)
     tb.Button(top, text="Start Backup", command=on_date_select).pack(pady=10)
 
-def run_backup_thread(iso_date_limit, target_folder):
-    prog_win = Toplevel()
-    prog_win.title("Backing Up")
-    prog_win.geometry("400x150")
-    lbl = tb.Label(prog_win, text="Querying database...")
+def _open_transfer_window(title, text):
+    """Progress window with a Cancel button; returns (window, label, bar, cancel_event)."""
+    win = Toplevel()
+    win.title(title)
+    win.geometry("420x170")
+    lbl = tb.Label(win, text=text)
     lbl.pack(padx=20, pady=10)
-    pb = ttk.Progressbar(prog_win, length=300, mode="determinate")
-    pb.pack(padx=20, pady=10)
+    pb = ttk.Progressbar(win, length=340, mode="determinate")
+    pb.pack(padx=20, pady=5)
+    cancel = threading.Event()
+
+    def on_cancel():
+        cancel.set()
+        btn.config(state="disabled", text="Cancelling...")
+
+    btn = tb.Button(win, text="Cancel", bootstyle="secondary", command=on_cancel)
+    btn.pack(pady=8)
+    win.protocol("WM_DELETE_WINDOW", on_cancel)
+    return win, lbl, pb, cancel
+
+def _transfer_progress(lbl, pb, verb):
+    def report(stats):
+        text = f"{verb} {stats.summary()}"
+        root.after(0, lambda: (lbl.config(text=text), pb.config(value=stats.done)))
+    return report
+
+def run_backup_thread(iso_date_limit, target_folder):
+    prog_win, lbl, pb, cancel = _open_transfer_window("Backing Up", "Querying database...")
     
     def worker():
         try:
+            limit = int(iso_date_limit.replace("-", ""))
             conn = database.get_db_connection()
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT d.dir_path, i.filename 
+            # Only files in the main image folder are moved; other shares stay put.
+            total = cursor.execute("""
+                SELECT COUNT(*)
                 FROM images i
                 JOIN directories d ON i.dir_id = d.id
-                WHERE i.date_iso <= ?
-            """, (iso_date_limit,))
-            rows = cursor.fetchall()
-            conn.close()
+                WHERE i.date <= ? AND d.dir_path = ?
+            """, (limit, config.IMAGE_FOLDER)).fetchone()[0]
             
-            total = len(rows)
             if total == 0:
+                conn.close()
                 root.after(0, lambda: messagebox.showinfo("Info", "No images found up to that date."))
                 root.after(0, prog_win.destroy)
                 return
 
             root.after(0, lambda: lbl.config(text=f"Moving {total} images..."))
             root.after(0, lambda: pb.config(maximum=total))
+
+            cursor.execute("""
+                SELECT i.consumer_id, i.date, i.mru_id, m.mru, i.suffix
+                FROM images i
+                JOIN directories d ON i.dir_id = d.id
+                JOIN mrus m ON i.mru_id = m.id
+                WHERE i.date <= ? AND d.dir_path = ?
+            """, (limit, config.IMAGE_FOLDER))
+
+            # Row keys in flight by source path; moved ones are re-pointed at
+            # the target in batches as they land, so a cancelled or crashed
+            # backup leaves the index matching the files already moved.
+            in_flight = {}
+            moved_images = []
+            flushed = {"rows": 0, "at": time.time()}
+
+            def flush(final=False):
+                # The last call re-stamps the folders, even with nothing left to re-point.
+                if moved_images or (final and flushed["rows"]):
+                    indexer.record_moved_images(moved_images, config.IMAGE_FOLDER, target_folder,
+                                                mtimes_before if final else None)
+                    flushed["rows"] += len(moved_images)
+                    del moved_images[:]
+                flushed["at"] = time.time()
+
+            def pairs():
+                for cid, date, mru_id, mru, suffix in cursor:
+                    filename = database.compose_filename(cid, date, mru, suffix)
+                    src = os.path.join(config.IMAGE_FOLDER, filename)
+                    in_flight[src] = (cid, date, mru_id, suffix)
+                    yield src, os.path.join(target_folder, filename)
+
+            def on_result(src, dst, status):
+                key = in_flight.pop(src)
+                if status in (file_transfer.MOVED, file_transfer.SKIPPED):
+                    moved_images.append(key)
+                if (len(moved_images) >= config.BACKUP_INDEX_BATCH
+                        or time.time() - flushed["at"] >= config.BACKUP_INDEX_SECONDS):
+                    flush()
+
+            os.makedirs(target_folder, exist_ok=True)
+            mtimes_before = indexer.directory_mtimes([config.IMAGE_FOLDER, target_folder])
+            try:
+                stats = file_transfer.transfer_files(
+                    pairs(), move=True, total=total, cancel=cancel,
+                    progress=_transfer_progress(lbl, pb, "Moving"), on_result=on_result
+                )
+            finally:
+                conn.close()
+                flush(final=True)
             
-            count = 0
-            moved = 0
-            
-            for dir_path, filename in rows:
-                if dir_path == config.IMAGE_FOLDER:
-                    try:
-                        full_path = os.path.join(dir_path, filename)
-                        if os.path.exists(full_path):
-                            dst = os.path.join(target_folder, filename)
-                            shutil.move(full_path, dst)
-                            moved += 1
-                    except: pass
-                count += 1
-                if count % 100 == 0:
-                    root.after(0, lambda c=count: pb.config(value=c))
-            
+            moved = stats.counts[file_transfer.MOVED] + stats.counts[file_transfer.SKIPPED]
+            failed = stats.counts[file_transfer.FAILED]
+            msg = f"Moved {moved} images."
+            if failed:
+                msg += f"\n{failed} could not be moved."
             root.after(0, prog_win.destroy)
-            root.after(0, lambda: messagebox.showinfo("Backup Complete", f"Moved {moved} images."))
+            if stats.cancelled:
+                root.after(0, lambda: messagebox.showinfo("Backup Cancelled", msg + "\nRun the backup again to resume."))
+                return
+            root.after(0, lambda: messagebox.showinfo("Backup Complete", msg))
             root.after(0, lambda: ask_add_backup(target_folder))
         except Exception as e:
-             root.after(0, lambda: messagebox.showerror("Backup Error", str(e)))
+             root.after(0, lambda e=e: messagebox.showerror("Backup Error", str(e)))
              try: root.after(0, prog_win.destroy)
              except: pass
 
     threading.Thread(target=worker, daemon=True).start()
 
 def ask_add_backup(target_folder):
-    if messagebox.askyesno("Update Index", "Do you want to add this backup folder to the network list and re-index?"):
-        if target_folder not in additional_folders:
-            additional_folders.append(target_folder)
-            utils.save_additional_folders(additional_folders)
-            update_folder_list_ui()
-        start_indexing_process()
+    # The moved rows already point at target_folder, so no re-index is needed.
+    if target_folder in additional_folders:
+        return
+    if messagebox.askyesno("Update Index", "Do you want to add this backup folder to the network list so its images stay searchable?"):
+        additional_folders.append(target_folder)
+        utils.save_additional_folders(additional_folders)
+        update_folder_list_ui()
 
 def start_indexing_process():
     if indexing_active: return
@@ -517,6 +528,24 @@ def finish_indexing(total):
     btn_reload.config(state="normal")
     messagebox.showinfo("Done", f"Indexing Complete.\nTotal Images: {total}")
 
+def _on_watch_change(changes):
+    cnt = database.get_total_image_count()
+    root.after(0, lambda: status_label.config(text=f"Total Indexed Images: {cnt}"))
+
+def sync_folder_watcher():
+    """Start, restart or stop the live folder watcher to match the menu toggle."""
+    global folder_watcher
+    if folder_watcher:
+        folder_watcher.stop()
+        folder_watcher = None
+    if watch_var.get():
+        folder_watcher = watcher.IndexWatcher([config.IMAGE_FOLDER] + additional_folders, on_change=_on_watch_change)
+        folder_watcher.start()
+
+def toggle_folder_watch():
+    database.set_info_value("watch_folders", bool(watch_var.get()))
+    sync_folder_watcher()
+
 
 def _safe_text(value):
     if value is None:
@@ -634,17 +663,7 @@ def search_consumer():
     hide_buttons() 
     
     try:
-        conn = database.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT i.date_original, i.mru, d.dir_path, i.filename 
-            FROM images i 
-            JOIN directories d ON i.dir_id = d.id 
-            WHERE i.consumer_id = ? 
-            ORDER BY i.date_iso DESC
-        """, (cid,))
-        rows = cur.fetchall()
-        conn.close()
+        rows = image_lookup.get_consumer_images(cid)
         
         if not rows:
             label_consumer_details.config(text=f"Consumer ID: {cid}\nNo images found.", bootstyle="danger")
@@ -656,6 +675,7 @@ def search_consumer():
         
         global current_search_data
         current_search_data = {}
+        image_prefetcher.clear()
         dates_ordered = []
         
         for date, _, dir_path, filename in rows:
@@ -678,6 +698,8 @@ def search_consumer():
             listbox_dates.insert(tk.END, pretty)
             
         show_dynamic_previews(dates_ordered)
+        # Users usually open the latest few dates first.
+        _prefetch_dates(range(config.PREFETCH_NEIGHBOURS + 1))
         load_consumer_note(cid)
         utils.save_search_history("consumer_ids", cid)
 
@@ -686,37 +708,48 @@ def search_consumer():
 
 def clear_previews():
     global preview_canvas_widgets
+    previews_loader.cancel()
     for widget in scrollable_frame.winfo_children():
         widget.destroy()
     global preview_references
     preview_references = []
     preview_canvas_widgets = []
 
+def _draw_preview(pc, im):
+    if not pc.winfo_exists():
+        return
+    pc.delete("placeholder")
+    if im is None:
+        pc.create_text(90, 90, text="Unavailable", fill="#adb5bd")
+        return
+    ph = ImageTk.PhotoImage(im)
+    preview_references.append(ph)
+    pc.create_image(90, 90, image=ph)
+
 def show_dynamic_previews(dates):
     preview_bg = "#2c3136" if is_dark_mode_active() else "#f0f0f0"
     clear_previews()
+    items = []
     for i, date in enumerate(dates):
         path = current_search_data[date][0]
-        if os.path.exists(path):
-            try:
-                im = Image.open(path)
-                im.thumbnail((180, 180)) 
-                ph = ImageTk.PhotoImage(im)
-                preview_references.append(ph)
-                
-                cols = 4 
-                pf = tb.Labelframe(scrollable_frame, text=f"{date[:2]}-{date[2:4]}-{date[4:]}", padding=5, bootstyle="info")
-                pf.grid(row=i//cols, column=i%cols, padx=10, pady=10, sticky="nsew")
-                
-                pc = tk.Canvas(pf, width=180, height=180, bg=preview_bg, highlightthickness=0)
-                pc.pack()
-                pc.create_image(90, 90, image=ph)
-                preview_canvas_widgets.append(pc)
-                
-                def mk_click(p): return lambda e: load_image_to_canvas(p)
-                pc.bind("<Button-1>", mk_click(path))
-                pf.bind("<Button-1>", mk_click(path)) 
-            except: pass
+        try:
+            cols = 4 
+            pf = tb.Labelframe(scrollable_frame, text=f"{date[:2]}-{date[2:4]}-{date[4:]}", padding=5, bootstyle="info")
+            pf.grid(row=i//cols, column=i%cols, padx=10, pady=10, sticky="nsew")
+            
+            pc = tk.Canvas(pf, width=180, height=180, bg=preview_bg, highlightthickness=0)
+            pc.pack()
+            pc.create_text(90, 90, text="Loading...", fill="#adb5bd", tags="placeholder")
+            preview_canvas_widgets.append(pc)
+            
+            def mk_click(p): return lambda e: load_image_to_canvas(p)
+            pc.bind("<Button-1>", mk_click(path))
+            pf.bind("<Button-1>", mk_click(path)) 
+            items.append((pc, path))
+        except: pass
+
+    # Thumbnails are decoded off the UI thread and drawn in date order as they arrive.
+    previews_loader.load(items, _draw_preview)
 
 def on_date_select(event):
     idx = listbox_dates.curselection()
@@ -725,22 +758,44 @@ def on_date_select(event):
     raw = txt.replace("-", "") 
     
     if raw in current_search_data:
-        paths = current_search_data[raw]
-        best_path = paths[0]
-        for p in paths:
-            if config.IMAGE_FOLDER in p:
-                best_path = p
-                break
-        load_image_to_canvas(best_path)
+        load_image_to_canvas(_best_path(current_search_data[raw]))
+        n = config.PREFETCH_NEIGHBOURS
+        # Nearest neighbours first, alternating newer and older.
+        _prefetch_dates(i for k in range(1, n + 1) for i in (idx[0] + k, idx[0] - k))
+
+def _best_path(paths):
+    for p in paths:
+        if config.IMAGE_FOLDER in p:
+            return p
+    return paths[0]
+
+def _prefetch_dates(indices):
+    """Queue background decodes for the listbox_dates rows at `indices`."""
+    size = listbox_dates.size()
+    paths = []
+    for i in indices:
+        if 0 <= i < size:
+            raw = listbox_dates.get(i).replace("-", "")
+            if raw in current_search_data:
+                paths.append(_best_path(current_search_data[raw]))
+    if paths:
+        image_prefetcher.prefetch(paths, _canvas_size())
 
 def load_image_to_canvas(path):
     raise_canvas_pane()
-    global img_original, zoom_scale, img, img_tk, pan_x, pan_y
-    if not os.path.exists(path):
+    global img_original, img_path, img_full_size, zoom_view, zoom_scale, img, img_tk, pan_x, pan_y
+    cached = image_prefetcher.take(path)
+    if cached is None and not os.path.exists(path):
         messagebox.showerror("Error", "Image file not accessible (Offline?)")
         return
     try:
-        img_original = Image.open(path)
+        # Decode at (roughly) canvas size; the renderer asks for more if zoomed in.
+        if cached is not None:
+            img_original, img_full_size = cached
+        else:
+            img_original, img_full_size = image_loader.open_image(path, box=_canvas_size())
+        img_path = path
+        zoom_view = zoom_renderer.ZoomRenderer(img_original, img_full_size, path)
         zoom_scale = 1.0
         pan_x = 0
         pan_y = 0
@@ -757,34 +812,53 @@ def raise_canvas_pane():
     canvas_container.tkraise()
     btn_show_previews.pack(side=TOP, anchor=NE, padx=5, pady=2) 
 
-def render_image():
-    global img, img_tk, pan_x, pan_y
-    if not img_original: return
-    
+def _canvas_size():
     cw = canvas.winfo_width()
     ch = canvas.winfo_height()
     if cw < 50: cw = 800
     if ch < 50: ch = 600
+    return cw, ch
+
+def render_image(fast=False):
+    """Draw the visible part of the image; `fast` is for use while input is moving."""
+    global img, img_tk, pan_x, pan_y, refine_job
+    if not zoom_view: return
+    
+    cw, ch = _canvas_size()
     
-    w, h = img_original.size
+    # Scale is in terms of the full-resolution file, whatever was decoded.
+    w, h = img_full_size
     
     if zoom_scale == 1.0:
-        ratio = min(cw/w, ch/h)
-        nw, nh = int(w*ratio), int(h*ratio)
+        scale = min(cw/w, ch/h)
         pan_x = 0
         pan_y = 0
     else:
-        nw, nh = int(w*zoom_scale), int(h*zoom_scale)
-        
-    img = img_original.resize((nw, nh), Image.Resampling.LANCZOS)
-    img_tk = ImageTk.PhotoImage(img)
+        scale = zoom_scale
+
+    if refine_job:
+        root.after_cancel(refine_job)
+        refine_job = None
+
+    img, pos = zoom_view.render((cw, ch), scale, ((cw//2) + pan_x, (ch//2) + pan_y), fast=fast)
     canvas.delete("all")
-    canvas.create_image((cw//2) + pan_x, (ch//2) + pan_y, anchor=CENTER, image=img_tk)
+    if img is not None:
+        img_tk = ImageTk.PhotoImage(img)
+        canvas.create_image(pos[0], pos[1], anchor=NW, image=img_tk)
+
+    if fast:
+        # Redraw with LANCZOS once zoom/pan input has been idle for a moment.
+        refine_job = root.after(REFINE_DELAY_MS, _refine_image)
+
+def _refine_image():
+    global refine_job
+    refine_job = None
+    render_image()
 
 def zoom(factor):
     global zoom_scale
     zoom_scale *= factor
-    render_image()
+    render_image(fast=True)
 
 def start_pan(event):
     global drag_start_x, drag_start_y
@@ -802,7 +876,7 @@ def do_pan(event):
     pan_y += dy
     drag_start_x = event.x
     drag_start_y = event.y
-    canvas.move("all", dx, dy)
+    render_image(fast=True)
 
 def end_pan(event):
     if zoom_scale == 1.0: return
@@ -825,7 +899,8 @@ def print_image():
     if not img_original: return
     try:
         tmp = "temp_print.png"
-        img_original.save(tmp)
+        with Image.open(img_path) as full:
+            full.save(tmp)
         os.startfile(tmp, "print")
     except Exception as e:
         messagebox.showerror("Error", str(e))
@@ -833,7 +908,7 @@ def print_image():
 def save_image():
     if not img_original: return
     
-    original_filename = os.path.basename(img_original.filename)
+    original_filename = os.path.basename(img_path)
     
     path = filedialog.asksaveasfilename(
         initialfile=original_filename,
@@ -842,8 +917,9 @@ def save_image():
     )
     if not path: return
 
+    # The canvas copy may be a reduced draft decode; save from the full file.
     try:
-        img_copy = img_original.copy()
+        img_copy = Image.open(img_path)
     except:
         img_copy = img_original
 
@@ -858,7 +934,7 @@ def save_image():
             im.save(out_path)
             root.after(0, lambda: messagebox.showinfo("Saved", "Image Saved."))
         except Exception as e:
-            root.after(0, lambda: messagebox.showerror("Error", f"Save failed: {e}"))
+            root.after(0, lambda e=e: messagebox.showerror("Error", f"Save failed: {e}"))
         finally:
             try:
                 root.after(0, prog.destroy)
@@ -877,39 +953,29 @@ def save_all_images():
     target_dir = os.path.join(dest, cid)
     os.makedirs(target_dir, exist_ok=True)
     
-    prog = Toplevel()
-    prog.title("Saving Images")
-    prog.geometry("360x110")
-    lbl = tb.Label(prog, text="Saving images, please wait...")
-    lbl.pack(padx=20, pady=10)
-    pbar = ttk.Progressbar(prog, length=300, mode="indeterminate")
-    pbar.pack(padx=10, pady=5)
-    pbar.start(10)
-    prog.update()
+    paths = [p for date_paths in current_search_data.values() for p in date_paths]
+    prog, lbl, pb, cancel = _open_transfer_window("Saving Images", "Saving images, please wait...")
+    pb.config(maximum=len(paths))
     
-    def worker(data, out_dir):
-        count = 0
+    def worker(paths, out_dir):
         try:
-            for date, paths in data.items():
-                for p in paths:
-                    if os.path.exists(p):
-                        original_filename = os.path.basename(p)
-                        try:
-                            shutil.copy2(p, os.path.join(out_dir, original_filename))
-                            count += 1
-                        except Exception as copy_e:
-                            print(f"Could not copy {p}: {copy_e}")
-            root.after(0, lambda: messagebox.showinfo("Success", f"Saved {count} images to {out_dir}"))
+            stats = file_transfer.transfer_files(
+                ((p, os.path.join(out_dir, os.path.basename(p))) for p in paths),
+                total=len(paths), cancel=cancel,
+                progress=_transfer_progress(lbl, pb, "Saving")
+            )
+            count = stats.counts[file_transfer.COPIED] + stats.counts[file_transfer.SKIPPED]
+            verb = "Cancelled after saving" if stats.cancelled else "Saved"
+            root.after(0, lambda: messagebox.showinfo("Success", f"{verb} {count} images to {out_dir}"))
         except Exception as e:
-            root.after(0, lambda: messagebox.showerror("Error", f"Save all failed: {e}"))
+            root.after(0, lambda e=e: messagebox.showerror("Error", f"Save all failed: {e}"))
         finally:
             try:
-                root.after(0, pbar.stop)
                 root.after(0, prog.destroy)
             except:
                 pass
 
-    threading.Thread(target=worker, args=(current_search_data, target_dir), daemon=True).start()
+    threading.Thread(target=worker, args=(paths, target_dir), daemon=True).start()
 
 def toggle_notes():
     if notes_pane.winfo_ismapped():
@@ -973,6 +1039,7 @@ def update_folder_list_ui():
     for f in additional_folders:
         folder_listbox.insert(tk.END, f)
     run_single_check()
+    sync_folder_watcher()
 
 def run_single_check():
     threading.Thread(target=_check_paths_thread, daemon=True).start()
@@ -1004,7 +1071,9 @@ def update_meter_search_state():
         meter_button.config(state="normal", bootstyle="primary")
         entry_name.config(state="normal")
         entry_mobile.config(state="normal")
+        entry_address.config(state="normal")
         btn_search_name.config(state="normal", bootstyle="primary")
+        btn_search_address.config(state="normal", bootstyle="primary")
         btn_search_mobile.config(state="normal", bootstyle="primary")
         lbl_consumer_hint.grid_remove()
         try:
@@ -1016,7 +1085,9 @@ def update_meter_search_state():
         meter_button.config(state="disabled", bootstyle="secondary")
         entry_name.config(state="disabled")
         entry_mobile.config(state="disabled")
+        entry_address.config(state="disabled")
         btn_search_name.config(state="disabled", bootstyle="secondary")
+        btn_search_address.config(state="disabled", bootstyle="secondary")
         btn_search_mobile.config(state="disabled", bootstyle="secondary")
         lbl_consumer_hint.grid()
         try:
@@ -1062,6 +1133,8 @@ def show_history(event, key, widget):
                     search_meter()
                 elif key == "consumer_names":
                     search_name()
+                elif key == "consumer_addresses":
+                    search_address()
                 else:
                     search_mobile()
                 
@@ -1070,6 +1143,58 @@ def show_history(event, key, widget):
         lb.focus_set()
     except: pass
 
+def _typeahead_colors():
+    dark = is_dark_mode_active()
+    return {
+        "bg": "#2c3136" if dark else "#ffffff",
+        "fg": "#f8f9fa" if dark else "#212529",
+        "selectbackground": "#4c6ef5" if dark else "#0d6efd",
+        "selectforeground": "#ffffff",
+    }
+
+def _set_entry_and_run(entry, search_fn):
+    def pick(value):
+        entry.delete(0, tk.END)
+        entry.insert(0, value)
+        search_fn()
+    return pick
+
+def _profile_suggestions(rows):
+    return [(f"{r.get('name') or ''}  \u2014  {r.get('address') or ''}  ({r['consumer_id']})", r["consumer_id"]) for r in rows]
+
+def setup_typeahead():
+    """Attach live suggestion dropdowns to the search entries."""
+    typeahead.Typeahead(
+        entry_consumer_id,
+        lambda t: [(f"{cid}  {name}".rstrip(), cid) for cid, name in database.suggest_consumer_ids(t)],
+        _set_entry_and_run(entry_consumer_id, search_consumer),
+        min_chars=4, colors=_typeahead_colors
+    )
+    typeahead.Typeahead(
+        entry_meter_number,
+        lambda t: [(f"{m}  \u2014  {name or cid}", m) for m, cid, name in database.suggest_meter_numbers(t)],
+        _set_entry_and_run(entry_meter_number, search_meter),
+        min_chars=3, colors=_typeahead_colors
+    )
+    typeahead.Typeahead(
+        entry_name,
+        lambda t: _profile_suggestions(database.search_consumers_by_name(t, limit=typeahead.MAX_ROWS)),
+        _open_consumer_from_selection,
+        min_chars=3, colors=_typeahead_colors
+    )
+    typeahead.Typeahead(
+        entry_address,
+        lambda t: _profile_suggestions(database.search_consumers_by_address(t, limit=typeahead.MAX_ROWS)),
+        _open_consumer_from_selection,
+        min_chars=3, colors=_typeahead_colors
+    )
+    typeahead.Typeahead(
+        entry_mobile,
+        lambda t: [(f"{mob}  \u2014  {name or cid}", mob) for mob, cid, name in database.suggest_mobile_numbers(t)],
+        _set_entry_and_run(entry_mobile, search_mobile),
+        min_chars=4, colors=_typeahead_colors
+    )
+
 def search_meter():
     m = entry_meter_number.get().strip()
     if not m: return
@@ -1103,6 +1228,25 @@ def search_name():
     show_search_results_selector(results, f"Name Search: {name_query}")
 
 
+def search_address():
+    address_query = entry_address.get().strip()
+    if len(address_query) < 3:
+        messagebox.showwarning("Error", "Enter at least 3 characters for Address search.")
+        return
+
+    results = utils.search_consumers_by_address(address_query, limit=300)
+    if not results:
+        messagebox.showinfo("Not Found", "No consumer found for this address.")
+        return
+
+    utils.save_search_history("consumer_addresses", address_query)
+    if len(results) == 1:
+        _open_consumer_from_selection(results[0].get("consumer_id", ""))
+        return
+
+    show_search_results_selector(results, f"Address Search: {address_query}")
+
+
 def search_mobile():
     raw_mobile = entry_mobile.get().strip()
     normalized = re.sub(r"\D", "", raw_mobile)
@@ -1175,7 +1319,7 @@ def import_consumer_data_threaded():
     def open_file_picker():
         utils.console_log("Step 1: Opening File Dialog (askopenfilename)...")
         try:
-            path = filedialog.askopenfilename(filetypes=[("Excel", "*.xlsx *.xls")])
+            path = filedialog.askopenfilename(filetypes=[("Excel or CSV", "*.xlsx *.xlsm *.csv"), ("Excel", "*.xlsx *.xlsm"), ("CSV", "*.csv")])
             utils.console_log(f"Step 1: Dialog Result -> {path}")
         except Exception as e:
             utils.console_log(f"!!! ERROR in File Dialog: {e}")
@@ -1193,88 +1337,22 @@ def import_consumer_data_threaded():
         threading.Thread(target=worker, args=(path,), daemon=True).start()
 
     def worker(file_path):
-        utils.console_log(f"WORKER: Reading file {file_path} with openpyxl")
+        utils.console_log(f"WORKER: Streaming {file_path} into the database")
         try:
-            d = {}
-            wb = openpyxl.load_workbook(file_path)
-            sheet = wb.active
-
-            header_map = {
-                "consumer id": "consumer_id",
-                "consumerid": "consumer_id",
-                "meter no": "meter_no",
-                "meterno": "meter_no",
-                "name": "name",
-                "address": "address",
-                "mobile number": "mobile_number",
-                "mobilenumber": "mobile_number",
-                "mobile": "mobile_number",
-                "contractual load": "contractual_load",
-                "contractualload": "contractual_load",
-                "class": "class",
-            }
-
-            rows = list(sheet.iter_rows(values_only=True))
-            if not rows:
-                raise ValueError("Excel sheet is empty.")
-
-            first_row = rows[0]
-            index_map = {}
-            for idx, val in enumerate(first_row):
-                if val is None:
-                    continue
-                key = str(val).strip().lower().replace("_", " ")
-                key = " ".join(key.split())
-                key_compact = key.replace(" ", "")
-                mapped = header_map.get(key) or header_map.get(key_compact)
-                if mapped:
-                    index_map[mapped] = idx
-
-            has_headers = "consumer_id" in index_map and "meter_no" in index_map
-            data_rows = rows[1:] if has_headers else rows
-
-            for row in data_rows:
-                if not row:
-                    continue
-
-                def get_value(field, fallback_idx):
-                    idx = index_map.get(field, fallback_idx)
-                    if idx is None or idx >= len(row):
-                        return ""
-                    val = row[idx]
-                    if val is None:
-                        return ""
-                    if isinstance(val, float) and val.is_integer():
-                        return str(int(val)).strip()
-                    return str(val).strip()
-
-                cid = get_value("consumer_id", 0)
-                meter_no = get_value("meter_no", 1)
-                if not cid or not meter_no:
-                    continue
-
-                mobile = re.sub(r"\D", "", get_value("mobile_number", 4))
-                if len(mobile) == 12 and mobile.startswith("91"):
-                    mobile = mobile[2:]
-
-                d[cid] = {
-                    "meter_no": meter_no,
-                    "name": get_value("name", 2),
-                    "address": get_value("address", 3),
-                    "mobile_number": mobile,
-                    "contractual_load": get_value("contractual_load", 5),
-                    "class": get_value("class", 6),
-                }
-
-            utils.console_log(f"WORKER: Processed {len(d)} rows.")
-
-            utils.update_meter_mapping(d)
-            utils.console_log("WORKER: Database updated.")
-
-            root.after(0, lambda: messagebox.showinfo("Success", f"Consumer data updated.\nRecords imported: {len(d)}"))
+            def on_progress(n):
+                root.after(0, lambda: status_label.config(text=f"Importing consumers: {n:,} rows", bootstyle="warning"))
+
+            # Raises ValueError, keeping the old data, when the file has no consumer rows.
+            loaded, summary = consumer_import.import_consumer_file(file_path, on_progress)
+            utils.console_log(f"WORKER: Processed {loaded} rows. Database updated.")
+
+            msg = (f"Consumer data updated.\nRecords imported: {loaded}\n\n"
+                   f"New: {len(summary['inserted'])}   Changed: {len(summary['changed'])}   "
+                   f"Removed: {len(summary['removed'])}")
+            root.after(0, lambda: messagebox.showinfo("Success", msg))
         except Exception as e:
             utils.console_log(f"!!! WORKER ERROR: {e}")
-            root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to read Excel.\n{str(e)}\n\nEnsure 'openpyxl' is installed."))
+            root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to import consumer data.\n{str(e)}\n\nThe previous consumer data was kept."))
         finally:
             utils.console_log("WORKER: Cleaning up UI.")
             root.after(0, reset_ui)
@@ -1284,76 +1362,11 @@ def import_consumer_data_threaded():
         update_meter_search_state()
         progress_bar.stop()
         progress_bar.pack_forget()
+        status_label.config(text=f"Total Indexed Images: {database.get_total_image_count()}", bootstyle="default")
 
     root.after(100, open_file_picker)
 
 
-def _normalize_fuzzy_text(value):
-    text = str(value or "").upper()
-    text = re.sub(r"[^A-Z0-9 ]+", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-
-def _normalize_mobile_10(value):
-    digits = re.sub(r"\D", "", str(value or ""))
-    if len(digits) == 12 and digits.startswith("91"):
-        digits = digits[2:]
-    return digits if len(digits) == 10 else ""
-
-
-def _tokenize_for_lookup(text):
-    tokens = [t for t in _normalize_fuzzy_text(text).split(" ") if len(t) >= 2]
-    return tokens
-
-
-def _fast_text_similarity(a, b):
-    """Return text similarity percentage using RapidFuzz when available."""
-    if not a or not b:
-        return 0.0
-
-    tokens_a = set(_tokenize_for_lookup(a))
-    tokens_b = set(_tokenize_for_lookup(b))
-
-    def token_sim(x, y):
-        if rapidfuzz_fuzz is not None:
-            return float(rapidfuzz_fuzz.ratio(x, y)) / 100.0
-        return SequenceMatcher(None, x, y).ratio()
-
-    # Coverage from input side: if most input tokens are found in DB text
-    # (even with minor spelling differences), score should remain high.
-    if tokens_a:
-        covered = 0
-        for ta in tokens_a:
-            best = 0.0
-            for tb in tokens_b:
-                s = token_sim(ta, tb)
-                if s > best:
-                    best = s
-            if best >= 0.80:
-                covered += 1
-        coverage_input = covered / len(tokens_a)
-    else:
-        coverage_input = 0.0
-
-    if rapidfuzz_fuzz is not None:
-        ratio_score = float(rapidfuzz_fuzz.ratio(a, b))
-        sort_score = float(rapidfuzz_fuzz.token_sort_ratio(a, b))
-        partial_score = float(rapidfuzz_fuzz.partial_ratio(a, b))
-        set_score = float(rapidfuzz_fuzz.token_set_ratio(a, b))
-
-        # Base score plus input-coverage boost for containment-style matches.
-        blended = (
-            (0.20 * ratio_score)
-            + (0.20 * sort_score)
-            + (0.25 * partial_score)
-            + (0.35 * set_score)
-        )
-        adjusted = blended * (0.55 + (0.90 * coverage_input))
-        return min(100.0, adjusted)
-    return SequenceMatcher(None, a, b).ratio() * 100.0
-
-
 def generate_fuzzy_lookup_template():
     try:
         save_path = filedialog.asksaveasfilename(
@@ -1404,6 +1417,21 @@ def run_fuzzy_lookup_threaded(threshold=0.85, top_n=5):
         if not input_path:
             return
 
+        if not database.has_meter_data():
+            messagebox.showwarning("No Consumer Data", "No consumer data found. Please update consumer data first.")
+            return
+
+        done_shards = fuzzy_batch.checkpoint_progress(input_path, threshold, top_n)
+        if done_shards and not messagebox.askyesno(
+            "Resume Fuzzy Lookup",
+            f"An earlier lookup of this file stopped after {done_shards} finished batch(es).\n\n"
+            "Resume it? Choose No to start over."
+        ):
+            try:
+                os.remove(fuzzy_batch.checkpoint_path(input_path))
+            except OSError:
+                pass
+
         input_dir = os.path.dirname(os.path.abspath(input_path))
         output_path = os.path.join(input_dir, "fuzzy_lookup_results.xlsx")
         if os.path.exists(output_path):
@@ -1413,244 +1441,26 @@ def run_fuzzy_lookup_threaded(threshold=0.85, top_n=5):
         progress_bar.config(mode="determinate", maximum=100)
         progress_bar["value"] = 0
         progress_bar.pack(side=RIGHT, padx=10)
-        status_label.config(text="Fuzzy Lookup: starting…")
+        status_label.config(text="Fuzzy Lookup: loading consumer index…")
         threading.Thread(target=worker, args=(input_path, output_path), daemon=True).start()
 
     def worker(input_path, output_path):
         start_time = time.time()
-        _processed = [0]
-        _total = [0]
-        _last_ui = [0.0]
 
-        def _update_progress():
-            pct = (_processed[0] / _total[0] * 100.0) if _total[0] else 0.0
+        def _update_progress(done, total):
+            pct = (done / total * 100.0) if total else 0.0
             elapsed_s = int(time.time() - start_time)
             progress_bar["value"] = pct
             status_label.config(
-                text=f"Fuzzy Lookup: {pct:.0f}% ({_processed[0]}/{_total[0]}) | Elapsed: {elapsed_s}s"
+                text=f"Fuzzy Lookup: {pct:.0f}% ({done}/{total}) | Elapsed: {elapsed_s}s"
             )
 
         try:
-            db_profiles = utils.get_all_consumer_profiles()
-            if not db_profiles:
-                root.after(0, lambda: messagebox.showwarning("No Consumer Data", "No consumer data found. Please update consumer data first."))
-                return
-
-            prepped_db = []
-            mobile_index = defaultdict(set)
-            prefix_index = defaultdict(set)
-            token_index = defaultdict(set)
-
-            for idx, row in enumerate(db_profiles):
-                db_name = str(row.get("name", ""))
-                db_address = str(row.get("address", ""))
-                db_combined_raw = f"{db_name} {db_address}".strip()
-                combined_norm = _normalize_fuzzy_text(db_combined_raw)
-                combined_tokens = set(_tokenize_for_lookup(combined_norm))
-                mobile_norm = _normalize_mobile_10(row.get("mobile_number", ""))
-
-                prepped_db.append({
-                    "consumer_id": str(row.get("consumer_id", "")),
-                    "name": db_name,
-                    "address": db_address,
-                    "mobile_number": str(row.get("mobile_number", "")),
-                    "mobile_norm": mobile_norm,
-                    "combined_norm": combined_norm,
-                    "tokens": combined_tokens,
-                })
-
-                if mobile_norm:
-                    mobile_index[mobile_norm].add(idx)
-
-                for tok in combined_tokens:
-                    if len(tok) >= 3:
-                        prefix_index[tok[:3]].add(idx)
-                    if len(tok) >= 4:
-                        token_index[tok].add(idx)
-
-            wb_in = openpyxl.load_workbook(input_path)
-            sh_in = wb_in.active
-            rows = list(sh_in.iter_rows(values_only=True))
-            if not rows:
-                raise ValueError("Input Excel is empty.")
-
-            header_map = {
-                "name": "name",
-                "co": "co",
-                "c/o": "co",
-                "careof": "co",
-                "address": "address",
-                "mobile": "mobile",
-                "mobilenumber": "mobile",
-                "mobile number": "mobile",
-            }
-
-            first_row = rows[0]
-            idx_map = {}
-            for i, v in enumerate(first_row):
-                if v is None:
-                    continue
-                key = str(v).strip().lower().replace("_", " ")
-                key = " ".join(key.split())
-                compact = key.replace(" ", "")
-                mapped = header_map.get(key) or header_map.get(compact)
-                if mapped:
-                    idx_map[mapped] = i
-
-            has_headers = "name" in idx_map and "address" in idx_map
-            data_rows = rows[1:] if has_headers else rows
-            _total[0] = len(data_rows)
-
-            def _get_input_value(row_vals, field, fallback_idx):
-                idx = idx_map.get(field, fallback_idx)
-                if idx is None or idx >= len(row_vals):
-                    return ""
-                val = row_vals[idx]
-                return "" if val is None else str(val).strip()
-
-            out_wb = openpyxl.Workbook()
-            out_sh = out_wb.active
-            out_sh.title = "FuzzyLookupResults"
-            out_headers = [
-                "Input Name",
-                "Input C/O",
-                "Input Address",
-                "Input Mobile",
-                "Matched Consumer ID",
-                "Matched Name",
-                "Matched Address",
-                "Matched Mobile",
-                "Combined Text Match %",
-                "Mobile Exact Match %",
-                "Final Score %",
-                "Match Type",
-                "Rank",
-            ]
-            out_sh.append(out_headers)
-
-            for in_row in data_rows:
-                _processed[0] += 1
-                _now = time.time()
-                if _now - _last_ui[0] >= 0.15:
-                    _last_ui[0] = _now
-                    root.after(0, _update_progress)
-
-                if not in_row:
-                    continue
-
-                input_name = _get_input_value(in_row, "name", 0)
-                input_co = _get_input_value(in_row, "co", 1)
-                input_address = _get_input_value(in_row, "address", 2)
-                input_mobile = _get_input_value(in_row, "mobile", 3)
-
-                if not (input_name or input_co or input_address or input_mobile):
-                    continue
-
-                input_combined = _normalize_fuzzy_text(f"{input_name} {input_co} {input_address}")
-                input_mobile_norm = _normalize_mobile_10(input_mobile)
-                input_tokens = [t for t in _tokenize_for_lookup(input_combined) if len(t) >= 3]
-
-                candidate_ids = set()
-
-                # Exact mobile is the strongest and fastest blocker.
-                if input_mobile_norm:
-                    candidate_ids.update(mobile_index.get(input_mobile_norm, set()))
-
-                # Prefix blocking from first few input tokens.
-                for tok in input_tokens[:6]:
-                    candidate_ids.update(prefix_index.get(tok[:3], set()))
-
-                # Add candidates by longest tokens to improve precision.
-                longest_tokens = sorted({t for t in input_tokens if len(t) >= 4}, key=len, reverse=True)[:4]
-                for tok in longest_tokens:
-                    candidate_ids.update(token_index.get(tok, set()))
-
-                # Fallback: if blocking is too narrow, relax using only prefixes.
-                if not candidate_ids and input_tokens:
-                    for tok in input_tokens:
-                        candidate_ids.update(prefix_index.get(tok[:3], set()))
-
-                # Last-resort fallback keeps behavior robust for unusual/short inputs.
-                if not candidate_ids:
-                    candidate_ids = set(range(len(prepped_db)))
-
-                candidates = []
-                for cand_idx in candidate_ids:
-                    db_row = prepped_db[cand_idx]
-                    text_score = 0.0
-                    if input_combined and db_row["combined_norm"]:
-                        if input_tokens and db_row["tokens"]:
-                            overlap = len(set(input_tokens).intersection(db_row["tokens"]))
-                            if overlap == 0 and (not input_mobile_norm or db_row["mobile_norm"] != input_mobile_norm):
-                                continue
-                        text_score = _fast_text_similarity(input_combined, db_row["combined_norm"])
-
-                    mobile_score = 100.0 if (input_mobile_norm and db_row["mobile_norm"] == input_mobile_norm) else 0.0
-                    final_score = max(text_score, mobile_score)
-
-                    if text_score >= (threshold * 100.0) or mobile_score == 100.0:
-                        candidates.append({
-                            "db": db_row,
-                            "text_score": text_score,
-                            "mobile_score": mobile_score,
-                            "final_score": final_score,
-                        })
-
-                candidates.sort(key=lambda x: (x["final_score"], x["text_score"], x["mobile_score"]), reverse=True)
-                candidates = candidates[:top_n]
-
-                if not candidates:
-                    out_sh.append([
-                        input_name,
-                        input_co,
-                        input_address,
-                        input_mobile,
-                        "",
-                        "",
-                        "",
-                        "",
-                        "0.00",
-                        "0.00",
-                        "0.00",
-                        "No Match",
-                        "",
-                    ])
-                    continue
-
-                rank = 1
-                for c in candidates:
-                    db_row = c["db"]
-                    if c["mobile_score"] == 100.0 and c["text_score"] >= (threshold * 100.0):
-                        match_type = "Both"
-                    elif c["mobile_score"] == 100.0:
-                        match_type = "Mobile Exact"
-                    else:
-                        match_type = "Fuzzy Text"
-
-                    out_sh.append([
-                        input_name,
-                        input_co,
-                        input_address,
-                        input_mobile,
-                        db_row["consumer_id"],
-                        db_row["name"],
-                        db_row["address"],
-                        db_row["mobile_number"],
-                        f"{c['text_score']:.2f}",
-                        f"{c['mobile_score']:.2f}",
-                        f"{c['final_score']:.2f}",
-                        match_type,
-                        rank,
-                    ])
-                    rank += 1
-
-            widths = [24, 24, 36, 16, 18, 26, 36, 16, 20, 18, 14, 14, 10]
-            for idx, width in enumerate(widths, start=1):
-                col = openpyxl.utils.get_column_letter(idx)
-                out_sh.column_dimensions[col].width = width
-            out_sh.freeze_panes = "A2"
-
-            out_wb.save(output_path)
+            matcher = fuzzy_batch.FuzzyMatcher(
+                threshold, top_n,
+                progress=lambda done, total: root.after(0, lambda: _update_progress(done, total))
+            )
+            matcher.run_file(input_path, output_path)
             root.after(0, lambda: messagebox.showinfo("Fuzzy Lookup Complete", f"Results exported to:\n{output_path}"))
         except Exception as e:
             root.after(0, lambda e=e: messagebox.showerror("Fuzzy Lookup Error", str(e)))
@@ -1940,6 +1750,8 @@ root.config(menu=mb)
 fm = Menu(mb, tearoff=0)
 mb.add_cascade(label="File", menu=fm)
 fm.add_command(label="Reload Images", command=start_indexing_process)
+watch_var = tk.BooleanVar(value=bool(database.get_info_value("watch_folders", False)))
+fm.add_checkbutton(label="Watch Folders (Live Index)", variable=watch_var, command=toggle_folder_watch)
 fm.add_command(label="Update Consumer Data", command=update_meter_list_threaded)
 fm.add_separator()
 fm.add_command(label="Exit", command=root.quit)
@@ -2024,14 +1836,25 @@ btn_search_mobile.grid(row=1, column=5, padx=(0, 4), pady=2, sticky="w")
 # ── Row 1 col 6: spacer-aligned with Update Consumer Data above ──
 # (empty cell keeps columns aligned)
 
-# ── Row 2: hint label (shown only when consumer data is absent) ──
+# ── Row 2: Address (greyed when no consumer data loaded) ──
+tb.Label(search_card, text="Address", font=("Segoe UI", 9, "bold")).grid(row=2, column=0, padx=(4, 4), pady=2, sticky="e")
+entry_address = tb.Entry(search_card, width=22, font=("Segoe UI", 10))
+entry_address.grid(row=2, column=1, padx=(0, 6), pady=2, sticky="w")
+entry_address.bind("<Return>", lambda e: search_address())
+entry_address.bind("<space>", lambda e: show_history(e, "consumer_addresses", entry_address))
+btn_search_address = tb.Button(search_card, text="Search Address", width=12, bootstyle="primary", command=search_address)
+btn_search_address.grid(row=2, column=2, padx=(0, 10), pady=2)
+
+setup_typeahead()
+
+# ── Row 3: hint label (shown only when consumer data is absent) ──
 lbl_consumer_hint = tb.Label(
     search_card,
-    text="\u26a0  Update Consumer Data to enable Meter No, Name & Mobile search",
+    text="\u26a0  Update Consumer Data to enable Meter No, Name, Address & Mobile search",
     font=("Segoe UI", 8),
     bootstyle="warning"
 )
-lbl_consumer_hint.grid(row=2, column=0, columnspan=7, padx=(4, 4), pady=(0, 2), sticky="w")
+lbl_consumer_hint.grid(row=3, column=0, columnspan=7, padx=(4, 4), pady=(0, 2), sticky="w")
 
 # ── Utility buttons — far right (spacer col 6 keeps visual separation) ──
 btn_theme_toggle = tb.Button(search_card, text="Dark Mode", width=14, command=toggle_theme, bootstyle="primary")
@@ -2100,6 +1923,7 @@ preview_canvas_scroller.configure(yscrollcommand=preview_scrollbar.set)
 
 preview_canvas_scroller.pack(side="left", fill="both", expand=True)
 preview_scrollbar.pack(side="right", fill="y")
+previews_loader = preview_loader.PreviewLoader(root)
 
 def _on_preview_mousewheel(event):
     preview_canvas_scroller.yview_scroll(int(-1 * (event.delta / 120)), "units")
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import thumbnail_cache
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.PREVIEW_WORKERS, thread_name_prefix="preview")
+    return _executor
+
+
+class PreviewLoader:
+    """Decodes preview thumbnails in the background for one preview grid.
+
+    `load(items, on_ready)` takes (key, path) pairs in display order and calls
+    `on_ready(key, image)` on the Tk thread, strictly in that order, as
+    thumbnails become available (`image` is None if the file could not be
+    read). Starting a new load, or calling `cancel()`, drops whatever is
+    still outstanding from the previous one. All loaders share one thread pool.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures = []
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            futures, self._futures = self._futures, []
+        for f in futures:
+            f.cancel()
+
+    def load(self, items, on_ready):
+        self.cancel()
+        with self._lock:
+            generation = self._generation
+        items = list(items)
+        results = {}
+        state = {"next": 0}
+        cache = thumbnail_cache.get_cache()
+
+        def decode(path):
+            if self._generation != generation:
+                return None
+            try:
+                return cache.get_or_create(path)
+            except Exception:
+                return None
+
+        def deliver(batch):
+            if self._generation != generation:
+                return
+            for key, image in batch:
+                try:
+                    on_ready(key, image)
+                except Exception:
+                    pass
+
+        def done(index, future):
+            if future.cancelled():
+                return
+            with self._lock:
+                if self._generation != generation:
+                    return
+                results[index] = future.result()
+                batch = []
+                while state["next"] in results:
+                    n = state["next"]
+                    batch.append((items[n][0], results.pop(n)))
+                    state["next"] = n + 1
+            if batch:
+                try:
+                    self.widget.after(0, lambda: deliver(batch))
+                except Exception:
+                    pass
+
+        executor = _get_executor()
+        futures = []
+        for index, (_, path) in enumerate(items):
+            f = executor.submit(decode, path)
+            f.add_done_callback(lambda fut, i=index: done(i, fut))
+            futures.append(f)
+        with self._lock:
+            if self._generation == generation:
+                self._futures = futures
@@ -0,0 +1,82 @@
+import csv
+import os
+import time
+
+try:
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+except Exception:
+    openpyxl = None
+
+PROGRESS_INTERVAL = 0.25
+
+
+def _reporter(progress):
+    """Wrap `progress(rows_written)` so it fires at most every PROGRESS_INTERVAL seconds."""
+    state = {"last": 0.0}
+
+    def report(n, final=False):
+        now = time.monotonic()
+        if progress and (final or now - state["last"] >= PROGRESS_INTERVAL):
+            state["last"] = now
+            progress(n)
+
+    return report
+
+
+def write_csv(path, headers, rows, progress=None):
+    """Stream `rows` (sequences, or dicts keyed by `headers`) to a UTF-8 CSV file.
+
+    Returns the number of data rows written.
+    """
+    report = _reporter(progress)
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            if isinstance(row, dict):
+                row = [row.get(h, "") for h in headers]
+            writer.writerow(row)
+            n += 1
+            report(n)
+    report(n, final=True)
+    return n
+
+
+def write_xlsx(path, headers, rows, widths=None, title=None, freeze="A2", progress=None):
+    """Stream `rows` to an .xlsx file through a write-only worksheet.
+
+    Rows go straight to the file as they are produced, so memory stays flat
+    however many there are. `widths` are column widths in header order;
+    `freeze` is the top-left unfrozen cell (None for no frozen panes).
+    Returns the number of data rows written.
+    """
+    if openpyxl is None:
+        raise RuntimeError("openpyxl is required to write Excel files.")
+    report = _reporter(progress)
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet(title or "Sheet1")
+    # Write-only sheets take layout settings only before the first row.
+    for idx, width in enumerate(widths or [], start=1):
+        sheet.column_dimensions[get_column_letter(idx)].width = width
+    if freeze:
+        sheet.freeze_panes = freeze
+    sheet.append(list(headers))
+    n = 0
+    for row in rows:
+        if isinstance(row, dict):
+            row = [row.get(h, "") for h in headers]
+        sheet.append(list(row))
+        n += 1
+        report(n)
+    wb.save(path)
+    report(n, final=True)
+    return n
+
+
+def write_table(path, headers, rows, widths=None, title=None, progress=None):
+    """write_xlsx for .xlsx paths, write_csv for anything else."""
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        return write_xlsx(path, headers, rows, widths=widths, title=title, progress=progress)
+    return write_csv(path, headers, rows, progress=progress)
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import consumer_import
+import database
+import db_connections
+
+ROWS = [
+    ("100000001", "M1", "RAMESH DAS", "KRISHNANAGAR", "9876543210", "1", "LT"),
+    ("100000002", "M2", "SUMAN GHOSH", "RANAGHAT", "", "2", "LT"),
+]
+
+
+class EmptyImportTest(unittest.TestCase):
+    """An import with no usable rows must leave the existing consumers in place."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.saved_db = config.DB_FILE
+        config.DB_FILE = os.path.join(self.tmp.name, "images.db")
+        database.init_db()
+        database.import_meter_mapping(ROWS)
+
+    def tearDown(self):
+        db_connections.close_all()
+        config.DB_FILE = self.saved_db
+        self.tmp.cleanup()
+
+    def consumer_ids(self):
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute("SELECT consumer_id FROM meter_mapping ORDER BY consumer_id")
+        return [r[0] for r in cursor.fetchall()]
+
+    def import_csv(self, text):
+        path = os.path.join(self.tmp.name, "consumers.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return consumer_import.import_consumer_file(path)
+
+    def test_header_only_file_keeps_data(self):
+        with self.assertRaises(ValueError):
+            self.import_csv("Consumer ID,Meter No,Name,Address,Mobile Number,Contractual Load,Class\n")
+        self.assertTrue(database.has_meter_data())
+        self.assertEqual(self.consumer_ids(), ["100000001", "100000002"])
+
+    def test_blank_meter_numbers_keep_data(self):
+        with self.assertRaises(ValueError):
+            self.import_csv("Consumer ID,Meter No,Name,Address\n100000003,,A B,X\n100000004,,C D,Y\n")
+        self.assertEqual(self.consumer_ids(), ["100000001", "100000002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
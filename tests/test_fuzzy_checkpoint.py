@@ -0,0 +1,106 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import database
+import db_connections
+import fuzzy_batch
+
+NAMES = ["RAMESH DAS", "SUMAN GHOSH", "PRADIP MONDAL", "ANITA SAHA", "BIKASH SARKAR", "DIPAK PAUL",
+         "MOUSUMI ROY", "TAPAN BISWAS", "SWAPAN HALDER", "RINA KHATUN", "GOPAL SEN", "KAKALI DUTTA"]
+PLACES = ["KRISHNANAGAR", "RANAGHAT", "SANTIPUR", "CHAKDAHA", "KALYANI", "NABADWIP", "TEHATTA"]
+
+ROWS = [(str(100000000 + i), f"M{i}", f"{NAMES[i % len(NAMES)]} {PLACES[i % 5][:4]}",
+         f"STATION ROAD {PLACES[i % len(PLACES)]}", str(9800000000 + i) if i % 3 else "", "1", "LT")
+        for i in range(60)]
+SHARD_ROWS = 5
+
+
+class Interrupted(Exception):
+    pass
+
+
+@unittest.skipUnless(fuzzy_batch.openpyxl is not None, "needs openpyxl")
+class CheckpointTest(unittest.TestCase):
+    """An interrupted batch lookup resumes from its checkpoint unless the consumer data changed."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.saved_db = config.DB_FILE
+        config.DB_FILE = os.path.join(self.tmp.name, "images.db")
+        database.init_db()
+        database.import_meter_mapping(ROWS)
+
+        self.input = os.path.join(self.tmp.name, "survey.xlsx")
+        wb = fuzzy_batch.openpyxl.Workbook()
+        wb.active.append(["NAME", "C/O", "ADDRESS", "MOBILE NUMBER"])
+        for _, _, name, address, mobile, _, _ in ROWS[::2]:
+            wb.active.append([name.replace("A", "O", 1), "", address, mobile[:6]])
+        wb.save(self.input)
+
+    def tearDown(self):
+        db_connections.close_all()
+        config.DB_FILE = self.saved_db
+        self.tmp.cleanup()
+
+    def run_file(self, name, stop_after=None):
+        """Run the lookup to a CSV; with `stop_after`, raise once that many shards are saved."""
+        calls = []
+
+        def progress(done, total):
+            calls.append(done)
+            # The first call reports the starting point, before any shard.
+            if stop_after is not None and len(calls) > stop_after:
+                raise Interrupted()
+
+        output = os.path.join(self.tmp.name, name)
+        fuzzy_batch.FuzzyMatcher(progress=progress).run_file(self.input, output, workers=1,
+                                                             shard_rows=SHARD_ROWS)
+        with open(output, encoding="utf-8-sig") as f:
+            return f.read()
+
+    def matched_rows(self, name):
+        """(CSV text, input rows matched) for a run; rows taken from the checkpoint are not matched."""
+        matched = []
+        match = fuzzy_batch.FuzzyMatcher.match
+
+        def counting(matcher, rows):
+            matched.append(len(rows))
+            return match(matcher, rows)
+
+        with mock.patch.object(fuzzy_batch.FuzzyMatcher, "match", counting):
+            return self.run_file(name), sum(matched)
+
+    def test_resume_matches_uninterrupted_run(self):
+        expected = self.run_file("full.csv")
+        self.assertFalse(os.path.exists(fuzzy_batch.checkpoint_path(self.input)))
+
+        with self.assertRaises(Interrupted):
+            self.run_file("resumed.csv", stop_after=2)
+        self.assertEqual(fuzzy_batch.checkpoint_progress(self.input, 0.85, 5, SHARD_ROWS), 2)
+
+        resumed, matched = self.matched_rows("resumed.csv")
+        self.assertEqual(resumed, expected)
+        self.assertEqual(matched, len(ROWS[::2]) - 2 * SHARD_ROWS)
+        self.assertFalse(os.path.exists(fuzzy_batch.checkpoint_path(self.input)))
+
+    def test_reimport_discards_checkpoint(self):
+        with self.assertRaises(Interrupted):
+            self.run_file("first.csv", stop_after=2)
+        version = database.get_master_version()
+        database.import_meter_mapping(ROWS[:-1])
+        self.assertGreater(database.get_master_version(), version)
+        self.assertEqual(fuzzy_batch.checkpoint_progress(self.input, 0.85, 5, SHARD_ROWS), 0)
+
+        output, matched = self.matched_rows("second.csv")
+        self.assertEqual(matched, len(ROWS[::2]))
+        self.assertEqual(output, self.run_file("fresh.csv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
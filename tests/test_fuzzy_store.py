@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import database
+import db_connections
+import fuzzy_lookup
+import fuzzy_store
+
+NAMES = ["RAMESH DAS", "SUMAN GHOSH", "PRADIP MONDAL", "ANITA SAHA", "BIKASH SARKAR", "DIPAK PAUL",
+         "MOUSUMI ROY", "TAPAN BISWAS", "SWAPAN HALDER", "RINA KHATUN", "GOPAL SEN", "KAKALI DUTTA"]
+PLACES = ["KRISHNANAGAR", "RANAGHAT", "SANTIPUR", "CHAKDAHA", "KALYANI", "NABADWIP", "TEHATTA"]
+
+
+def consumer(i, name=None, mobile=None):
+    return (str(100000000 + i), f"M{i}", name or f"{NAMES[i % len(NAMES)]} {i}",
+            f"STATION ROAD {i % 9} {PLACES[i % len(PLACES)]}",
+            mobile if mobile is not None else (str(9800000000 + i) if i % 3 else ""), "1", "LT")
+
+
+ROWS = [consumer(i) for i in range(60)]
+
+
+@unittest.skipUnless(fuzzy_lookup.np is not None and fuzzy_lookup.process is not None,
+                     "needs NumPy and rapidfuzz")
+class FuzzySyncTest(unittest.TestCase):
+    """Patching the fuzzy tables after an import must give what a full rebuild gives."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.saved_db = config.DB_FILE
+        config.DB_FILE = os.path.join(self.tmp.name, "images.db")
+        database.init_db()
+        database.import_meter_mapping(ROWS)
+        fuzzy_store.ensure_built()
+
+    def tearDown(self):
+        db_connections.close_all()
+        config.DB_FILE = self.saved_db
+        self.tmp.cleanup()
+
+    def dump(self):
+        """(rows with their token strings, blocks, vocabulary) with vocab ids resolved away."""
+        cursor = db_connections.get_connection().cursor()
+        vocab = dict(cursor.execute("SELECT id, token FROM fuzzy_vocab").fetchall())
+        rows = [(row_id, text, mobile, name, [vocab[t] for t in array("i", tokens)])
+                for row_id, text, mobile, name, tokens
+                in cursor.execute("SELECT row_id, text, mobile, name, tokens FROM fuzzy_rows ORDER BY row_id")]
+        blocks = {key: list(array("i", members))
+                  for key, members in cursor.execute("SELECT key, rows FROM fuzzy_blocks")}
+        return rows, blocks, set(vocab.values())
+
+    def test_sync_matches_rebuild(self):
+        rows = list(ROWS)
+        rows[2] = consumer(2, name="PRADIP KUMAR MONDAL")
+        rows[7] = consumer(7, mobile="9123456789")
+        rows[8] = rows[8][:3] + ("SCHOOL PARA FULIA",) + rows[8][4:]
+        del rows[20]
+        rows.append(consumer(60, name="NIRMAL CHOWDHURY"))
+        database.import_meter_mapping(rows)
+
+        cursor = db_connections.get_connection().cursor()
+        self.assertIsNotNone(fuzzy_store._version(cursor), "import dropped the index instead of patching it")
+        synced_rows, synced_blocks, synced_vocab = self.dump()
+
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            fuzzy_store.rebuild(cursor)
+        rebuilt_rows, rebuilt_blocks, rebuilt_vocab = self.dump()
+
+        self.assertEqual(synced_rows, rebuilt_rows)
+        self.assertEqual(synced_blocks, rebuilt_blocks)
+        # Sync only appends to the vocabulary; tokens no row uses any more are harmless.
+        self.assertLessEqual(rebuilt_vocab, synced_vocab)
+        self.assertIn("NIRMAL", rebuilt_vocab)
+
+
+if __name__ == "__main__":
+    unittest.main()
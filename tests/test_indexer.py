@@ -0,0 +1,121 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import database
+import db_connections
+import indexer
+
+
+def image_name(consumer, day=1, suffix=".jpg"):
+    return f"{day:02d}012024MRU00001{100000000 + consumer:09d}{suffix}"
+
+
+class IncrementalIndexTest(unittest.TestCase):
+    """index_images re-lists only the directories whose mtime changed."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.saved_db = config.DB_FILE
+        config.DB_FILE = os.path.join(self.tmp.name, "images.db")
+        database.init_db()
+        self.root = os.path.join(self.tmp.name, "image")
+        for sub, consumers in (("a", [1, 2]), ("b", [3]), (os.path.join("b", "c"), [4, 5])):
+            os.makedirs(os.path.join(self.root, sub))
+            for consumer in consumers:
+                self.write(sub, image_name(consumer))
+        self.assertEqual(self.index(), 5)
+
+    def tearDown(self):
+        db_connections.close_all()
+        config.DB_FILE = self.saved_db
+        self.tmp.cleanup()
+
+    def path(self, sub):
+        return os.path.join(self.root, sub)
+
+    def write(self, sub, filename):
+        with open(os.path.join(self.path(sub), filename), "wb") as f:
+            f.write(b"jpg")
+
+    def touch(self, sub):
+        """Move a directory's mtime on explicitly, so the test never depends on timestamp resolution."""
+        mtime = os.stat(self.path(sub)).st_mtime + 10
+        os.utime(self.path(sub), (mtime, mtime))
+
+    def index(self):
+        return indexer.index_images([self.root], workers=2)
+
+    def synced(self):
+        """Run index_images and return the directories it listed again, relative to the root."""
+        calls = []
+        sync = indexer._sync_directory
+
+        def recording(cursor, dir_path, *args):
+            calls.append(os.path.relpath(dir_path, self.root))
+            return sync(cursor, dir_path, *args)
+
+        with mock.patch.object(indexer, "_sync_directory", recording):
+            self.index()
+        return sorted(calls)
+
+    def indexed(self):
+        conn = database.get_db_connection()
+        try:
+            rows = conn.execute(
+                "SELECT d.dir_path, i.consumer_id, i.date, m.mru, i.suffix FROM images i "
+                "JOIN directories d ON d.id = i.dir_id JOIN mrus m ON m.id = i.mru_id"
+            ).fetchall()
+        finally:
+            conn.close()
+        return sorted((os.path.relpath(d, self.root), database.compose_filename(cid, date, mru, suffix))
+                      for d, cid, date, mru, suffix in rows)
+
+    def test_unchanged_directories_are_skipped(self):
+        before = self.indexed()
+        self.assertEqual(self.synced(), [])
+        self.assertEqual(self.indexed(), before)
+
+    def test_added_and_removed_files(self):
+        self.write("a", image_name(6))
+        os.remove(os.path.join(self.path(os.path.join("b", "c")), image_name(4)))
+        self.touch("a")
+        self.touch(os.path.join("b", "c"))
+
+        self.assertEqual(self.synced(), ["a", os.path.join("b", "c")])
+        self.assertEqual(self.indexed(), [
+            ("a", image_name(1)), ("a", image_name(2)), ("a", image_name(6)),
+            ("b", image_name(3)), (os.path.join("b", "c"), image_name(5)),
+        ])
+
+    def test_touched_directory_is_resynced(self):
+        before = self.indexed()
+        self.touch("b")
+        self.assertEqual(self.synced(), ["b"])
+        self.assertEqual(self.indexed(), before)
+        # The new mtime was stored, so the next pass skips it again.
+        self.assertEqual(self.synced(), [])
+
+    def test_removed_directory_is_purged(self):
+        c = self.path(os.path.join("b", "c"))
+        for filename in os.listdir(c):
+            os.remove(os.path.join(c, filename))
+        os.rmdir(c)
+        self.touch("b")
+
+        self.assertEqual(self.synced(), ["b"])
+        self.assertEqual(self.indexed(), [("a", image_name(1)), ("a", image_name(2)), ("b", image_name(3))])
+        conn = database.get_db_connection()
+        try:
+            self.assertIsNone(conn.execute("SELECT id FROM directories WHERE dir_path = ?", (c,)).fetchone())
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
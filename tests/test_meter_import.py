@@ -0,0 +1,104 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import database
+import db_connections
+
+PLACES = ["KRISHNANAGAR", "RANAGHAT", "SANTIPUR", "CHAKDAHA", "KALYANI"]
+
+
+def consumer(i, name=None, address=None):
+    return (str(100000000 + i), f"M{i}", name or f"CONSUMER {i:03d}", address or PLACES[i % len(PLACES)],
+            "", "1", "LT")
+
+
+ROWS = [consumer(i) for i in range(40)]
+
+
+class MeterImportTest(unittest.TestCase):
+    """Re-importing consumer data patches meter_mapping and consumer_fts in place."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.saved_db = config.DB_FILE
+        config.DB_FILE = os.path.join(self.tmp.name, "images.db")
+        database.init_db()
+        database.import_meter_mapping(ROWS)
+
+    def tearDown(self):
+        db_connections.close_all()
+        config.DB_FILE = self.saved_db
+        self.tmp.cleanup()
+
+    def query(self, sql, params=()):
+        cursor = db_connections.get_connection().cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def rowids(self):
+        return dict((cid, rowid) for rowid, cid in self.query("SELECT rowid, consumer_id FROM meter_mapping"))
+
+    def fts_ids(self, text):
+        return sorted(r[0] for r in self.query(
+            "SELECT m.consumer_id FROM consumer_fts JOIN meter_mapping m ON m.rowid = consumer_fts.rowid "
+            "WHERE consumer_fts MATCH ?", (f'"{text}"',)))
+
+    def assert_fts_consistent(self):
+        with db_connections.write_transaction() as cursor:
+            cursor.execute("INSERT INTO consumer_fts(consumer_fts) VALUES ('integrity-check')")
+
+    def reimport(self):
+        rows = list(ROWS)
+        rows[3] = consumer(3, name="NIRMAL HALDER")
+        rows[4] = consumer(4, address="NABADWIP STATION ROAD")
+        rows[5] = rows[5][:4] + ("9876543210",) + rows[5][5:]
+        del rows[10]
+        rows.append(consumer(99, name="BIKASH SARKAR", address="NABADWIP BAZAR"))
+        return rows
+
+    def test_reimport_reports_changes(self):
+        summary = database.import_meter_mapping(self.reimport())
+        self.assertEqual(summary["inserted"], ["100000099"])
+        self.assertEqual(sorted(summary["changed"]), ["100000003", "100000004", "100000005"])
+        self.assertEqual(summary["removed"], ["100000010"])
+        self.assertEqual(self.query("SELECT name, mobile_number FROM meter_mapping WHERE consumer_id = ?",
+                                    ("100000005",)), [("CONSUMER 005", "9876543210")])
+        self.assertEqual(len(self.query("SELECT 1 FROM meter_mapping")), len(ROWS))
+
+    def test_reimport_keeps_rowids(self):
+        before = self.rowids()
+        database.import_meter_mapping(self.reimport())
+        after = self.rowids()
+        self.assertNotIn("100000010", after)
+        for cid, rowid in after.items():
+            if cid in before:
+                self.assertEqual(rowid, before[cid], cid)
+        self.assertGreater(after["100000099"], max(before.values()))
+
+    def test_fts_follows_reimport(self):
+        database.import_meter_mapping(self.reimport())
+        self.assertEqual(self.fts_ids("HALDER"), ["100000003"])
+        self.assertEqual(self.fts_ids("CONSUMER 003"), [])
+        self.assertEqual(self.fts_ids("NABADWIP"), ["100000004", "100000099"])
+        self.assertEqual(self.fts_ids("CONSUMER 010"), [])
+        self.assert_fts_consistent()
+
+    def test_failed_import_rolls_back(self):
+        before = self.query("SELECT rowid, * FROM meter_mapping ORDER BY rowid")
+        with mock.patch.object(database, "_create_meter_mapping_indexes", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                database.import_meter_mapping(self.reimport())
+        self.assertEqual(self.query("SELECT rowid, * FROM meter_mapping ORDER BY rowid"), before)
+        self.assertEqual(self.fts_ids("HALDER"), [])
+        self.assertEqual(self.fts_ids("CONSUMER 010"), ["100000010"])
+        self.assert_fts_consistent()
+
+
+if __name__ == "__main__":
+    unittest.main()
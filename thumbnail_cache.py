@@ -0,0 +1,131 @@
+import io
+import os
+import sqlite3
+import threading
+import time
+
+from PIL import Image
+
+import config
+import image_loader
+
+THUMB_SIZE = (180, 180)
+JPEG_QUALITY = 85
+# A hit only rewrites last_used once it is this many seconds old, so
+# browsing cached previews does not commit on every read.
+LAST_USED_RESOLUTION = 3600
+
+
+def make_thumbnail(path, size=THUMB_SIZE):
+    """Decode `path` and return an RGB thumbnail no larger than `size`."""
+    im, _ = image_loader.open_image(path, box=size)
+    with im:
+        im.thumbnail(size)
+        return im.convert("RGB")
+
+
+class ThumbnailCache:
+    """Persistent store of preview thumbnails in a sidecar SQLite file.
+
+    Entries are keyed by the image path and validated against the file's
+    mtime and size, so a replaced image is re-thumbnailed automatically.
+    The store is trimmed least-recently-used first once it grows past
+    `max_bytes`; recency is tracked to within LAST_USED_RESOLUTION.
+    """
+
+    def __init__(self, db_file=None, max_bytes=None):
+        self.db_file = db_file or config.THUMB_DB_FILE
+        self.max_bytes = max_bytes or config.THUMB_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS thumbs (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER,
+                size INTEGER,
+                data BLOB,
+                nbytes INTEGER,
+                last_used REAL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_thumbs_last_used ON thumbs (last_used)')
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM thumbs").fetchone()[0]
+
+    @staticmethod
+    def _stat_key(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        """Return the cached thumbnail for `path`, or None if missing or stale."""
+        try:
+            mtime, size = self._stat_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_used FROM thumbs WHERE path = ? AND mtime = ? AND size = ?",
+                (path, mtime, size)
+            ).fetchone()
+            if not row:
+                return None
+            now = time.time()
+            if row[1] is None or now - row[1] >= LAST_USED_RESOLUTION:
+                self._conn.execute("UPDATE thumbs SET last_used = ? WHERE path = ?", (now, path))
+                self._conn.commit()
+        return Image.open(io.BytesIO(row[0]))
+
+    def put(self, path, thumb):
+        """Store `thumb` (a PIL image) for `path`."""
+        try:
+            mtime, size = self._stat_key(path)
+        except OSError:
+            return
+        buf = io.BytesIO()
+        thumb.save(buf, "JPEG", quality=JPEG_QUALITY)
+        data = buf.getvalue()
+        with self._lock:
+            old = self._conn.execute("SELECT nbytes FROM thumbs WHERE path = ?", (path,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbs (path, mtime, size, data, nbytes, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, mtime, size, sqlite3.Binary(data), len(data), time.time())
+            )
+            self._total += len(data) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def get_or_create(self, path):
+        """Cached thumbnail for `path`, decoding and storing it on a miss."""
+        thumb = self.get(path)
+        if thumb is None:
+            thumb = make_thumbnail(path)
+            self.put(path, thumb)
+        return thumb
+
+    def _evict(self):
+        # Trim to 90% so eviction does not run on every insert once full.
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for path, nbytes in self._conn.execute("SELECT path, nbytes FROM thumbs ORDER BY last_used ASC"):
+            if self._total <= target:
+                break
+            victims.append((path,))
+            self._total -= nbytes
+        self._conn.executemany("DELETE FROM thumbs WHERE path = ?", victims)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Shared ThumbnailCache for the application."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+    return _cache
@@ -0,0 +1,156 @@
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+import db_connections
+
+DEBOUNCE_MS = 250
+MAX_ROWS = 10
+# Keys that move the caret or focus rather than change the text.
+_NAV_KEYS = {"Up", "Down", "Left", "Right", "Return", "Escape", "Tab",
+             "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R", "Home", "End"}
+
+# One query thread for all entries; stale queries are interrupted, so one is plenty.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="typeahead")
+
+
+class Typeahead:
+    """Live suggestion dropdown for one Entry.
+
+    `fetch(text)` runs on a background thread once typing pauses for
+    DEBOUNCE_MS, if at least `min_chars` have been typed. It returns
+    [(label, value)] rows. The rows are shown under the entry; picking one
+    calls `on_pick(value)`. A newer keystroke interrupts a query still in
+    SQLite and drops its results, so the Tk thread never waits on the
+    database.
+    """
+
+    def __init__(self, entry, fetch, on_pick, min_chars=3, colors=None):
+        self.entry = entry
+        self.fetch = fetch
+        self.on_pick = on_pick
+        self.min_chars = min_chars
+        self.colors = colors
+        self._job = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._popup = None
+        self._listbox = None
+        self._values = []
+
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+        entry.bind("<Down>", self._focus_list, add="+")
+        entry.bind("<Escape>", lambda e: self.hide(), add="+")
+        entry.bind("<Return>", lambda e: self.hide(), add="+")
+        entry.bind("<FocusOut>", lambda e: entry.after(150, self._hide_if_unfocused), add="+")
+
+    def _on_key(self, event):
+        if event.keysym in _NAV_KEYS:
+            return
+        if self._job:
+            self.entry.after_cancel(self._job)
+        self._job = self.entry.after(DEBOUNCE_MS, self._start_query)
+
+    def _cancel_running(self):
+        with self._lock:
+            self._generation += 1
+            if self._conn is not None:
+                try:
+                    self._conn.interrupt()
+                except Exception:
+                    pass
+            return self._generation
+
+    def _start_query(self):
+        self._job = None
+        generation = self._cancel_running()
+        text = self.entry.get().strip()
+        if len(text) < self.min_chars:
+            self.hide()
+            return
+        _executor.submit(self._run, text, generation)
+
+    def _run(self, text, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._conn = db_connections.get_connection()
+        try:
+            rows = self.fetch(text)[:MAX_ROWS]
+        except Exception:
+            rows = []
+        finally:
+            with self._lock:
+                self._conn = None
+        if generation != self._generation:
+            return
+        try:
+            self.entry.after(0, lambda: self._show(rows, generation))
+        except Exception:
+            pass
+
+    def _show(self, rows, generation):
+        if generation != self._generation or not self.entry.winfo_exists():
+            return
+        if not rows:
+            self.hide()
+            return
+        if self._popup is None or not self._popup.winfo_exists():
+            self._popup = tk.Toplevel(self.entry)
+            self._popup.overrideredirect(True)
+            opts = self.colors() if callable(self.colors) else dict(self.colors or {})
+            self._listbox = tk.Listbox(self._popup, height=min(len(rows), MAX_ROWS),
+                                       font=("Segoe UI", 10), activestyle="none", **opts)
+            self._listbox.pack(fill=tk.BOTH, expand=True)
+            self._listbox.bind("<ButtonRelease-1>", self._pick)
+            self._listbox.bind("<Return>", self._pick)
+            self._listbox.bind("<Escape>", lambda e: (self.hide(), self.entry.focus_set()))
+            self._listbox.bind("<FocusOut>", lambda e: self.entry.after(150, self._hide_if_unfocused))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        width = max(self.entry.winfo_width(), 360)
+        self._popup.geometry(f"{width}x{min(len(rows), MAX_ROWS) * 20 + 4}+{x}+{y}")
+        self._listbox.delete(0, tk.END)
+        self._values = [value for _, value in rows]
+        for label, _ in rows:
+            self._listbox.insert(tk.END, label)
+        self._popup.lift()
+
+    def _focus_list(self, event=None):
+        if self._listbox is not None and self._popup is not None and self._popup.winfo_exists():
+            self._listbox.focus_set()
+            self._listbox.selection_clear(0, tk.END)
+            self._listbox.selection_set(0)
+            self._listbox.activate(0)
+            return "break"
+
+    def _pick(self, event=None):
+        sel = self._listbox.curselection() if self._listbox is not None else ()
+        if not sel:
+            return
+        value = self._values[sel[0]]
+        self.hide()
+        self.entry.focus_set()
+        self.on_pick(value)
+
+    def _hide_if_unfocused(self):
+        try:
+            focus = self.entry.focus_get()
+        except Exception:
+            focus = None
+        if focus not in (self.entry, self._listbox):
+            self.hide()
+
+    def hide(self):
+        if self._job:
+            self.entry.after_cancel(self._job)
+            self._job = None
+        self._cancel_running()
+        if self._popup is not None:
+            try:
+                self._popup.destroy()
+            except Exception:
+                pass
+        self._popup = None
+        self._listbox = None
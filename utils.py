@@ -24,6 +24,10 @@ def load_all_notes():
     """Loads all consumer notes from the database."""
     return database.get_all_notes()
 
+def iter_notes():
+    """Streams (consumer_id, note, remarks) rows from the database."""
+    return database.iter_notes()
+
 def save_note(cid, note, remarks):
     """Saves a single consumer note to the database."""
     database.save_note(cid, note, remarks)
@@ -51,6 +55,11 @@ def search_consumers_by_name(name_query, limit=200):
     return database.search_consumers_by_name(name_query, limit=limit)
 
 
+def search_consumers_by_address(address_query, limit=200):
+    """Search consumers by partial address, case-insensitive."""
+    return database.search_consumers_by_address(address_query, limit=limit)
+
+
 def search_consumers_by_mobile(mobile_number, limit=200):
     """Search consumers by exact 10-digit mobile number."""
     return database.search_consumers_by_mobile(mobile_number, limit=limit)
@@ -61,8 +70,8 @@ def get_all_consumer_profiles():
     return database.get_all_consumer_profiles()
     
 def update_meter_mapping(mapping_dict):
-    """Updates the meter mapping in the database."""
-    database.update_meter_mapping(mapping_dict)
+    """Updates the meter mapping in the database; returns the inserted/changed/removed IDs, or None on error."""
+    return database.update_meter_mapping(mapping_dict)
 
 def save_search_history(key, val):
     try:
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+
+import config
+import database
+import indexer
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except Exception:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+def is_network_path(path):
+    """True for UNC paths and mapped network drives, where change events are unreliable."""
+    if path.startswith("\\\\") or path.startswith("//"):
+        return True
+    if os.name == "nt":
+        try:
+            import ctypes
+            drive = os.path.splitdrive(os.path.abspath(path))[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+    return False
+
+
+class _DirtyHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = [getattr(event, "src_path", None), getattr(event, "dest_path", None)]
+        for p in paths:
+            if not p:
+                continue
+            if event.is_directory:
+                # A created/removed folder changes its parent's listing too.
+                self.watcher.mark_dirty(p)
+                self.watcher.mark_dirty(os.path.dirname(p))
+            elif indexer.parse_image_filename(os.path.basename(p)):
+                self.watcher.mark_dirty(os.path.dirname(p))
+
+
+class IndexWatcher:
+    """Keeps the images index live for the configured folders.
+
+    Local folders get change events through watchdog when it is installed.
+    Network shares (and everything, when watchdog is missing) are polled by
+    comparing each row of the directories table with the folder's mtime.
+    Changed folders are collected until no change has arrived for
+    `debounce` seconds (or for at most `max_delay` seconds while changes
+    keep coming) and then re-synced through indexer.refresh_directories.
+    """
+
+    def __init__(self, folders, on_change=None,
+                 poll_interval=config.WATCH_POLL_SECONDS,
+                 debounce=config.WATCH_DEBOUNCE_SECONDS,
+                 max_delay=config.WATCH_MAX_DELAY_SECONDS):
+        self.roots = [f for f in dict.fromkeys(folders) if f]
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._dirty = set()
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._threads = []
+
+    def mark_dirty(self, dir_path):
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty:
+                self._first_change = now
+            self._dirty.add(dir_path)
+            self._last_change = now
+        self._wake.set()
+
+    def start(self):
+        polled = self.roots
+        if Observer is not None:
+            local = [r for r in self.roots if os.path.isdir(r) and not is_network_path(r)]
+            if local:
+                try:
+                    self._observer = Observer()
+                    handler = _DirtyHandler(self)
+                    for r in local:
+                        self._observer.schedule(handler, r, recursive=True)
+                    self._observer.start()
+                    polled = [r for r in self.roots if r not in local]
+                except Exception as e:
+                    print(f"Watcher: falling back to polling ({e})")
+                    self._observer = None
+
+        self._threads = [threading.Thread(target=self._flush_loop, daemon=True)]
+        if polled:
+            self._threads.append(threading.Thread(target=self._poll_loop, args=(polled,), daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=2)
+            except Exception:
+                pass
+            self._observer = None
+
+    def is_running(self):
+        return not self._stop.is_set() and any(t.is_alive() for t in self._threads)
+
+    def _poll_loop(self, roots):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                for dir_path in self._changed_directories(roots):
+                    self.mark_dirty(dir_path)
+            except Exception as e:
+                print(f"Watcher poll error: {e}")
+
+    def _changed_directories(self, roots):
+        conn = database.get_db_connection()
+        try:
+            rows = conn.execute("SELECT dir_path, mtime FROM directories").fetchall()
+        finally:
+            conn.close()
+
+        known = {path for path, _ in rows}
+        changed = [r for r in roots if r not in known and os.path.isdir(r)]
+        for dir_path, mtime in rows:
+            if self._stop.is_set():
+                break
+            if not indexer.is_under(dir_path, roots):
+                continue
+            try:
+                current = os.stat(dir_path).st_mtime
+            except FileNotFoundError:
+                changed.append(dir_path)
+                continue
+            except OSError:
+                # Share offline; leave its rows alone.
+                continue
+            if current != mtime:
+                changed.append(dir_path)
+        return changed
+
+    def _take_batch(self):
+        """Wait for the changes to settle and return them, or None once stopped."""
+        while True:
+            with self._lock:
+                due = min(self._last_change + self.debounce, self._first_change + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining <= 0 or not self._dirty:
+                    batch = list(self._dirty)
+                    self._dirty.clear()
+                    self._wake.clear()
+                    return batch
+            # Every new change pushes `due` back; the loop re-reads it after each wait.
+            if self._stop.wait(remaining):
+                return None
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            try:
+                changes = indexer.refresh_directories(batch, self.roots)
+                if changes and self.on_change:
+                    self.on_change(changes)
+            except Exception as e:
+                print(f"Watcher refresh error: {e}")
@@ -0,0 +1,81 @@
+from PIL import Image
+
+import image_loader
+
+FAST_FILTER = Image.Resampling.BILINEAR
+FINE_FILTER = Image.Resampling.LANCZOS
+MIN_LEVEL_SIZE = 256
+
+
+class ZoomRenderer:
+    """Renders only the visible part of one image at any zoom.
+
+    Zoom is expressed as `scale`, display pixels per full-resolution pixel.
+    A pyramid of 2x reduced copies is built lazily from the decoded image,
+    and each render resamples just the viewport's region from the smallest
+    level that is still at least as large as the output. So the cost
+    follows the canvas size rather than the zoom factor. If the image was
+    opened as a reduced draft decode, it is re-decoded from `path` once a
+    zoom needs more detail than that.
+    """
+
+    def __init__(self, image, full_size, path=None):
+        self.path = path
+        self.full_size = tuple(full_size)
+        self._set_base(image)
+
+    def _set_base(self, image):
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGB")
+        self.levels = [image]
+
+    def _ensure_resolution(self, scale):
+        base = self.levels[0]
+        if not self.path or not image_loader.is_reduced(base, self.full_size):
+            return
+        if base.size[0] >= self.full_size[0] * scale:
+            return
+        try:
+            im, _ = image_loader.open_image(self.path, scale=scale)
+            self._set_base(im)
+        except Exception as e:
+            print(f"Zoom re-decode failed: {e}")
+
+    def _level_for(self, out_width):
+        i = 0
+        while self.levels[i].size[0] // 2 >= max(out_width, MIN_LEVEL_SIZE):
+            if i + 1 == len(self.levels):
+                self.levels.append(self.levels[i].reduce(2))
+            i += 1
+        return self.levels[i]
+
+    def render(self, view_size, scale, center, fast=False):
+        """Return (image, (x, y)) for the part of the picture inside the view.
+
+        `center` is the canvas position of the image's centre and (x, y)
+        the canvas position for the returned image's top-left corner.
+        `fast` trades LANCZOS for bilinear, for use while input is moving.
+        Returns (None, (0, 0)) when the image is entirely off-screen.
+        """
+        self._ensure_resolution(scale)
+        fw, fh = self.full_size
+        dw, dh = fw * scale, fh * scale
+        left = center[0] - dw / 2
+        top = center[1] - dh / 2
+
+        # Visible rectangle in display coordinates, snapped to whole canvas pixels.
+        x0 = max(0, round(left)) - left
+        y0 = max(0, round(top)) - top
+        x1 = min(view_size[0], round(left + dw)) - left
+        y1 = min(view_size[1], round(top + dh)) - top
+        out_w, out_h = round(x1 - x0), round(y1 - y0)
+        if out_w < 1 or out_h < 1:
+            return None, (0, 0)
+
+        level = self._level_for(dw)
+        kx = level.size[0] / dw
+        ky = level.size[1] / dh
+        box = (max(0.0, x0 * kx), max(0.0, y0 * ky),
+               min(level.size[0], x1 * kx), min(level.size[1], y1 * ky))
+        out = level.resize((out_w, out_h), FAST_FILTER if fast else FINE_FILTER, box=box)
+        return out, (round(left + x0), round(top + y0))